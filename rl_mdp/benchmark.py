@@ -0,0 +1,235 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from loguru import logger
+from scipy import sparse
+from scipy.sparse import linalg as sparse_linalg
+from rl_mdp.instrumentation.profiler import Profiler
+from rl_mdp.mdp.dense_transition_function import DenseTransitionFunction
+from rl_mdp.mdp.mdp import MDP
+from rl_mdp.mdp.sparse_mdp import SparseMDP
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.model_free_prediction.abstract_evaluator import AbstractEvaluator
+from rl_mdp.model_free_prediction.batched_td_evaluator import BatchedTDEvaluator
+from rl_mdp.model_free_prediction.monte_carlo_evaluator import MCEvaluator
+from rl_mdp.model_free_prediction.td_evaluator import TDEvaluator
+from rl_mdp.model_free_prediction.td_lambda_evaluator import TDLambdaEvaluator
+from rl_mdp.policy.tabular_policy import TabularPolicy
+from rl_mdp.util import create_chain_mdp, create_garnet_mdp, create_gridworld_mdp, create_random_policy
+
+# Generators of the benchmark MDPs, called with the (approximate) number of states and a seed.
+MDP_GENERATORS: Dict[str, Callable[[int, int], SparseMDP]] = {
+    "garnet": lambda num_states, seed: create_garnet_mdp(num_states, 4, 5, termination_prob=0.05, seed=seed),
+    "gridworld": lambda num_states, seed: create_gridworld_mdp(int(np.sqrt(num_states)), int(np.sqrt(num_states))),
+    "chain": lambda num_states, seed: create_chain_mdp(num_states, termination_prob=0.05),
+    "ring": lambda num_states, seed: create_chain_mdp(num_states, ring=True, termination_prob=0.05),
+}
+
+# Evaluators by name, created for an MDP.
+EVALUATORS: Dict[str, Callable[[MDP], AbstractEvaluator]] = {
+    "mc": lambda env: MCEvaluator(env),
+    "mc_compiled": lambda env: MCEvaluator(env, compiled=True),
+    "td": lambda env: TDEvaluator(env, alpha=0.05),
+    "td_compiled": lambda env: TDEvaluator(env, alpha=0.05, compiled=True),
+    "td_lambda": lambda env: TDLambdaEvaluator(env, alpha=0.05, lambd=0.8, sparse_traces=True),
+    "batched_td": lambda env: BatchedTDEvaluator(env, alpha=0.05),
+}
+
+BACKENDS = ("dense", "sparse")
+
+# Largest number of states for which the dense backend is benchmarked, P[s, a, s'] takes |S|²·|A| floats.
+MAX_DENSE_STATES = 2_000
+
+
+def to_dense_mdp(env: SparseMDP) -> MDP:
+    """
+    :param env: A sparse MDP.
+    :return: The same MDP with a dense transition function.
+    """
+    probabilities = env.transition_function.matrix.toarray().reshape(env.num_states, env.num_actions, env.num_states)
+    return MDP(range(env.num_states), range(env.num_actions), DenseTransitionFunction(probabilities),
+               env.reward_function, env.discount_factor, None, env.start_state, terminal_states=env.terminal_mask,
+               max_episode_steps=env.max_episode_steps)
+
+
+def expected_visits(env: MDP, policy: TabularPolicy) -> np.ndarray:
+    """
+    Solves (I - P_pi)ᵀ n = d₀ for the expected number of visits n(s) of every state in an episode, where d₀ is the
+    start state distribution.
+
+    :param env: A mdp object with a terminal state.
+    :param policy: A policy object.
+    :return: Array of length |S| with the expected number of visits per episode.
+    """
+    transition_matrix, _ = ModelBasedEvaluator(env).policy_model(policy)
+    if env.start_state is not None:
+        start = np.zeros(env.num_states)
+        start[env.start_state] = 1.0
+    else:
+        start = np.full(env.num_states, 1.0 / env.num_states)
+    if sparse.issparse(transition_matrix):
+        system = (sparse.identity(env.num_states, format="csr") - transition_matrix).T.tocsr()
+        visits, info = sparse_linalg.bicgstab(system, start, rtol=1e-8, maxiter=100_000)
+        if info != 0:
+            visits = sparse_linalg.spsolve(system.tocsc(), start)
+    else:
+        visits = np.linalg.solve((np.eye(env.num_states) - transition_matrix).T, start)
+    return np.maximum(visits, 0.0)
+
+
+def expected_episode_length(env: MDP, policy: TabularPolicy) -> float:
+    """
+    :param env: A mdp object with a terminal state.
+    :param policy: A policy object.
+    :return: The expected number of steps of an episode, the expected number of visits of the non-terminal states.
+    """
+    return float(expected_visits(env, policy)[~env.terminal_mask].sum())
+
+
+def run_benchmark(mdp_name: str,
+                  num_states: int,
+                  evaluators: Sequence[str] = tuple(EVALUATORS),
+                  backends: Sequence[str] = BACKENDS,
+                  num_episodes: int = 1_000,
+                  seed: int = 0) -> List[Dict[str, float | int | str | bool | None]]:
+    """
+    Benchmarks evaluators on a generated MDP and a random policy against the exact value function. Every
+    (backend, evaluator) configuration runs in a fresh process, so that its peak RSS is its own.
+
+    :param mdp_name: One of MDP_GENERATORS.
+    :param num_states: Number of states of the generated MDP.
+    :param evaluators: Names of the evaluators to run, see EVALUATORS.
+    :param backends: MDP backends to run the evaluators on, "dense" is skipped above MAX_DENSE_STATES states.
+    :param num_episodes: Number of episodes per evaluator.
+    :param seed: Seed of the MDP, the policy and the random streams.
+    :return: One result row per (backend, evaluator): wall time, steps per second (from the counted steps, or the
+             expected episode length for evaluators that do not count steps, see steps_counted), peak RSS of the
+             configuration's process and the RMSE and maximum absolute error against the exact V over the
+             non-terminal states that are expected to be visited at least once in the run.
+    """
+    sparse_env = MDP_GENERATORS[mdp_name](num_states, seed)
+    policy = create_random_policy(sparse_env.num_states, sparse_env.num_actions, seed=seed)
+
+    start = time.perf_counter()
+    exact = ModelBasedEvaluator(sparse_env).evaluate(policy)
+    exact_time = time.perf_counter() - start
+    visits = expected_visits(sparse_env, policy)
+    episode_length = float(visits[~sparse_env.terminal_mask].sum())
+    # States that the episodes of the run are not expected to reach keep their initial estimate, they say nothing
+    # about the accuracy of an evaluator.
+    evaluated = ~sparse_env.terminal_mask & (visits * num_episodes >= 1.0)
+
+    results = []
+    for backend in backends:
+        if backend == "dense" and sparse_env.num_states > MAX_DENSE_STATES:
+            continue
+        for name in evaluators:
+            if name.endswith("_compiled") and backend != "dense":
+                continue        # The compiled kernels need dense arrays.
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                run = executor.submit(_run_configuration, mdp_name, num_states, backend, name, num_episodes,
+                                      seed).result()
+            num_steps = run["num_steps"] if run["num_steps"] is not None else num_episodes * episode_length
+            errors = np.abs(run["value_fun"] - exact)[evaluated]
+            results.append({
+                "mdp": mdp_name,
+                "backend": backend,
+                "evaluator": name,
+                "num_states": sparse_env.num_states,
+                "num_actions": sparse_env.num_actions,
+                "num_episodes": num_episodes,
+                "wall_time": run["wall_time"],
+                "steps_per_second": num_steps / run["wall_time"],
+                "steps_counted": run["num_steps"] is not None,
+                "peak_rss_bytes": run["peak_rss_bytes"],
+                "num_evaluated_states": int(np.count_nonzero(evaluated)),
+                "rmse": float(np.sqrt(np.mean(errors ** 2))) if len(errors) else np.nan,
+                "max_abs_error": float(errors.max()) if len(errors) else np.nan,
+                "exact_solve_time": exact_time,
+            })
+    return results
+
+
+def _run_configuration(mdp_name: str,
+                       num_states: int,
+                       backend: str,
+                       name: str,
+                       num_episodes: int,
+                       seed: int) -> Dict[str, float | int | np.ndarray | None]:
+    """
+    Runs one configuration of run_benchmark, in a worker process.
+
+    :return: A dict with the estimated value function, the wall time, the number of simulated steps (None if the
+             evaluator does not count them, e.g. the compiled kernels) and the peak RSS of the process.
+    """
+    logger.disable("rl_mdp")
+    sparse_env = MDP_GENERATORS[mdp_name](num_states, seed)
+    env = to_dense_mdp(sparse_env) if backend == "dense" else sparse_env
+    policy = create_random_policy(env.num_states, env.num_actions, seed=seed)
+    env.rng = np.random.default_rng(seed)
+    policy.rng = np.random.default_rng(seed + 1)
+    evaluator = EVALUATORS[name](env)
+    if name.endswith("_compiled"):
+        evaluator.evaluate(policy, 1)      # Exclude the compilation of the kernels.
+    if hasattr(evaluator, "profiler"):
+        evaluator.profiler = Profiler(name, time_steps=False)      # Counts the steps at a per-episode cost.
+
+    start = time.perf_counter()
+    value_fun = evaluator.evaluate(policy, num_episodes)
+    wall_time = time.perf_counter() - start
+    profiler = getattr(evaluator, "profiler", None)
+    counted = profiler is not None and profiler.num_episodes == num_episodes
+    return {
+        "value_fun": value_fun,
+        "wall_time": wall_time,
+        "num_steps": profiler.num_steps if counted else None,
+        "peak_rss_bytes": Profiler.peak_memory()[0],
+    }
+
+
+def write_results(results: List[Dict[str, float | int | str | bool | None]], path: str) -> None:
+    """
+    Writes benchmark results to a JSON file (if the path ends in .json) or a CSV file.
+
+    :param results: Rows returned by run_benchmark.
+    :param path: The output path.
+    """
+    if path.endswith(".json"):
+        with open(path, "w") as file:
+            json.dump(results, file, indent=2)
+        return
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(results[0]) if results else [])
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(arguments: Optional[Sequence[str]] = None) -> None:
+    """
+    Command line entry point, e.g. `python -m rl_mdp.benchmark --mdp garnet --states 1000 100000 -o bench.json`.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the policy evaluators on generated MDPs.")
+    parser.add_argument("--mdp", nargs="+", default=list(MDP_GENERATORS), choices=list(MDP_GENERATORS))
+    parser.add_argument("--states", nargs="+", type=int, default=[100, 1_000])
+    parser.add_argument("--evaluators", nargs="+", default=list(EVALUATORS), choices=list(EVALUATORS))
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--episodes", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="benchmark.json", help="Output file, .json or .csv.")
+    args = parser.parse_args(arguments)
+
+    results = []
+    for mdp_name in args.mdp:
+        for num_states in args.states:
+            results.extend(run_benchmark(mdp_name, num_states, args.evaluators, args.backends, args.episodes,
+                                         args.seed))
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+import numpy as np
+from rl_mdp.caching.fingerprint import mdp_fingerprint, policy_fingerprint
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.model_free_prediction.abstract_evaluator import AbstractEvaluator
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.policy.tabular_policy import TabularPolicy
+
+
+class EvaluationCache:
+    """
+    Memoizing front end for an evaluator. Results are keyed on content hashes of the MDP arrays and the policy
+    matrix (plus the number of episodes) and kept in an LRU cache with a memory budget. On a miss the evaluation
+    is warm-started from the cached V of the closest evaluated policy on the same MDP: TD(0) / TD(λ) start their
+    updates from it (initial_value_fun) and the iterative methods of ModelBasedEvaluator use it as initial guess.
+    Monte Carlo estimates are averages of returns, only the states without returns keep the warm start.
+    """
+    def __init__(self,
+                 evaluator: AbstractEvaluator,
+                 max_bytes: int = 256 << 20,
+                 warm_start: bool = True,
+                 max_warm_start_distance: Optional[float] = None):
+        """
+        :param evaluator: The evaluator to put the cache in front of, it must have an env attribute.
+        :param max_bytes: Memory budget of the cached value functions and policy matrices.
+        :param warm_start: Whether to warm-start evaluations from the closest cached policy.
+        :param max_warm_start_distance: Largest L1 distance Σ|pi - pi'| between the policy matrices for which a
+                                        cached V is used as warm start, no limit if None.
+        """
+        self.evaluator = evaluator
+        self.max_bytes = max_bytes
+        self.warm_start = warm_start
+        self.max_warm_start_distance = max_warm_start_distance
+        # (MDP fingerprint, policy fingerprint, num_episodes) -> (policy matrix, V), least recently used first.
+        self._entries: "OrderedDict[Tuple[str, str, int], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.warm_starts = 0
+
+    def evaluate(self, policy: AbstractPolicy, num_episodes: int = 0) -> np.ndarray:
+        """
+        Returns the cached value function of the policy, or evaluates it and caches the result.
+
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Number of episodes passed to the evaluator, part of the cache key.
+        :return: The state-value function V(s) for the associated policy.
+        """
+        env = self.evaluator.env
+        matrix = np.array(TabularPolicy.matrix_of(policy, env.num_states, env.num_actions), dtype=np.float64)
+        key = (mdp_fingerprint(env), policy_fingerprint(matrix), num_episodes)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1].copy()
+
+        self.misses += 1
+        initial_value_fun = self._closest_value_fun(key[0], matrix) if self.warm_start else None
+        self._set_initial_value_fun(initial_value_fun)
+        try:
+            value_fun = self.evaluator.evaluate(policy, num_episodes)
+        finally:
+            self._set_initial_value_fun(None)
+        self._store(key, matrix, value_fun)
+        return value_fun.copy()
+
+    def clear(self) -> None:
+        """
+        Removes all cached results.
+        """
+        self._entries.clear()
+        self.num_bytes = 0
+
+    def __len__(self) -> int:
+        """
+        :return: The number of cached results.
+        """
+        return len(self._entries)
+
+    def _closest_value_fun(self, fingerprint: str, matrix: np.ndarray) -> Optional[np.ndarray]:
+        """
+        :param fingerprint: Fingerprint of the MDP.
+        :param matrix: Policy matrix of the policy to evaluate.
+        :return: The cached V of the closest policy on the same MDP, or None if there is none within
+                 max_warm_start_distance.
+        """
+        best_distance, best_value_fun = np.inf, None
+        for (mdp_key, _, _), (cached_matrix, value_fun) in self._entries.items():
+            if mdp_key != fingerprint:
+                continue
+            distance = np.abs(cached_matrix - matrix).sum()
+            if distance < best_distance:
+                best_distance, best_value_fun = distance, value_fun
+        if best_value_fun is None:
+            return None
+        if self.max_warm_start_distance is not None and best_distance > self.max_warm_start_distance:
+            return None
+        return best_value_fun
+
+    def _set_initial_value_fun(self, value_fun: Optional[np.ndarray]) -> None:
+        """
+        Passes a warm start to the evaluator, or removes it if value_fun is None. Only warm starts that the evaluator
+        uses are counted in warm_starts, a direct solve of ModelBasedEvaluator ignores its initial value function.
+
+        :param value_fun: The initial value function.
+        """
+        if hasattr(self.evaluator, "initial_value_fun"):
+            self.evaluator.initial_value_fun = value_fun
+        elif (isinstance(self.evaluator, ModelBasedEvaluator) and self.evaluator.resolved_method != "direct"
+              and value_fun is not None):
+            self.evaluator.value_fun = value_fun.copy()
+        else:
+            return
+        if value_fun is not None:
+            self.warm_starts += 1
+
+    def _store(self, key: Tuple[str, str, int], matrix: np.ndarray, value_fun: np.ndarray) -> None:
+        """
+        Caches a result and evicts the least recently used results until the memory budget is met.
+
+        :param key: The cache key.
+        :param matrix: The policy matrix.
+        :param value_fun: The value function.
+        """
+        size = matrix.nbytes + value_fun.nbytes
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (matrix, value_fun.copy())
+        self.num_bytes += size
+        while self.num_bytes > self.max_bytes:
+            _, (old_matrix, old_value_fun) = self._entries.popitem(last=False)
+            self.num_bytes -= old_matrix.nbytes + old_value_fun.nbytes
@@ -0,0 +1,61 @@
+import hashlib
+import weakref
+import numpy as np
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.mdp.sparse_transition_function import SparseTransitionFunction
+
+# Fingerprints of MDP objects, computed once per object since hashing the arrays of a large model reads all of them.
+_mdp_fingerprints: "weakref.WeakKeyDictionary[AbstractMDP, str]" = weakref.WeakKeyDictionary()
+
+
+def _hash_arrays(*arrays: np.ndarray, extra: str = "") -> str:
+    """
+    :param arrays: Arrays to hash, their dtype and shape are part of the hash.
+    :param extra: Additional data to hash.
+    :return: A hex digest of the contents.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype}{array.shape}".encode())
+        digest.update(memoryview(array).cast("B"))
+    digest.update(extra.encode())
+    return digest.hexdigest()
+
+
+def mdp_fingerprint(env: AbstractMDP) -> str:
+    """
+    Content hash of an MDP: its transition and reward arrays, discount factor, terminal states, start state and
+    max_episode_steps.
+    The hash is cached per MDP object, so the arrays must not be modified afterwards.
+
+    :param env: An MDP or SparseMDP.
+    :return: The fingerprint.
+    """
+    fingerprint = _mdp_fingerprints.get(env)
+    if fingerprint is None:
+        transition_function = getattr(env, "transition_function", None)
+        reward_function = getattr(env, "reward_function", None)
+        if transition_function is None or reward_function is None:
+            raise ValueError(f"Cannot fingerprint {type(env).__name__}, it has no transition and reward arrays.")
+        if isinstance(transition_function, SparseTransitionFunction):
+            matrix = transition_function.matrix
+            arrays = (matrix.indptr, matrix.indices, matrix.data)
+        else:
+            arrays = (transition_function.probabilities,)
+        fingerprint = _hash_arrays(*arrays, reward_function.rewards, env.terminal_mask,
+                                   extra=repr((env.discount_factor, env.start_state,
+                                               getattr(env, "max_episode_steps", None))))
+        _mdp_fingerprints[env] = fingerprint
+    return fingerprint
+
+
+def policy_fingerprint(matrix: np.ndarray) -> str:
+    """
+    Content hash of a policy. Policies are mutable, so it is recomputed on every call, which is cheap compared to
+    an evaluation since the matrix only has |S|·|A| entries.
+
+    :param matrix: The (|S|, |A|) matrix of the policy, see TabularPolicy.matrix_of.
+    :return: The fingerprint.
+    """
+    return _hash_arrays(np.asarray(matrix, dtype=np.float64))
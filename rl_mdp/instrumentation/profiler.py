@@ -0,0 +1,201 @@
+import csv
+import os
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+
+try:
+    import resource
+except ImportError:     # Not available on Windows.
+    resource = None
+
+# Setting this environment variable to a non-empty value other than "0" turns on profiling of all evaluators.
+PROFILE_ENV_VAR = "RL_MDP_PROFILE"
+
+SECTIONS = ("sampling", "stepping", "updates")
+
+
+class Profiler:
+    """
+    Collects throughput and timing statistics of the simulate-and-update loop of an evaluator: steps and episodes per
+    second, a histogram of the episode lengths (power of two buckets), the time spent sampling actions, stepping the
+    environment and updating the value function, and the peak memory of the process.
+
+    Evaluators only create a profiler when profiling is enabled, so the cost when it is off is a single None check
+    per episode. When it is on, every step is timed, which slows the loop down.
+    """
+    def __init__(self, name: str, time_steps: bool = True):
+        """
+        :param name: Name under which the statistics are reported, e.g. the evaluator class.
+        :param time_steps: If False, record() only counts steps and episodes (with a per-episode cost) and leaves
+                           the sampling and stepping times at zero, e.g. to count the steps of a timed run.
+        """
+        self.name = name
+        self.time_steps = time_steps
+        self.reset()
+
+    @classmethod
+    def from_environment(cls, name: str) -> Optional["Profiler"]:
+        """
+        :param name: Name under which the statistics are reported.
+        :return: A profiler if the PROFILE_ENV_VAR environment variable enables profiling, otherwise None.
+        """
+        return cls(name) if os.environ.get(PROFILE_ENV_VAR, "0") not in ("", "0") else None
+
+    def reset(self) -> None:
+        """
+        Clears all statistics.
+        """
+        self.num_steps = 0
+        self.num_episodes = 0
+        self.section_times: Dict[str, float] = dict.fromkeys(SECTIONS, 0.0)
+        self._length_buckets: List[int] = []      # Bucket b counts the episodes of length 2^(b-1) up to 2^b - 1.
+        self._start = time.perf_counter()
+
+    def record(self, buffer: EpisodeBuffer, env: AbstractMDP, policy: AbstractPolicy) -> int:
+        """
+        Records an episode with EpisodeBuffer.record and times the action sampling and the environment steps.
+
+        :param buffer: The buffer to append the episode to.
+        :param env: An environment object.
+        :param policy: A policy object.
+        :return: The index of the recorded episode.
+        """
+        if not self.time_steps:
+            index = buffer.record(env, policy)
+        else:
+            start = time.perf_counter()
+            timed_policy = _TimedPolicy(policy)
+            index = buffer.record(env, timed_policy)
+            self.add_time("sampling", timed_policy.seconds)
+            # Everything but the action sampling, i.e. reset(), step() and the buffer writes, counts as stepping.
+            self.add_time("stepping", time.perf_counter() - start - timed_policy.seconds)
+        self.add_episode(int(buffer.offsets[index + 1] - buffer.offsets[index]))
+        return index
+
+    def add_time(self, section: str, seconds: float) -> None:
+        """
+        :param section: One of SECTIONS.
+        :param seconds: Time spent in the section.
+        """
+        self.section_times[section] += seconds
+
+    def add_episode(self, length: int) -> None:
+        """
+        :param length: Number of steps of a finished episode.
+        """
+        self.num_steps += length
+        self.num_episodes += 1
+        bucket = length.bit_length()
+        if bucket >= len(self._length_buckets):
+            self._length_buckets.extend([0] * (bucket + 1 - len(self._length_buckets)))
+        self._length_buckets[bucket] += 1
+
+    @property
+    def length_histogram(self) -> Dict[str, int]:
+        """
+        :return: Number of episodes per length bucket, keyed by the bucket's range, e.g. "4-7".
+        """
+        return {self._bucket_label(bucket): count for bucket, count in enumerate(self._length_buckets) if count}
+
+    @staticmethod
+    def peak_memory() -> Tuple[Optional[int], Optional[int]]:
+        """
+        :return: A tuple (peak resident set size of the process, peak traced memory) in bytes. The first is None
+                 where the resource module is unavailable, the second is None unless tracemalloc is tracing.
+        """
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource is not None else None
+        peak_traced = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        return peak_rss, peak_traced
+
+    def summary(self) -> Dict[str, float | int | str | Dict[str, int] | None]:
+        """
+        :return: A dict of all statistics, with the episode length histogram as a nested dict.
+        """
+        busy = sum(self.section_times.values())
+        loop = self.section_times["sampling"] + self.section_times["stepping"]
+        peak_rss, peak_traced = self.peak_memory()
+        result = {
+            "name": self.name,
+            "wall_time": time.perf_counter() - self._start,
+            "num_steps": self.num_steps,
+            "num_episodes": self.num_episodes,
+            "steps_per_second": self.num_steps / loop if loop > 0 else np.nan,
+            "episodes_per_second": self.num_episodes / busy if busy > 0 else np.nan,
+            "mean_episode_length": self.num_steps / self.num_episodes if self.num_episodes else np.nan,
+        }
+        for section, seconds in self.section_times.items():
+            result[f"{section}_time"] = seconds
+            result[f"{section}_fraction"] = seconds / busy if busy > 0 else np.nan
+        result["peak_rss_bytes"] = peak_rss
+        result["peak_traced_bytes"] = peak_traced
+        result["episode_length_histogram"] = self.length_histogram
+        return result
+
+    def log(self) -> None:
+        """
+        Logs the summary with loguru.
+        """
+        summary = self.summary()
+        logger.info(f"{self.name}: {summary['num_episodes']} episodes, {summary['num_steps']} steps, "
+                    f"{summary['steps_per_second']:.0f} steps/s, {summary['episodes_per_second']:.1f} episodes/s, "
+                    f"time split sampling {summary['sampling_fraction']:.1%} / stepping "
+                    f"{summary['stepping_fraction']:.1%} / updates {summary['updates_fraction']:.1%}, "
+                    f"episode lengths {summary['episode_length_histogram']}")
+        logger.debug(summary)
+
+    def to_csv(self, path: str) -> None:
+        """
+        Appends the summary as a row to a CSV file, writing a header if the file is new. The histogram is written
+        as a single "length:count" column.
+
+        :param path: Path of the CSV file.
+        """
+        summary = self.summary()
+        summary["episode_length_histogram"] = " ".join(
+            f"{label}:{count}" for label, count in summary["episode_length_histogram"].items()
+        )
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, "a", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(summary))
+            if is_new:
+                writer.writeheader()
+            writer.writerow(summary)
+
+    @staticmethod
+    def _bucket_label(bucket: int) -> str:
+        """
+        :param bucket: Index of a length bucket.
+        :return: The range of episode lengths of the bucket.
+        """
+        if bucket == 0:
+            return "0"
+        low, high = 1 << (bucket - 1), (1 << bucket) - 1
+        return str(low) if low == high else f"{low}-{high}"
+
+
+class _TimedPolicy:
+    """
+    Wraps a policy and accumulates the time spent in sample_action(), see Profiler.record.
+    """
+    def __init__(self, policy: AbstractPolicy):
+        """
+        :param policy: The policy to time.
+        """
+        self.policy = policy
+        self.seconds = 0.0
+
+    def sample_action(self, state: int) -> int:
+        """
+        :param state: The current state.
+        :return: The action sampled by the wrapped policy.
+        """
+        start = time.perf_counter()
+        action = self.policy.sample_action(state)
+        self.seconds += time.perf_counter() - start
+        return action
@@ -72,4 +72,20 @@ class AbstractMDP(ABC):
     @property
     @abstractmethod
     def num_actions(self) -> int:
-        pass
\ No newline at end of file
+        pass
+
+    @property
+    def terminal_mask(self) -> np.ndarray:
+        """
+        Getter for the terminal (absorbing) states, MDPs without terminal states can keep this default.
+        :return: Boolean array of length |S| that is True for the terminal states.
+        """
+        return np.zeros(self.num_states, dtype=bool)
+
+    def bootstrap_discounts(self) -> np.ndarray:
+        """
+        Discount of the bootstrapped value of every successor state: γ, or 0 for terminal states. TD targets
+        r + bootstrap_discounts[s'] * V(s') then never bootstrap from a terminal state, without a branch per step.
+        :return: Array of length |S|.
+        """
+        return np.where(self.terminal_mask, 0.0, self.discount_factor)
@@ -0,0 +1,62 @@
+import numpy as np
+from rl_mdp.mdp.reward_function import RewardFunction
+
+
+class DenseRewardFunction:
+    def __init__(self, rewards: np.ndarray):
+        """
+        Initializes the reward function with a dense array.
+
+        :param rewards: A NumPy array of shape (|S|, |A|) where rewards[s, a] = r(s,a).
+        """
+        rewards = np.ascontiguousarray(rewards, dtype=np.float64)
+        if rewards.ndim != 2:
+            raise ValueError(f"Expected an array of shape (|S|, |A|), got {rewards.shape}.")
+        self.rewards = rewards
+
+    @classmethod
+    def from_reward_function(cls,
+                             reward_function: RewardFunction,
+                             num_states: int,
+                             num_actions: int) -> "DenseRewardFunction":
+        """
+        Converts a dictionary based reward function into its dense counterpart.
+
+        :param reward_function: A RewardFunction object.
+        :param num_states: Number of states, states are assumed to be represented as 0, 1, ..., |S| - 1.
+        :param num_actions: Number of actions, actions are assumed to be represented as 0, 1, ..., |A| - 1.
+        :return: A DenseRewardFunction holding the same rewards.
+        """
+        return cls.from_dict(reward_function.rewards, num_states, num_actions)
+
+    @classmethod
+    def from_dict(cls,
+                  rewards: dict,
+                  num_states: int,
+                  num_actions: int) -> "DenseRewardFunction":
+        """
+        Builds the dense array from a dictionary mapping (state, action) tuples to rewards.
+
+        :param rewards: A dictionary where keys are (state, action) tuples and values are floats.
+        :param num_states: Number of states.
+        :param num_actions: Number of actions.
+        :return: A DenseRewardFunction holding the same rewards.
+        """
+        array = np.empty((num_states, num_actions))
+        for state in range(num_states):
+            for action in range(num_actions):
+                if (state, action) not in rewards:
+                    raise ValueError(f"No reward defined for state {state} and action {action}.")
+                array[state, action] = rewards[(state, action)]
+        return cls(array)
+
+    def __call__(self, state: int, action: int) -> float:
+        """
+        Returns the reward for a given state and action.
+
+        :param state: Current state
+        :param action: Action taken
+
+        :return: A float representing the reward for the given (state, action) pair.
+        """
+        return self.rewards[state, action]
@@ -0,0 +1,115 @@
+import numpy as np
+from rl_mdp.mdp.transition_function import TransitionFunction
+from rl_mdp.sampling.inverse_cdf import build_offset_cdf, sample_rows
+
+
+class DenseTransitionFunction:
+    def __init__(self, probabilities: np.ndarray, validate: bool = True):
+        """
+        Initializes the transition function with a dense array.
+
+        :param probabilities: A NumPy array of shape (|S|, |A|, |S|) where probabilities[s, a, s'] = p(s'|s,a).
+        :param validate: If False, the check that every row sums to 1 is skipped, which reads the whole array. Only
+                         for arrays known to be valid, e.g. memory-mapped ones saved from a validated function.
+        """
+        probabilities = np.ascontiguousarray(probabilities, dtype=np.float64)
+        if probabilities.ndim != 3 or probabilities.shape[0] != probabilities.shape[2]:
+            raise ValueError(f"Expected an array of shape (|S|, |A|, |S|), got {probabilities.shape}.")
+        if validate and np.any(np.abs(probabilities.sum(axis=2) - 1.0) > 1e-6):
+            raise ValueError("The transition probabilities of every (state, action) pair must sum to 1.")
+        self.probabilities = probabilities
+        self._indptr = None         # Lazily built inverse-CDF tables, see sample().
+        self._offset_cdf = None
+        self._cdf = None            # Lazily built per-row CDF, see cdf.
+
+    @classmethod
+    def from_transition_function(cls,
+                                 transition_function: TransitionFunction,
+                                 num_states: int,
+                                 num_actions: int) -> "DenseTransitionFunction":
+        """
+        Converts a dictionary based transition function into its dense counterpart.
+
+        :param transition_function: A TransitionFunction object.
+        :param num_states: Number of states, states are assumed to be represented as 0, 1, ..., |S| - 1.
+        :param num_actions: Number of actions, actions are assumed to be represented as 0, 1, ..., |A| - 1.
+        :return: A DenseTransitionFunction holding the same probabilities.
+        """
+        return cls.from_dict(transition_function.transitions, num_states, num_actions)
+
+    @classmethod
+    def from_dict(cls,
+                  transitions: dict,
+                  num_states: int,
+                  num_actions: int) -> "DenseTransitionFunction":
+        """
+        Builds the dense array from a dictionary mapping (state, action) tuples to probability vectors.
+
+        :param transitions: A dictionary where keys are (state, action) tuples and values are NumPy arrays.
+        :param num_states: Number of states.
+        :param num_actions: Number of actions.
+        :return: A DenseTransitionFunction holding the same probabilities.
+        """
+        probabilities = np.empty((num_states, num_actions, num_states))
+        for state in range(num_states):
+            for action in range(num_actions):
+                if (state, action) not in transitions:
+                    raise ValueError(f"No transition probabilities defined for state {state} and action {action}.")
+                probabilities[state, action] = transitions[(state, action)]
+        return cls(probabilities)
+
+    def __call__(self, state: int, action: int) -> np.ndarray:
+        """
+        Returns the transition probabilities for a given state and action.
+
+        :param state: Current state
+        :param action: Action taken
+
+        :return: A NumPy array (view) of transition probabilities to the next states.
+        """
+        return self.probabilities[state, action]
+
+    def sample(self, states: np.ndarray, actions: np.ndarray, uniforms: np.ndarray) -> np.ndarray:
+        """
+        Samples a next state for every (states[i], actions[i]) pair at once using inverse-CDF sampling.
+
+        :param states: Array of current states.
+        :param actions: Array of actions taken.
+        :param uniforms: Array of uniform random numbers in [0, 1), one per pair.
+        :return: Array of sampled next states.
+        """
+        num_states = self.num_states
+        if self._offset_cdf is None:
+            self._indptr = np.arange(0, self.probabilities.size + 1, num_states, dtype=np.int64)
+            self._offset_cdf = build_offset_cdf(self.probabilities.ravel(), self._indptr)
+        rows = np.asarray(states, dtype=np.int64) * self.num_actions + actions
+        return sample_rows(self._offset_cdf, self._indptr, rows, uniforms) - rows * num_states
+
+    @property
+    def cdf(self) -> np.ndarray:
+        """
+        The cumulative distributions of p(.|s,a) over s', built on first use and kept, since they only depend on the
+        model. Every row is normalized by its total (like build_offset_cdf), so it ends at exactly 1 and a uniform in
+        [0, 1) never selects a trailing zero-probability successor.
+
+        :return: An array of shape (|S|, |A|, |S|) with cdf[s, a, s'] = Σ_{s'' <= s'} p(s''|s,a).
+        """
+        if self._cdf is None:
+            cdf = np.cumsum(self.probabilities, axis=2)
+            cdf /= cdf[:, :, -1:]
+            self._cdf = cdf
+        return self._cdf
+
+    @property
+    def num_states(self) -> int:
+        """
+        :return: The number of states.
+        """
+        return self.probabilities.shape[0]
+
+    @property
+    def num_actions(self) -> int:
+        """
+        :return: The number of actions.
+        """
+        return self.probabilities.shape[1]
@@ -1,48 +1,84 @@
-from typing import List, Tuple, Optional
+import sys
+from bisect import bisect_right
+from typing import List, Sequence, Tuple, Optional
 import numpy as np
 from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.mdp.dense_reward_function import DenseRewardFunction
+from rl_mdp.mdp.dense_transition_function import DenseTransitionFunction
 from rl_mdp.mdp.reward_function import RewardFunction
 from rl_mdp.mdp.transition_function import TransitionFunction
+from rl_mdp.sampling.alias_table import AliasTable
+from rl_mdp.sampling.inverse_cdf import build_offset_cdf
+from rl_mdp.sampling.rng import RngMixin
 
 
-class MDP(AbstractMDP):
+class MDP(RngMixin, AbstractMDP):
     def __init__(
             self,
             states: List[int],
             actions: List[int],
-            transition_function: TransitionFunction,
-            reward_function: RewardFunction,
+            transition_function: TransitionFunction | DenseTransitionFunction,
+            reward_function: RewardFunction | DenseRewardFunction,
             discount_factor: float = 0.9,
             terminal_state: Optional[int] = None,
-            start_state: Optional[int] = 0
+            start_state: Optional[int] = 0,
+            rng: Optional[np.random.Generator] = None,
+            terminal_states: Optional[Sequence[int] | np.ndarray] = None,
+            max_episode_steps: Optional[int] = None
     ):
         """
         Initializes the Markov Decision Process (MDP).
 
-        :param states: A list of states in the MDP.
+        :param states: A list of states in the MDP, or a range for large MDPs.
         :param actions: A list of actions in the MDP.
-        :param transition_function: A TransitionFunction object that provides transition probabilities.
-        :param reward_function: A RewardFunction object that provides rewards.
+        :param transition_function: A TransitionFunction object that provides transition probabilities. Dictionary
+                                    based transition functions are converted to a DenseTransitionFunction.
+        :param reward_function: A RewardFunction object that provides rewards. Dictionary based reward functions
+                                are converted to a DenseRewardFunction.
         :param discount_factor: A discount factor for future rewards.
         :param terminal_state: A terminal state.
         :param start_state: A starting state. If set, then reset() will always return that state.
+        :param rng: Generator for the random stream of this MDP. Defaults to the shared generator, see RngMixin.
+        :param terminal_states: Further terminal (absorbing) states, as a sequence of states or a boolean mask of
+                                length |S|. Episodes end in any of them and in terminal_state.
+        :param max_episode_steps: If set, step() reports done after that many steps since the last reset() even if
+                                  no terminal state was reached (truncation), see `truncated`.
         """
+        if not self._is_index_range(states) or not self._is_index_range(actions):
+            raise ValueError("States and actions must be represented as 0, 1, 2, ..., |S| - 1 and |A| - 1.")
+        if max_episode_steps is not None and max_episode_steps < 1:
+            raise ValueError(f"max_episode_steps must be positive, got {max_episode_steps}.")
+
         self._states = states
         self._actions = actions
-        self._transition_function = transition_function
+        self._transition_function = self._build_transition_function(transition_function)
+        if isinstance(reward_function, RewardFunction):
+            reward_function = DenseRewardFunction.from_reward_function(reward_function, len(states), len(actions))
         self._reward_function = reward_function
+        self._rewards = reward_function.rewards     # R[s, a], looked up by plain indexing.
         self._discount_factor = discount_factor
+        self.rng = rng
+        self._alias_tables: List[Optional[AliasTable]] = [None] * (len(states) * len(actions))   # Built lazily.
+        self._step_table: Optional[Tuple[List[float], List[int], List[int]]] = None      # Set by precompile().
 
         self._start_state = start_state
-        self._curr_state = self._start_state if self._start_state is not None else np.random.choice(self._states)
-        self._terminal_state = terminal_state       # Assuming one terminal state for simplicity.
+        self._curr_state = self._start_state if self._start_state is not None else self._sample_uniform_state()
+        self._terminal_mask = self._build_terminal_mask(terminal_state, terminal_states)
+        self._is_terminal: List[bool] = self._terminal_mask.tolist()   # For the scalar lookup in step().
+        self._max_episode_steps = max_episode_steps
+        self._step_limit = sys.maxsize if max_episode_steps is None else max_episode_steps
+        self._episode_steps = 0
+        # Directory of the saved MDP when it was memory-mapped by load_mdp, so that worker processes can reopen the
+        # shared mapping instead of receiving a pickled copy of the arrays.
+        self.source_path: Optional[str] = None
 
     def reset(self) -> int:
         """
         Re-initialize the state by sampling uniformly from the state space.
         :return: New initial state.
         """
-        self._curr_state = self._start_state if self._start_state is not None else np.random.choice(self._states)
+        self._curr_state = self._start_state if self._start_state is not None else self._sample_uniform_state()
+        self._episode_steps = 0
         return self._curr_state
 
     def step(self, action: int) -> Tuple[int, float, bool]:
@@ -51,23 +87,46 @@ class MDP(AbstractMDP):
 
         :param action: Action taken by the agent.
 
-        :return: A tuple containing the new state, the reward, and a done flag.
+        :return: A tuple containing the new state, the reward, and a done flag. The flag is set when a terminal state
+                 is reached or the episode is truncated after max_episode_steps steps.
         """
-        # Get the transition probabilities for the current state and action.
-        transition_probs = self._transition_function(self._curr_state, action)
+        row = self._curr_state * len(self._actions) + action
+        if self._step_table is None:
+            # Get the (cached) alias table of p(.|s,a) for the current state and action.
+            alias_table = self._alias_tables[row]
+            if alias_table is None:
+                alias_table = self._build_alias_table(self._curr_state, action)
 
-        # Sample the next state based on the transition probabilities.
-        next_state = np.random.choice(self._states, p=transition_probs)
+            # Sample the next state based on the transition probabilities in O(1).
+            next_state = alias_table.sample(self._next_uniform())
+        else:
+            # Binary search in the successors of (s, a) of the precompiled table.
+            offset_cdf, indptr, successors = self._step_table
+            position = bisect_right(offset_cdf, row + self._next_uniform(), indptr[row], indptr[row + 1] - 1)
+            next_state = successors[position]
 
         # Calculate the reward for the current state and action.
-        reward = self._reward_function(self._curr_state, action)
+        reward = self._rewards[self._curr_state, action]
 
         self._curr_state = next_state
+        self._episode_steps += 1
 
-        done = False if self._terminal_state is None else next_state == self._terminal_state
+        done = self._is_terminal[next_state] or self._episode_steps >= self._step_limit
 
         return next_state, reward, done
 
+    def precompile(self) -> None:
+        """
+        Switches step() to a precompiled table: the successors of all (state, action) pairs with one flat cumulative
+        distribution (see rl_mdp.sampling.inverse_cdf), built with a few vectorized operations, so that a step is
+        a binary search over the successors of (s, a). This avoids building an alias table per (state, action)
+        pair in Python, which dominates for large MDPs. The table is kept as Python lists, which costs about
+        100 bytes per nonzero transition probability.
+        """
+        indptr, successors, probabilities = self._successor_rows()
+        offset_cdf = build_offset_cdf(probabilities, indptr)
+        self._step_table = (offset_cdf.tolist(), indptr.tolist(), successors.tolist())
+
     def transition_prob(self, new_state: int, state: int, action: int) -> float | np.ndarray:
         """
         Returns the transition probabilities for the new state given state and action by calling the transition
@@ -79,7 +138,7 @@ class MDP(AbstractMDP):
 
         :return: Probability p(s'|s,a).
         """
-        return self._transition_function(state, action)[new_state]
+        return self._transition_function.probabilities[state, action, new_state]
 
     def reward(self, state: int, action: int) -> float:
         """
@@ -90,7 +149,85 @@ class MDP(AbstractMDP):
 
         :return: A float representing the reward for the given (state, action) pair.
         """
-        return self._reward_function(state, action)
+        return self._rewards[state, action]
+
+    def _build_alias_table(self, state: int, action: int) -> AliasTable:
+        """
+        Builds and caches the alias table used to sample from p(.|s,a).
+
+        :param state: Current state
+        :param action: Action taken
+
+        :return: The alias table.
+        """
+        alias_table = AliasTable(self._transition_function.probabilities[state, action])
+        self._alias_tables[state * len(self._actions) + action] = alias_table
+        return alias_table
+
+    def _successor_rows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :return: The nonzero transition probabilities in CSR layout, a tuple (indptr, successors, probabilities)
+                 where row s * |A| + a holds the successors of (s, a).
+        """
+        num_rows = len(self._states) * len(self._actions)
+        probabilities = self._transition_function.probabilities.reshape(num_rows, len(self._states))
+        rows, successors = np.nonzero(probabilities)
+        indptr = np.searchsorted(rows, np.arange(num_rows + 1))
+        return indptr, successors, probabilities[rows, successors]
+
+    def _build_terminal_mask(self,
+                             terminal_state: Optional[int],
+                             terminal_states: Optional[Sequence[int] | np.ndarray]) -> np.ndarray:
+        """
+        :param terminal_state: The terminal_state passed to the constructor.
+        :param terminal_states: The terminal_states passed to the constructor.
+        :return: Boolean mask of length |S| that is True for the terminal states.
+        """
+        mask = np.zeros(len(self._states), dtype=bool)
+        if terminal_states is not None:
+            terminal_states = np.asarray(terminal_states)
+            if terminal_states.dtype == bool:
+                if terminal_states.shape != mask.shape:
+                    raise ValueError(f"A terminal mask must have length {len(mask)}, got {terminal_states.shape}.")
+                mask |= terminal_states
+            else:
+                mask[terminal_states.astype(np.int64)] = True
+        if terminal_state is not None:
+            mask[terminal_state] = True
+        return mask
+
+    @staticmethod
+    def _is_index_range(values: List[int] | range) -> bool:
+        """
+        :param values: States or actions.
+        :return: Whether the values are 0, 1, 2, ..., n - 1. Ranges are checked without building a list, so large
+                 models can pass range(n).
+        """
+        if isinstance(values, range):
+            return values == range(len(values))
+        return list(values) == list(range(len(values)))
+
+    def _sample_uniform_state(self) -> int:
+        """
+        :return: A state sampled uniformly from the state space.
+        """
+        return int(self._rng.integers(len(self._states)))
+
+    def _build_transition_function(
+            self,
+            transition_function: TransitionFunction | DenseTransitionFunction
+    ) -> DenseTransitionFunction:
+        """
+        Converts the given transition function into the representation used for lookups by this MDP.
+
+        :param transition_function: The transition function passed to the constructor.
+        :return: A DenseTransitionFunction.
+        """
+        if isinstance(transition_function, TransitionFunction):
+            return DenseTransitionFunction.from_transition_function(
+                transition_function, len(self._states), len(self._actions)
+            )
+        return transition_function
 
     @property
     def states(self) -> List[int]:
@@ -110,6 +247,24 @@ class MDP(AbstractMDP):
         """
         return self._actions
 
+    @property
+    def transition_function(self) -> DenseTransitionFunction:
+        """
+        Returns the transition function, e.g. to access the full P[s, a, s'] array for vectorized algorithms.
+
+        :return: The transition function.
+        """
+        return self._transition_function
+
+    @property
+    def reward_function(self) -> DenseRewardFunction:
+        """
+        Returns the reward function, e.g. to access the full R[s, a] array for vectorized algorithms.
+
+        :return: The reward function.
+        """
+        return self._reward_function
+
     @property
     def discount_factor(self) -> float:
         """
@@ -119,6 +274,52 @@ class MDP(AbstractMDP):
         """
         return self._discount_factor
 
+    @property
+    def terminal_state(self) -> Optional[int]:
+        """
+        :return: The terminal state (the lowest one if there are several), or None if the MDP has no terminal state.
+        """
+        terminal_states = self.terminal_states
+        return int(terminal_states[0]) if len(terminal_states) else None
+
+    @property
+    def terminal_states(self) -> np.ndarray:
+        """
+        :return: Sorted array of all terminal states.
+        """
+        return np.flatnonzero(self._terminal_mask)
+
+    @property
+    def terminal_mask(self) -> np.ndarray:
+        """
+        Returns the terminal mask, e.g. to compute done flags of many states at once with terminal_mask[states].
+
+        :return: Boolean array of length |S| that is True for the terminal states.
+        """
+        return self._terminal_mask
+
+    @property
+    def max_episode_steps(self) -> Optional[int]:
+        """
+        :return: The number of steps after which episodes are truncated, or None if they only end in terminal states.
+        """
+        return self._max_episode_steps
+
+    @property
+    def truncated(self) -> bool:
+        """
+        :return: Whether the last step ended the episode by truncation, i.e. after max_episode_steps steps in a state
+                 that is not terminal. The value of such a final state is bootstrapped rather than zero.
+        """
+        return self._episode_steps >= self._step_limit and not self._is_terminal[self._curr_state]
+
+    @property
+    def start_state(self) -> Optional[int]:
+        """
+        :return: The start state, or None if reset() samples the initial state uniformly.
+        """
+        return self._start_state
+
     @property
     def num_states(self) -> int:
         """
@@ -0,0 +1,67 @@
+from typing import Tuple
+import numpy as np
+from rl_mdp.mdp.dense_transition_function import DenseTransitionFunction
+from rl_mdp.mdp.mdp import MDP
+from rl_mdp.mdp.sparse_transition_function import SparseTransitionFunction
+from rl_mdp.mdp.transition_function import TransitionFunction
+from rl_mdp.sampling.alias_table import AliasTable
+
+
+class SparseMDP(MDP):
+    """
+    MDP whose transition function is stored in CSR format, for large models where every (state, action) pair
+    only has a few successors. Takes the same arguments as MDP, but the transition function may also be a
+    SparseTransitionFunction; other transition functions are converted to one.
+    """
+
+    def transition_prob(self, new_state: int, state: int, action: int) -> float:
+        """
+        Returns the transition probability for the new state given state and action.
+
+        :param new_state: New state
+        :param state: Current state
+        :param action: Action taken
+
+        :return: Probability p(s'|s,a).
+        """
+        return self._transition_function.prob(new_state, state, action)
+
+    def _build_alias_table(self, state: int, action: int) -> AliasTable:
+        """
+        Builds and caches the alias table used to sample from p(.|s,a), directly from the successors in the sparse
+        row.
+
+        :param state: Current state
+        :param action: Action taken
+
+        :return: The alias table.
+        """
+        next_states, probabilities = self._transition_function.successors(state, action)
+        alias_table = AliasTable(probabilities, outcomes=next_states)
+        self._alias_tables[state * len(self._actions) + action] = alias_table
+        return alias_table
+
+    def _successor_rows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :return: The CSR arrays (indptr, successors, probabilities) of the transition matrix.
+        """
+        matrix = self._transition_function.matrix
+        return matrix.indptr, matrix.indices, matrix.data
+
+    def _build_transition_function(
+            self,
+            transition_function: TransitionFunction | DenseTransitionFunction | SparseTransitionFunction
+    ) -> SparseTransitionFunction:
+        """
+        Converts the given transition function into a SparseTransitionFunction.
+
+        :param transition_function: The transition function passed to the constructor.
+        :return: A SparseTransitionFunction.
+        """
+        if isinstance(transition_function, TransitionFunction):
+            return SparseTransitionFunction.from_transition_function(
+                transition_function, len(self._states), len(self._actions)
+            )
+        if isinstance(transition_function, DenseTransitionFunction):
+            return SparseTransitionFunction.from_dense(transition_function.probabilities)
+        return transition_function
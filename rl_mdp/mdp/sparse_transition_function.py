@@ -0,0 +1,171 @@
+from typing import Dict, Tuple
+import numpy as np
+from scipy import sparse
+from rl_mdp.mdp.transition_function import TransitionFunction
+from rl_mdp.sampling.inverse_cdf import build_offset_cdf, sample_rows
+
+
+class SparseTransitionFunction:
+    def __init__(self, matrix: sparse.spmatrix | sparse.sparray, num_actions: int, validate: bool = True):
+        """
+        Initializes the transition function with a sparse matrix.
+
+        Row s * |A| + a of the matrix holds p(.|s,a), so only the successors of every (state, action) pair are
+        stored, which takes O(|S|·|A|·k) memory for k successors instead of O(|S|²·|A|).
+
+        :param matrix: A SciPy sparse matrix of shape (|S| * |A|, |S|), converted to CSR format.
+        :param num_actions: Number of actions.
+        :param validate: If False, the matrix is trusted to be in canonical format (sorted indices without
+                         duplicates) with rows summing to 1, and neither is checked, since both read every stored
+                         entry. Only for matrices known to be valid, e.g. memory-mapped ones saved from a validated
+                         function.
+        """
+        matrix = sparse.csr_matrix(matrix, dtype=np.float64)
+        if validate:
+            matrix.sum_duplicates()
+            matrix.sort_indices()
+        else:
+            matrix.has_canonical_format = True
+        num_rows, num_states = matrix.shape
+        if num_rows != num_states * num_actions:
+            raise ValueError(f"Expected a matrix of shape (|S| * |A|, |S|), got {matrix.shape}.")
+        if validate and np.any(np.abs(np.asarray(matrix.sum(axis=1)).ravel() - 1.0) > 1e-6):
+            raise ValueError("The transition probabilities of every (state, action) pair must sum to 1.")
+
+        self.matrix = matrix
+        self._num_actions = num_actions
+        self._offset_cdf = None     # Lazily built inverse-CDF table, see sample().
+
+    @classmethod
+    def from_coo(cls,
+                 states: np.ndarray,
+                 actions: np.ndarray,
+                 next_states: np.ndarray,
+                 probabilities: np.ndarray,
+                 num_states: int,
+                 num_actions: int) -> "SparseTransitionFunction":
+        """
+        Builds the transition function from coordinate (COO) triplets p(next_states[i] | states[i], actions[i]).
+
+        :param states: Array of states.
+        :param actions: Array of actions.
+        :param next_states: Array of next states.
+        :param probabilities: Array of transition probabilities.
+        :param num_states: Number of states.
+        :param num_actions: Number of actions.
+        :return: A SparseTransitionFunction.
+        """
+        rows = np.asarray(states, dtype=np.int64) * num_actions + np.asarray(actions, dtype=np.int64)
+        matrix = sparse.coo_matrix((probabilities, (rows, next_states)), shape=(num_states * num_actions, num_states))
+        return cls(matrix, num_actions)
+
+    @classmethod
+    def from_dense(cls, probabilities: np.ndarray) -> "SparseTransitionFunction":
+        """
+        Builds the transition function from a dense array, dropping all zero probabilities.
+
+        :param probabilities: A NumPy array of shape (|S|, |A|, |S|).
+        :return: A SparseTransitionFunction.
+        """
+        num_states, num_actions, _ = probabilities.shape
+        return cls(sparse.csr_matrix(probabilities.reshape(num_states * num_actions, num_states)), num_actions)
+
+    @classmethod
+    def from_dict(cls,
+                  transitions: Dict[Tuple[int, int], np.ndarray],
+                  num_states: int,
+                  num_actions: int) -> "SparseTransitionFunction":
+        """
+        Builds the transition function from a dictionary mapping (state, action) tuples to probability vectors.
+
+        :param transitions: A dictionary where keys are (state, action) tuples and values are NumPy arrays.
+        :param num_states: Number of states.
+        :param num_actions: Number of actions.
+        :return: A SparseTransitionFunction.
+        """
+        states, actions, next_states, probabilities = [], [], [], []
+        for state in range(num_states):
+            for action in range(num_actions):
+                if (state, action) not in transitions:
+                    raise ValueError(f"No transition probabilities defined for state {state} and action {action}.")
+                row = np.asarray(transitions[(state, action)])
+                successors = np.flatnonzero(row)
+                states.append(np.full(len(successors), state))
+                actions.append(np.full(len(successors), action))
+                next_states.append(successors)
+                probabilities.append(row[successors])
+        return cls.from_coo(np.concatenate(states), np.concatenate(actions), np.concatenate(next_states),
+                            np.concatenate(probabilities), num_states, num_actions)
+
+    @classmethod
+    def from_transition_function(cls,
+                                 transition_function: TransitionFunction,
+                                 num_states: int,
+                                 num_actions: int) -> "SparseTransitionFunction":
+        """
+        Converts a dictionary based transition function into its sparse counterpart.
+
+        :param transition_function: A TransitionFunction object.
+        :param num_states: Number of states.
+        :param num_actions: Number of actions.
+        :return: A SparseTransitionFunction.
+        """
+        return cls.from_dict(transition_function.transitions, num_states, num_actions)
+
+    def successors(self, state: int, action: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the successors of a (state, action) pair without densifying the row.
+
+        :param state: Current state
+        :param action: Action taken
+
+        :return: A tuple (next_states, probabilities) of views into the CSR arrays, sorted by next state.
+        """
+        row = state * self._num_actions + action
+        start, end = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+        return self.matrix.indices[start:end], self.matrix.data[start:end]
+
+    def prob(self, new_state: int, state: int, action: int) -> float:
+        """
+        Looks up p(s'|s,a) with a binary search in the sorted row.
+
+        :param new_state: New state
+        :param state: Current state
+        :param action: Action taken
+
+        :return: Probability p(s'|s,a).
+        """
+        next_states, probabilities = self.successors(state, action)
+        index = np.searchsorted(next_states, new_state)
+        if index < len(next_states) and next_states[index] == new_state:
+            return probabilities[index]
+        return 0.0
+
+    def sample(self, states: np.ndarray, actions: np.ndarray, uniforms: np.ndarray) -> np.ndarray:
+        """
+        Samples a next state for every (states[i], actions[i]) pair at once using inverse-CDF sampling on the
+        sparse rows.
+
+        :param states: Array of current states.
+        :param actions: Array of actions taken.
+        :param uniforms: Array of uniform random numbers in [0, 1), one per pair.
+        :return: Array of sampled next states.
+        """
+        if self._offset_cdf is None:
+            self._offset_cdf = build_offset_cdf(self.matrix.data, self.matrix.indptr)
+        rows = np.asarray(states, dtype=np.int64) * self._num_actions + actions
+        return self.matrix.indices[sample_rows(self._offset_cdf, self.matrix.indptr, rows, uniforms)]
+
+    @property
+    def num_states(self) -> int:
+        """
+        :return: The number of states.
+        """
+        return self.matrix.shape[1]
+
+    @property
+    def num_actions(self) -> int:
+        """
+        :return: The number of actions.
+        """
+        return self._num_actions
@@ -0,0 +1,100 @@
+from typing import Optional, Tuple
+import numpy as np
+from rl_mdp.mdp.mdp import MDP
+from rl_mdp.sampling.rng import shared_rng
+
+
+class VectorMDP:
+    """
+    Runs N independent copies of an MDP in lock-step. All copies are advanced with a single vectorized call, using
+    inverse-CDF sampling on the cumulative transition rows of the underlying (dense or sparse) transition function.
+    """
+
+    def __init__(self, env: MDP, num_envs: int, rng: Optional[np.random.Generator] = None):
+        """
+        Initializes the vectorized environment.
+
+        :param env: The MDP to copy. Its transition and reward arrays are shared, not copied.
+        :param num_envs: Number of copies N.
+        :param rng: Random number generator, defaults to the shared generator (see seed_shared_rng).
+        """
+        self.env = env
+        self.num_envs = num_envs
+        self._rng = rng if rng is not None else shared_rng()
+        self._transition_function = env.transition_function
+        self._rewards = env.reward_function.rewards
+        self._terminal_mask = env.terminal_mask
+        self._curr_states = np.zeros(num_envs, dtype=np.int64)
+        self._episode_steps = np.zeros(num_envs, dtype=np.int64)
+        self._truncated = np.zeros(num_envs, dtype=bool)
+        self.reset()
+
+    def reset(self) -> np.ndarray:
+        """
+        Re-initializes all copies.
+
+        :return: Array with the N initial states.
+        """
+        self._curr_states[:] = self._initial_states(self.num_envs)
+        self._episode_steps.fill(0)
+        self._truncated.fill(False)
+        return self._curr_states.copy()
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Performs a realization of p(s'|s,a) and r(s,a) for every copy at once.
+
+        Copies that reach a terminal state, or are truncated after the max_episode_steps of the MDP, are reset
+        automatically. The returned next states are the actual successors (so the terminal state shows up for
+        finished copies), use `current_states` to get the states the next step starts from and `truncated` to tell
+        truncated copies apart.
+
+        :param actions: Array with the action taken in each copy.
+
+        :return: A tuple of arrays containing the next states, the rewards, and the done flags.
+        """
+        states = self._curr_states
+        next_states = self._transition_function.sample(states, actions, self._rng.random(self.num_envs))
+        rewards = self._rewards[states, actions]
+
+        terminated = self._terminal_mask[next_states]
+        self._episode_steps += 1
+        max_episode_steps = self.env.max_episode_steps
+        if max_episode_steps is None:
+            self._truncated.fill(False)
+        else:
+            np.greater_equal(self._episode_steps, max_episode_steps, out=self._truncated)
+            self._truncated &= ~terminated
+        dones = terminated | self._truncated
+
+        self._curr_states = next_states.copy()
+        num_done = np.count_nonzero(dones)
+        if num_done:
+            self._curr_states[dones] = self._initial_states(num_done)
+            self._episode_steps[dones] = 0
+
+        return next_states, rewards, dones
+
+    def _initial_states(self, n: int) -> np.ndarray:
+        """
+        :param n: Number of initial states to generate.
+        :return: The start state repeated n times, or n states sampled uniformly if the MDP has no start state.
+        """
+        start_state = self.env.start_state
+        if start_state is not None:
+            return np.full(n, start_state, dtype=np.int64)
+        return self._rng.integers(self.env.num_states, size=n)
+
+    @property
+    def truncated(self) -> np.ndarray:
+        """
+        :return: Boolean array that is True for the copies whose last step ended their episode by truncation.
+        """
+        return self._truncated
+
+    @property
+    def current_states(self) -> np.ndarray:
+        """
+        :return: Array with the current state of each copy.
+        """
+        return self._curr_states
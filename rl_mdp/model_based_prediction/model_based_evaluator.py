@@ -0,0 +1,190 @@
+from typing import Tuple
+import numpy as np
+from scipy import sparse
+from scipy.sparse import linalg as sparse_linalg
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.mdp.dense_transition_function import DenseTransitionFunction
+from rl_mdp.mdp.sparse_transition_function import SparseTransitionFunction
+from rl_mdp.model_free_prediction.abstract_evaluator import AbstractEvaluator
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.policy.tabular_policy import TabularPolicy
+
+
+class ModelBasedEvaluator(AbstractEvaluator):
+    METHODS = ("auto", "direct", "gmres", "bicgstab", "sweep")
+
+    def __init__(self,
+                 env: AbstractMDP,
+                 method: str = "auto",
+                 tol: float = 1e-10,
+                 max_iterations: int = 10_000,
+                 direct_threshold: int = 2_000):
+        """
+        Initializes the model-based evaluator, which computes V(s) exactly from p(s'|s,a) and r(s,a) by solving the
+        Bellman equation V = r_pi + γ P_pi V.
+
+        :param env: A mdp object.
+        :param method: "direct" solves (I - γP_pi) V = r_pi with a (sparse) LU factorization, "gmres" and
+                       "bicgstab" use the Krylov solvers of scipy.sparse.linalg and "sweep" runs vectorized Bellman
+                       sweeps. "auto" picks "direct" for at most direct_threshold states and "bicgstab" otherwise.
+        :param tol: Convergence tolerance of the iterative methods.
+        :param max_iterations: Maximum number of iterations of the iterative methods. For "gmres" an iteration is a
+                               restart cycle (of up to 20 inner iterations), which is what scipy's maxiter counts.
+        :param direct_threshold: Largest number of states for which "auto" uses a direct solve.
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown method {method}, expected one of {self.METHODS}.")
+        self.env = env
+        self.method = method
+        self.tol = tol
+        self.max_iterations = max_iterations
+        self.direct_threshold = direct_threshold
+        self.value_fun = np.zeros(self.env.num_states)    # Estimate of state-value function.
+        self.num_iterations = 0     # Iterations (restart cycles for "gmres") used by the last iterative solve.
+
+    def evaluate(self, policy: AbstractPolicy, num_episodes: int = 0) -> np.ndarray:
+        """
+        Computes the state-value function of the policy.
+
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Ignored, the value function is computed from the model instead of from episodes.
+        :return: The state-value function V(s) for the associated policy.
+        """
+        transition_matrix, rewards = self.policy_model(policy)
+        gamma = self.env.discount_factor
+
+        method = self.resolved_method
+        self.num_iterations = 0
+        if method == "direct":
+            self.value_fun = self._solve_direct(transition_matrix, rewards, gamma)
+        elif method == "sweep":
+            self.value_fun = self._solve_sweep(transition_matrix, rewards, gamma)
+        else:
+            self.value_fun = self._solve_krylov(transition_matrix, rewards, gamma, method)
+
+        return self.value_fun.copy()
+
+    @property
+    def resolved_method(self) -> str:
+        """
+        :return: The method evaluate() uses, with "auto" resolved by the number of states. Only the iterative
+                 methods start from the current value function, "direct" does not read it.
+        """
+        if self.method == "auto":
+            return "direct" if self.env.num_states <= self.direct_threshold else "bicgstab"
+        return self.method
+
+    def policy_model(self, policy: AbstractPolicy) -> Tuple[np.ndarray | sparse.csr_matrix, np.ndarray]:
+        """
+        Builds the state-to-state transition matrix P_pi[s, s'] = Σ_a pi(a|s) p(s'|s,a) and the expected reward
+        vector r_pi[s] = Σ_a pi(a|s) r(s,a). Rows of terminal states are zeroed, since episodes end there.
+
+        :param policy: A policy object that provides action probabilities for each state.
+        :return: A tuple (P_pi, r_pi), P_pi is a sparse CSR matrix for sparse MDPs and a dense array otherwise.
+        """
+        num_states, num_actions = self.env.num_states, self.env.num_actions
+        pi = TabularPolicy.matrix_of(policy, num_states, num_actions)
+
+        transition_function = getattr(self.env, "transition_function", None)
+        reward_function = getattr(self.env, "reward_function", None)
+        rewards = reward_function.rewards if reward_function is not None else np.array(
+            [[self.env.reward(s, a) for a in range(num_actions)] for s in range(num_states)]
+        )
+        rewards = np.einsum("sa,sa->s", pi, rewards)
+
+        if isinstance(transition_function, SparseTransitionFunction):
+            matrix = transition_function.matrix
+            transition_matrix = sparse.csr_matrix((num_states, num_states))
+            for action in range(num_actions):
+                transition_matrix += sparse.diags(pi[:, action]) @ matrix[action::num_actions]
+        else:
+            if isinstance(transition_function, DenseTransitionFunction):
+                probabilities = transition_function.probabilities
+            else:
+                probabilities = np.array([[[self.env.transition_prob(s_next, s, a) for s_next in range(num_states)]
+                                           for a in range(num_actions)] for s in range(num_states)])
+            transition_matrix = np.einsum("sa,sat->st", pi, probabilities)
+
+        terminal_mask = self.env.terminal_mask
+        if terminal_mask.any():
+            transition_matrix = self._zero_rows(transition_matrix, terminal_mask)
+            rewards[terminal_mask] = 0.0
+
+        return transition_matrix, rewards
+
+    @staticmethod
+    def _zero_rows(transition_matrix: np.ndarray | sparse.csr_matrix,
+                   mask: np.ndarray) -> np.ndarray | sparse.csr_matrix:
+        """
+        :param transition_matrix: The matrix P_pi.
+        :param mask: Boolean mask of the rows to clear.
+        :return: P_pi with all transitions out of the masked states removed.
+        """
+        if sparse.issparse(transition_matrix):
+            transition_matrix = sparse.csr_matrix(transition_matrix)
+            transition_matrix.data[np.repeat(mask, np.diff(transition_matrix.indptr))] = 0.0
+            transition_matrix.eliminate_zeros()
+        else:
+            transition_matrix[mask] = 0.0
+        return transition_matrix
+
+    @staticmethod
+    def _solve_direct(transition_matrix: np.ndarray | sparse.csr_matrix,
+                      rewards: np.ndarray,
+                      gamma: float) -> np.ndarray:
+        """
+        Solves (I - γP_pi) V = r_pi directly.
+        """
+        if sparse.issparse(transition_matrix):
+            system = sparse.identity(len(rewards), format="csc") - gamma * transition_matrix.tocsc()
+            return sparse_linalg.spsolve(system, rewards)
+        return np.linalg.solve(np.eye(len(rewards)) - gamma * transition_matrix, rewards)
+
+    def _solve_krylov(self,
+                      transition_matrix: np.ndarray | sparse.csr_matrix,
+                      rewards: np.ndarray,
+                      gamma: float,
+                      method: str) -> np.ndarray:
+        """
+        Solves (I - γP_pi) V = r_pi with GMRES or BiCGSTAB, starting from the current value function.
+        """
+        system = sparse_linalg.LinearOperator(
+            shape=transition_matrix.shape,
+            matvec=lambda v: v - gamma * (transition_matrix @ v),
+            dtype=np.float64
+        )
+        def count_iteration(_) -> None:
+            self.num_iterations += 1
+
+        if method == "gmres":
+            # With callback_type "x" the callback runs once per restart cycle, the unit of maxiter.
+            value_fun, info = sparse_linalg.gmres(system, rewards, x0=self.value_fun, rtol=self.tol,
+                                                  maxiter=self.max_iterations, callback=count_iteration,
+                                                  callback_type="x")
+            unit = "restart cycles"
+        else:
+            value_fun, info = sparse_linalg.bicgstab(system, rewards, x0=self.value_fun, rtol=self.tol,
+                                                     maxiter=self.max_iterations, callback=count_iteration)
+            unit = "iterations"
+        if info != 0:
+            raise RuntimeError(f"{method} did not converge within {self.max_iterations} {unit}.")
+        return value_fun
+
+    def _solve_sweep(self,
+                     transition_matrix: np.ndarray | sparse.csr_matrix,
+                     rewards: np.ndarray,
+                     gamma: float) -> np.ndarray:
+        """
+        Repeats the vectorized Bellman backup V <- r_pi + γ P_pi V, starting from the current value function,
+        until max |ΔV| < tol.
+        """
+        value_fun = self.value_fun.copy()
+        next_value_fun = np.empty_like(value_fun)
+        for iteration in range(1, self.max_iterations + 1):
+            np.add(rewards, gamma * (transition_matrix @ value_fun), out=next_value_fun)
+            delta = np.max(np.abs(next_value_fun - value_fun))
+            value_fun, next_value_fun = next_value_fun, value_fun
+            if delta < self.tol:
+                self.num_iterations = iteration
+                return value_fun
+        raise RuntimeError(f"Bellman sweeps did not converge within {self.max_iterations} iterations.")
@@ -0,0 +1,161 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import aclosing
+from typing import AsyncIterator, Iterator, List, Optional, Set
+from weakref import WeakKeyDictionary
+from rl_mdp.model_free_prediction.episodic_evaluator import EpisodicEvaluator
+from rl_mdp.model_free_prediction.evaluation_result import EvaluationResult
+from rl_mdp.model_free_prediction.stopping_criterion import StoppingCriterion
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+
+
+class AsyncEvaluationRunner:
+    """
+    Runs evaluations from asyncio code without blocking the event loop. Every evaluation is split into chunks of
+    report_every episodes (the rounds of EpisodicEvaluator.evaluate_anytime), each chunk runs in an executor and
+    the snapshot after each chunk is handed back to the event loop. At most max_concurrency chunks run at a time,
+    over all evaluations of the runner, so one process can multiplex many evaluation requests.
+
+    Episodes are simulated in Python, so with the default thread pool the chunks take turns on the GIL: the
+    runner keeps the event loop responsive and interleaves the evaluations, it does not run them in parallel.
+    """
+    def __init__(self, max_concurrency: int = 4, executor: Optional[Executor] = None):
+        """
+        :param max_concurrency: Maximum number of chunks running at the same time.
+        :param executor: Executor the chunks run in. Must run them in the current process (e.g. a thread pool),
+                         since the evaluation state cannot be pickled. Defaults to a thread pool with
+                         max_concurrency threads, which is shut down by shutdown().
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be positive, got {max_concurrency}.")
+        self.max_concurrency = max_concurrency
+        self._owns_executor = executor is None
+        self._executor = executor if executor is not None else ThreadPoolExecutor(max_concurrency)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # MDPs and policies hold their current state and random stream, so chunks that share one take turns.
+        self._locks: WeakKeyDictionary = WeakKeyDictionary()
+        self._running: Set[int] = set()      # ids of the evaluators with an unfinished evaluation.
+
+    async def stream(self,
+                     evaluator: EpisodicEvaluator,
+                     policy: AbstractPolicy,
+                     num_episodes: int,
+                     report_every: int = 100,
+                     criterion: Optional[StoppingCriterion] = None) -> AsyncIterator[EvaluationResult]:
+        """
+        Evaluates the policy and yields a snapshot after every chunk of report_every episodes, like
+        evaluate_anytime. Cancelling the consuming task, or closing the iterator (e.g. with contextlib.aclosing),
+        stops the evaluation before the next chunk; a chunk that is already running finishes in the background
+        and its result is dropped.
+
+        :param evaluator: The evaluator to run, it can only run one evaluation at a time.
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Maximum number of episodes to run.
+        :param report_every: Number of episodes per chunk.
+        :param criterion: Optional criterion for stopping before num_episodes episodes have been run.
+        :return: An async iterator over the snapshots, the last one holds the final estimate.
+        """
+        if id(evaluator) in self._running:
+            raise ValueError(f"The {type(evaluator).__name__} is already running an evaluation.")
+        self._running.add(id(evaluator))
+        snapshots = evaluator.evaluate_anytime(policy, num_episodes, report_every, criterion)
+        locks = [self._lock(evaluator.env)] + ([self._lock(policy)] if policy is not evaluator.env else [])
+        chunk = None
+        try:
+            while True:
+                chunk = await self._submit(snapshots, locks)
+                result = await asyncio.shield(chunk)
+                if result is None:
+                    return
+                yield result
+        finally:
+            if chunk is None or chunk.done():
+                self._close(snapshots, evaluator)
+            else:
+                chunk.add_done_callback(lambda _: self._close(snapshots, evaluator))
+
+    async def evaluate(self,
+                       evaluator: EpisodicEvaluator,
+                       policy: AbstractPolicy,
+                       num_episodes: int,
+                       report_every: int = 100,
+                       criterion: Optional[StoppingCriterion] = None) -> EvaluationResult:
+        """
+        Runs stream() to the end, the async counterpart of evaluate_until.
+
+        :param evaluator: The evaluator to run.
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Maximum number of episodes to run.
+        :param report_every: Number of episodes per chunk.
+        :param criterion: Optional criterion for stopping before num_episodes episodes have been run.
+        :return: The last snapshot, with the final estimate and the number of episodes actually used.
+        """
+        result = None
+        async with aclosing(self.stream(evaluator, policy, num_episodes, report_every, criterion)) as snapshots:
+            async for result in snapshots:
+                pass
+        return result if result is not None else EvaluationResult(evaluator.value_fun.copy(), 0, 0.0, 0.0, None)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shuts down the executor if the runner created it.
+
+        :param wait: Whether to wait for running chunks to finish.
+        """
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait)
+
+    async def __aenter__(self) -> "AsyncEvaluationRunner":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    async def _submit(self, snapshots: Iterator[EvaluationResult], locks: List[asyncio.Lock]) -> asyncio.Future:
+        """
+        Waits for the locks of the MDP and policy and a free slot, then starts the next chunk in the executor. The
+        locks and the slot are released when the chunk finishes, not when its awaiting task is cancelled.
+
+        :param snapshots: The evaluate_anytime iterator of the evaluation.
+        :param locks: Locks of the objects the chunk uses.
+        :return: Future of the snapshot after the chunk, None once the evaluation has ended.
+        """
+        acquired = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            await self._semaphore.acquire()
+        except BaseException:
+            for lock in acquired:
+                lock.release()
+            raise
+
+        def release(_: asyncio.Future) -> None:
+            self._semaphore.release()
+            for held_lock in acquired:
+                held_lock.release()
+
+        chunk = asyncio.get_running_loop().run_in_executor(self._executor, next, snapshots, None)
+        chunk.add_done_callback(release)
+        return chunk
+
+    def _lock(self, key: object) -> asyncio.Lock:
+        """
+        :param key: An MDP or policy.
+        :return: The lock of the object, created on first use.
+        """
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def _close(self, snapshots: Iterator[EvaluationResult], evaluator: object) -> None:
+        """
+        Ends an evaluation once none of its chunks is running.
+
+        :param snapshots: The evaluate_anytime iterator of the evaluation.
+        :param evaluator: The evaluator of the evaluation.
+        """
+        snapshots.close()
+        self._running.discard(id(evaluator))
@@ -0,0 +1,217 @@
+from typing import Optional
+import numpy as np
+from rl_mdp.mdp.mdp import MDP
+from rl_mdp.mdp.vector_mdp import VectorMDP
+from rl_mdp.model_free_prediction.abstract_evaluator import AbstractEvaluator
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.policy.tabular_policy import TabularPolicy
+from rl_mdp.sampling.rng import shared_rng
+
+
+class BatchedTDEvaluator(AbstractEvaluator):
+    """
+    TD(0) / TD(λ) prediction on num_envs copies of the MDP stepped in lock-step, see __init__.
+
+    The semantics trade speed for sample efficiency. Synchronous updates are fully vectorized, but a state visited
+    by several copies in the same step moves by α times the average of their TD errors, i.e. once instead of once per
+    copy. It therefore learns up to num_envs times slower per episode than the sequential evaluator with the same α:
+    on create_mdp with α = 0.003 and 16 copies, 5000 episodes give V = [0.98, 1.07, 1.72] against the exact
+    [1.77, 1.77, 2.0], while sequential semantics give [1.74, 1.58, 2.0]. The gap grows with num_envs and with
+    fewer states, so synchronous semantics need a larger α (or more episodes) for the same accuracy.
+    """
+    SEMANTICS = ("synchronous", "sequential")
+
+    def __init__(self,
+                 env: MDP,
+                 alpha: float,
+                 lambd: float = 0.0,
+                 num_envs: int = 64,
+                 semantics: str = "synchronous",
+                 rng: Optional[np.random.Generator] = None,
+                 trace_cutoff: float = 1e-6):
+        """
+        Initializes the batched TD(0) / TD(λ) Evaluator, which advances num_envs independent copies of the MDP in
+        lock-step and applies the K = num_envs TD updates of every step with vectorized operations.
+
+        :param env: A mdp object.
+        :param alpha: The step size.
+        :param lambd: The trace decay parameter (λ), 0 gives TD(0). Each copy has its own accumulating trace, which
+                      is stored sparsely: only the states visited in the copy's current episode with a trace of at
+                      least trace_cutoff are tracked, so a step costs O(#active traces) instead of O(num_envs * |S|).
+        :param num_envs: Number of environment copies K.
+        :param semantics: "synchronous" computes all K TD errors from the same value function and moves each
+                          visited state by α times the average of its TD errors. "sequential" gives the same result
+                          as applying the K updates one after the other in copy order.
+        :param rng: Random number generator, defaults to the shared generator (see seed_shared_rng).
+        :param trace_cutoff: Traces below this value are dropped, must be positive.
+        :raises ValueError: If the episodes of env could run forever (no terminal state and no max_episode_steps),
+                            since evaluate() runs until num_episodes episodes have finished.
+        """
+        if env.max_episode_steps is None and not env.terminal_mask.any():
+            raise ValueError("The MDP has no terminal state and no max_episode_steps, its episodes never finish.")
+        if semantics not in self.SEMANTICS:
+            raise ValueError(f"Unknown semantics {semantics}, expected one of {self.SEMANTICS}.")
+        if trace_cutoff <= 0:
+            raise ValueError(f"trace_cutoff must be positive, got {trace_cutoff}.")
+        self.env = env
+        self.alpha = alpha
+        self.lambd = lambd
+        self.num_envs = num_envs
+        self.semantics = semantics
+        self.trace_cutoff = trace_cutoff
+        self._rng = rng if rng is not None else shared_rng()
+        self.value_fun = np.zeros(self.env.num_states)    # Estimate of state-value function.
+        self.discounts = self.env.bootstrap_discounts()     # γ, or 0 for terminal successors.
+        # The active traces of all copies, sorted by the key copy * |S| + state. The trace of an entry is
+        # _trace_values[i] * _trace_scales[copy], the γλ decay of a copy is applied lazily through its scale.
+        self._trace_keys = np.empty(0, dtype=np.int64)
+        self._trace_values = np.empty(0)
+        self._trace_scales = np.ones(num_envs)
+
+    def evaluate(self, policy: AbstractPolicy, num_episodes: int) -> np.ndarray:
+        """
+        Perform the batched TD prediction algorithm until num_episodes episodes have finished (summed over all
+        copies). Updates of copies that are still running at that point have already been applied.
+
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Number of episodes to run for estimating V(s).
+        :return: The state-value function V(s) for the associated policy.
+        """
+        self.value_fun.fill(0)              # Reset value function.
+        self._clear_traces(np.ones(self.num_envs, dtype=bool))
+        if not isinstance(policy, TabularPolicy):
+            policy = TabularPolicy.from_policy(policy, self.env.num_states, self.env.num_actions)
+
+        vector_env = VectorMDP(self.env, self.num_envs, self._rng)
+        states = vector_env.reset()
+        finished = 0
+        while finished < num_episodes:
+            actions = policy.sample_actions(states, self._rng.random(self.num_envs))
+            next_states, rewards, dones = vector_env.step(actions)
+            if self.lambd == 0:
+                self._update_td0(states, rewards, next_states)
+            else:
+                self._update_td_lambda(states, rewards, next_states, dones)
+            finished += np.count_nonzero(dones)
+            states = vector_env.current_states
+
+        return self.value_fun.copy()
+
+    def _update_td0(self, states: np.ndarray, rewards: np.ndarray, next_states: np.ndarray) -> None:
+        """
+        Applies the K TD(0) updates of one lock-step.
+
+        :param states: The current state of each copy.
+        :param rewards: The reward of each copy.
+        :param next_states: The next state of each copy.
+        """
+        value_fun, discounts = self.value_fun, self.discounts
+        td_errors = rewards + discounts[next_states] * value_fun[next_states] - value_fun[states]
+
+        if self.semantics == "synchronous":
+            visited, inverse, counts = np.unique(states, return_inverse=True, return_counts=True)
+            value_fun[visited] += self.alpha * np.bincount(inverse, weights=td_errors) / counts
+            return
+
+        # An update commutes with all others unless it writes a state written or read by another copy, or reads a
+        # state written by another copy. Those are applied at once, the remaining ones in copy order.
+        independent = self._independent_updates(states, next_states)
+        value_fun[states[independent]] += self.alpha * td_errors[independent]
+        for k in np.flatnonzero(~independent).tolist():
+            state, next_state = states[k], next_states[k]
+            value_fun[state] += self.alpha * (rewards[k] + discounts[next_state] * value_fun[next_state]
+                                              - value_fun[state])
+
+    def _update_td_lambda(self,
+                          states: np.ndarray,
+                          rewards: np.ndarray,
+                          next_states: np.ndarray,
+                          dones: np.ndarray) -> None:
+        """
+        Applies the K TD(λ) updates of one lock-step and clears the traces of finished copies.
+
+        :param states: The current state of each copy.
+        :param rewards: The reward of each copy.
+        :param next_states: The next state of each copy.
+        :param dones: The done flag of each copy.
+        """
+        value_fun = self.value_fun
+        self._decay_and_visit(states)
+        num_states = self.env.num_states
+        keys, scales = self._trace_keys, self._trace_scales
+        entry_copies, entry_states = np.divmod(keys, num_states)
+
+        if self.semantics == "synchronous":
+            td_errors = rewards + self.discounts[next_states] * value_fun[next_states] - value_fun[states]
+            # Every state moves by α times the average of td_error * trace over the copies with a trace for it.
+            weights = td_errors[entry_copies] * self._trace_values * scales[entry_copies]
+            active, inverse, counts = np.unique(entry_states, return_inverse=True, return_counts=True)
+            value_fun[active] += self.alpha * np.bincount(inverse, weights=weights) / counts
+        else:
+            # The entries of copy k are contiguous, since the keys are sorted by copy first.
+            bounds = np.searchsorted(keys, np.arange(self.num_envs + 1) * num_states).tolist()
+            for k, state, reward, next_state in zip(range(self.num_envs), states.tolist(), rewards.tolist(),
+                                                    next_states.tolist()):
+                td_error = reward + self.discounts[next_state] * value_fun[next_state] - value_fun[state]
+                start, end = bounds[k], bounds[k + 1]
+                step = (self.alpha * td_error * scales[k]) * self._trace_values[start:end]
+                value_fun[entry_states[start:end]] += step    # The states of one copy are distinct.
+
+        self._clear_traces(dones)
+
+    def _decay_and_visit(self, states: np.ndarray) -> None:
+        """
+        Decays the traces of all copies by γλ and adds one to the trace of the current state of each copy.
+
+        :param states: The current state of each copy.
+        """
+        scales = self._trace_scales
+        scales *= self.env.discount_factor * self.lambd
+        low = scales < self.trace_cutoff
+        if np.any(low):
+            # Fold the pending decay into the stored traces of those copies and drop traces below the cutoff.
+            rescaled = low[self._trace_keys // self.env.num_states]
+            values = self._trace_values
+            values[rescaled] *= scales[self._trace_keys[rescaled] // self.env.num_states]
+            keep = ~rescaled | (values >= self.trace_cutoff)
+            self._trace_keys, self._trace_values = self._trace_keys[keep], values[keep]
+            scales[low] = 1.0
+
+        copies = np.arange(self.num_envs)
+        new_keys = copies * self.env.num_states + states          # Sorted, one key per copy.
+        increments = 1.0 / scales
+        positions = np.searchsorted(self._trace_keys, new_keys)
+        found = positions < len(self._trace_keys)
+        found[found] = self._trace_keys[positions[found]] == new_keys[found]
+        self._trace_values[positions[found]] += increments[found]
+        self._trace_keys = np.insert(self._trace_keys, positions[~found], new_keys[~found])
+        self._trace_values = np.insert(self._trace_values, positions[~found], increments[~found])
+
+    def _clear_traces(self, copies: np.ndarray) -> None:
+        """
+        Removes the traces of the given copies.
+
+        :param copies: Boolean mask of the copies whose traces are cleared.
+        """
+        if np.any(copies):
+            keep = ~copies[self._trace_keys // self.env.num_states]
+            self._trace_keys, self._trace_values = self._trace_keys[keep], self._trace_values[keep]
+            self._trace_scales[copies] = 1.0
+
+    @staticmethod
+    def _independent_updates(states: np.ndarray, next_states: np.ndarray) -> np.ndarray:
+        """
+        :param states: States written by the K updates.
+        :param next_states: States read (besides the written state itself) by the K updates.
+        :return: Boolean mask of the updates that share no state with any other update in a conflicting way.
+        """
+        sorted_states = np.sort(states)
+        sorted_next_states = np.sort(next_states)
+        self_loop = (states == next_states).astype(np.int64)
+        writes_of_state = (np.searchsorted(sorted_states, states, side="right")
+                           - np.searchsorted(sorted_states, states, side="left"))
+        reads_of_state = (np.searchsorted(sorted_next_states, states, side="right")
+                          - np.searchsorted(sorted_next_states, states, side="left") - self_loop)
+        writes_of_next_state = (np.searchsorted(sorted_states, next_states, side="right")
+                                - np.searchsorted(sorted_states, next_states, side="left") - self_loop)
+        return (writes_of_state == 1) & (reads_of_state == 0) & (writes_of_next_state == 0)
@@ -0,0 +1,231 @@
+import sys
+from typing import Optional, Tuple
+import numpy as np
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.mdp.dense_transition_function import DenseTransitionFunction
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.policy.tabular_policy import TabularPolicy
+from rl_mdp.sampling.rng import shared_rng
+
+# Optional compiled fast path for the simulate-and-update loop of the episodic evaluators. The kernels take the
+# dense arrays of the model (P[s, a, s'], R[s, a], pi[s, a]) and run whole episodes including the MC / TD(0) / TD(λ)
+# updates in numba's nopython mode. If numba is not installed the evaluators keep using their Python implementation.
+# Measured on a dense 2000-state, 4-action Garnet MDP (about 20 steps per episode, 5000 episodes), the kernels run
+# about 1 µs per step against 7-10 µs in Python, an end-to-end speedup of about 7-9x for MC, TD(0) and TD(λ).
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+# Trace type codes of td_lambda_kernel, in the order of TDLambdaEvaluator.TRACE_TYPES.
+TRACE_CODES = {"accumulating": 0, "replacing": 1, "dutch": 2}
+
+
+def _njit(function):
+    """
+    Compiles a function with numba.njit if numba is installed, otherwise returns it unchanged.
+    """
+    return numba.njit(cache=True, nogil=True)(function) if numba is not None else function
+
+
+# (P cumulative over s', R, pi cumulative over a, terminal mask, start state, max episode steps), see compiled_model.
+CompiledModel = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int, int]
+
+
+def compiled_model(env: AbstractMDP, policy: AbstractPolicy) -> Optional[CompiledModel]:
+    """
+    Extracts the arrays used by the kernels.
+
+    :param env: A mdp object.
+    :param policy: A policy object, converted with TabularPolicy.matrix_of.
+    :return: A tuple (P cumulative over s', R, pi cumulative over a, terminal mask, start state, max episode steps)
+             where the start state is -1 if unset, or None if numba is missing, the model has no dense arrays or
+             episodes could run forever (no terminal state and no max_episode_steps).
+    """
+    transition_function = getattr(env, "transition_function", None)
+    if not NUMBA_AVAILABLE or not isinstance(transition_function, DenseTransitionFunction):
+        return None
+    max_episode_steps = getattr(env, "max_episode_steps", None)
+    terminal_mask = env.terminal_mask
+    if max_episode_steps is None and not terminal_mask.any():
+        return None
+    pi = TabularPolicy.matrix_of(policy, env.num_states, env.num_actions)
+
+    # The transition CDF is cached by the transition function, only the policy CDF is built per call. Both are
+    # normalized by the row totals, see DenseTransitionFunction.cdf.
+    transition_cdf = transition_function.cdf
+    policy_cdf = np.cumsum(pi, axis=1)
+    policy_cdf /= policy_cdf[:, -1:]
+    start_state = -1 if env.start_state is None else env.start_state
+    max_steps = sys.maxsize if max_episode_steps is None else max_episode_steps
+    return transition_cdf, env.reward_function.rewards, policy_cdf, terminal_mask, start_state, max_steps
+
+
+def kernel_seed(rng: Optional[np.random.Generator] = None) -> int:
+    """
+    :param rng: The generator to draw the seed from, defaults to the shared generator so that seeding it makes the
+                compiled path reproducible as well.
+    :return: A seed for the kernels' random stream.
+    """
+    return int((shared_rng() if rng is None else rng).integers(2 ** 31))
+
+
+@_njit
+def _search(cdf: np.ndarray, uniform: float) -> int:
+    """
+    Inverse-CDF lookup: index of the first entry of cdf that is larger than uniform.
+    """
+    low, high = 0, len(cdf) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if cdf[middle] > uniform:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+@_njit
+def _run_episode(transition_cdf: np.ndarray,
+                 rewards: np.ndarray,
+                 policy_cdf: np.ndarray,
+                 terminal_mask: np.ndarray,
+                 start_state: int,
+                 max_steps: int,
+                 states: np.ndarray,
+                 episode_rewards: np.ndarray) -> Tuple[int, int, np.ndarray, np.ndarray]:
+    """
+    Simulates one episode into the given arrays, growing them if needed. The episode ends in a terminal state or
+    is truncated after max_steps steps.
+
+    :return: A tuple (episode length, final state, states, rewards).
+    """
+    num_states = transition_cdf.shape[0]
+    state = start_state if start_state >= 0 else np.random.randint(num_states)
+    t = 0
+    while True:
+        if t == len(states):
+            grown_states = np.empty(2 * len(states), dtype=states.dtype)
+            grown_states[:t] = states
+            grown_rewards = np.empty(2 * len(states), dtype=episode_rewards.dtype)
+            grown_rewards[:t] = episode_rewards
+            states, episode_rewards = grown_states, grown_rewards
+        action = _search(policy_cdf[state], np.random.random())
+        next_state = _search(transition_cdf[state, action], np.random.random())
+        states[t] = state
+        episode_rewards[t] = rewards[state, action]
+        t += 1
+        state = next_state
+        if terminal_mask[state] or t >= max_steps:
+            return t, state, states, episode_rewards
+
+
+@_njit
+def mc_kernel(transition_cdf: np.ndarray,
+              rewards: np.ndarray,
+              policy_cdf: np.ndarray,
+              gamma: float,
+              terminal_mask: np.ndarray,
+              start_state: int,
+              max_steps: int,
+              num_episodes: int,
+              seed: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    First-visit Monte Carlo prediction, truncated episodes contribute their (cut off) returns.
+
+    :return: Per-state (Welford) counts, means and sums of squared deviations of the first-visit returns.
+    """
+    np.random.seed(seed)
+    num_states = transition_cdf.shape[0]
+    counts = np.zeros(num_states, dtype=np.int64)
+    means = np.zeros(num_states)
+    m2 = np.zeros(num_states)
+    first_visit = np.full(num_states, -1, dtype=np.int64)
+    states = np.empty(1024, dtype=np.int64)
+    episode_rewards = np.empty(1024)
+
+    for _ in range(num_episodes):
+        length, _, states, episode_rewards = _run_episode(transition_cdf, rewards, policy_cdf, terminal_mask,
+                                                          start_state, max_steps, states, episode_rewards)
+        for t in range(length):
+            if first_visit[states[t]] < 0:
+                first_visit[states[t]] = t
+        g = 0.0
+        for t in range(length - 1, -1, -1):
+            g = gamma * g + episode_rewards[t]
+            state = states[t]
+            if first_visit[state] == t:
+                counts[state] += 1
+                delta = g - means[state]
+                means[state] += delta / counts[state]
+                m2[state] += delta * (g - means[state])
+                first_visit[state] = -1
+    return counts, means, m2
+
+
+@_njit
+def td_lambda_kernel(transition_cdf: np.ndarray,
+                     rewards: np.ndarray,
+                     policy_cdf: np.ndarray,
+                     gamma: float,
+                     terminal_mask: np.ndarray,
+                     start_state: int,
+                     max_steps: int,
+                     alpha: float,
+                     lambd: float,
+                     trace_code: int,
+                     num_episodes: int,
+                     seed: int,
+                     initial_value_fun: np.ndarray) -> np.ndarray:
+    """
+    Online TD(λ) prediction, λ = 0 gives TD(0). Only the traces of states visited in the current episode are
+    touched, which gives the same result as a dense trace vector. Terminal successors are not bootstrapped from,
+    the final state of a truncated episode is.
+
+    :return: The value function, starting from a copy of initial_value_fun.
+    """
+    np.random.seed(seed)
+    num_states = transition_cdf.shape[0]
+    value_fun = initial_value_fun.copy()
+    traces = np.zeros(num_states)
+    is_visited = np.zeros(num_states, dtype=np.bool_)
+    visited = np.empty(num_states, dtype=np.int64)
+    decay = gamma * lambd
+    discounts = np.where(terminal_mask, 0.0, gamma)
+    states = np.empty(1024, dtype=np.int64)
+    episode_rewards = np.empty(1024)
+
+    for _ in range(num_episodes):
+        length, final_state, states, episode_rewards = _run_episode(transition_cdf, rewards, policy_cdf,
+                                                                    terminal_mask, start_state, max_steps, states,
+                                                                    episode_rewards)
+        num_visited = 0
+        for t in range(length):
+            state = states[t]
+            next_state = states[t + 1] if t + 1 < length else final_state
+            td_error = episode_rewards[t] + discounts[next_state] * value_fun[next_state] - value_fun[state]
+            if lambd == 0.0:
+                value_fun[state] += alpha * td_error
+                continue
+
+            if not is_visited[state]:
+                is_visited[state] = True
+                visited[num_visited] = state
+                num_visited += 1
+            for i in range(num_visited):
+                traces[visited[i]] *= decay
+            if trace_code == 0:
+                traces[state] += 1.0
+            elif trace_code == 1:
+                traces[state] = 1.0
+            else:
+                traces[state] = (1.0 - alpha) * traces[state] + 1.0
+            for i in range(num_visited):
+                value_fun[visited[i]] += alpha * td_error * traces[visited[i]]
+
+        for i in range(num_visited):
+            traces[visited[i]] = 0.0
+            is_visited[visited[i]] = False
+    return value_fun
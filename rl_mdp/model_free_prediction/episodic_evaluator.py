@@ -0,0 +1,169 @@
+import time
+from abc import abstractmethod
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from rl_mdp.instrumentation.profiler import Profiler
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.model_free_prediction.abstract_evaluator import AbstractEvaluator
+from rl_mdp.model_free_prediction.compiled import CompiledModel, compiled_model
+from rl_mdp.model_free_prediction.evaluation_result import EvaluationResult
+from rl_mdp.model_free_prediction.stopping_criterion import StoppingCriterion
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+
+
+class EpisodicEvaluator(AbstractEvaluator):
+    """
+    Base class of the evaluators that learn from one simulated episode at a time (MC, TD(0) and TD(λ)). It
+    simulates the episodes (timed if profiling is enabled) and runs the evaluation, in Python or in the compiled
+    kernel of the subclass, and provides anytime evaluation with snapshots and early stopping. Subclasses implement
+    update_from_episode and _run_kernel.
+    """
+    def __init__(self, env: AbstractMDP, compiled: bool = False, kernel_rng: Optional[np.random.Generator] = None):
+        """
+        :param env: A mdp object.
+        :param compiled: If True, episodes and updates run in a numba compiled kernel when numba is installed and the
+                         model has dense arrays (see rl_mdp.model_free_prediction.compiled).
+        :param kernel_rng: Generator the seeds of the compiled kernel are drawn from, defaults to the shared
+                           generator. It only affects compiled runs: episodes simulated in Python draw from the
+                           streams of the env and policy, so seed those (see RngMixin) for reproducible results.
+        """
+        self.env = env
+        self.compiled = compiled
+        self.kernel_rng = kernel_rng
+        self.value_fun = np.zeros(self.env.num_states)    # Estimate of state-value function.
+        self.initial_value_fun: Optional[np.ndarray] = None     # Warm start of evaluate(), zeros if None.
+        self.buffer = EpisodeBuffer()
+        self.profiler: Optional[Profiler] = Profiler.from_environment(type(self).__name__)   # None unless enabled.
+
+    def evaluate(self, policy: AbstractPolicy, num_episodes: int) -> np.ndarray:
+        """
+        Evaluates the policy from num_episodes episodes, starting from initial_value_fun.
+
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Number of episodes to run for estimating V(s).
+        :return: The state-value function V(s) for the associated policy.
+        """
+        self.reset()
+
+        model = compiled_model(self.env, policy) if self.compiled else None
+        if model is not None:
+            self._run_kernel(model, num_episodes)
+            return self.value_fun.copy()
+
+        self._run_episodes(policy, num_episodes)
+        if self.profiler is not None:
+            self.profiler.log()
+        return self.value_fun.copy()
+
+    def reset(self) -> None:
+        """
+        Resets the value function before a new evaluation, to initial_value_fun if it is set, and the profiler.
+        """
+        if self.profiler is not None:
+            self.profiler.reset()
+        if self.initial_value_fun is None:
+            self.value_fun.fill(0)
+        else:
+            self.value_fun[:] = self.initial_value_fun
+
+    @abstractmethod
+    def _run_kernel(self, model: CompiledModel, num_episodes: int) -> None:
+        """
+        Runs the episodes and updates in the compiled kernel, continuing from the current estimate.
+
+        :param model: The arrays returned by compiled_model.
+        :param num_episodes: Number of episodes to run.
+        """
+        pass
+
+    @abstractmethod
+    def update_from_episode(self, states: np.ndarray, rewards: np.ndarray, final_state: int) -> None:
+        """
+        Applies the updates of one episode to the estimate.
+
+        :param states: The states visited in the episode.
+        :param rewards: The rewards received in the episode.
+        :param final_state: The state the episode ended in.
+        """
+        pass
+
+    def evaluate_anytime(self,
+                         policy: AbstractPolicy,
+                         num_episodes: int,
+                         report_every: int = 100,
+                         criterion: Optional[StoppingCriterion] = None) -> Iterator[EvaluationResult]:
+        """
+        Evaluates the policy in rounds of report_every episodes and yields a snapshot after every round, stopping
+        early when the criterion holds. Episodes are always simulated in Python, also for compiled evaluators.
+
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Maximum number of episodes to run.
+        :param report_every: Number of episodes between two snapshots.
+        :param criterion: Optional criterion for stopping before num_episodes episodes have been run.
+        :return: An iterator over the snapshots, the last one holds the final estimate.
+        """
+        self.reset()
+        start = time.perf_counter()
+        previous = self.value_fun.copy()
+        episodes = 0
+        while episodes < num_episodes:
+            batch = min(report_every, num_episodes - episodes)
+            self._run_episodes(policy, batch)
+            episodes += batch
+            max_delta = float(np.max(np.abs(self.value_fun - previous)))
+            previous[:] = self.value_fun
+            elapsed = time.perf_counter() - start
+            stopped_by = criterion.check(self, max_delta, elapsed) if criterion is not None else None
+            yield EvaluationResult(self.value_fun.copy(), episodes, max_delta, elapsed, stopped_by)
+            if stopped_by is not None:
+                return
+
+    def evaluate_until(self,
+                       policy: AbstractPolicy,
+                       num_episodes: int,
+                       criterion: StoppingCriterion,
+                       report_every: int = 100) -> EvaluationResult:
+        """
+        Runs evaluate_anytime to the end.
+
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Maximum number of episodes to run.
+        :param criterion: Criterion for stopping before num_episodes episodes have been run.
+        :param report_every: Number of episodes between two checks of the criterion.
+        :return: The last snapshot, with the final estimate and the number of episodes actually used.
+        """
+        result = None
+        for result in self.evaluate_anytime(policy, num_episodes, report_every, criterion):
+            pass
+        return result if result is not None else EvaluationResult(self.value_fun.copy(), 0, 0.0, 0.0, None)
+
+    def _run_episodes(self, policy: AbstractPolicy, num_episodes: int) -> None:
+        """
+        Runs episodes and applies their updates, continuing from the current estimate.
+
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Number of episodes to run.
+        """
+        profiler = self.profiler
+        for _ in range(num_episodes):
+            states, _, rewards, final_state = self._generate_episode(policy)
+            if profiler is None:
+                self.update_from_episode(states, rewards, final_state)
+            else:
+                start = time.perf_counter()
+                self.update_from_episode(states, rewards, final_state)
+                profiler.add_time("updates", time.perf_counter() - start)
+
+    def _generate_episode(self, policy: AbstractPolicy) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        Generate an episode following the policy into the (reused) episode buffer.
+
+        :return: A tuple (states, actions, rewards, final_state) of views into the episode buffer.
+        """
+        self.buffer.clear()
+        if self.profiler is None:
+            self.buffer.record(self.env, policy)
+        else:
+            self.profiler.record(self.buffer, self.env, policy)
+        return self.buffer.episode(0)
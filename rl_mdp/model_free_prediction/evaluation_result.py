@@ -0,0 +1,13 @@
+from typing import NamedTuple, Optional
+import numpy as np
+
+
+class EvaluationResult(NamedTuple):
+    """
+    Snapshot of an anytime evaluation, see EpisodicEvaluator.evaluate_anytime.
+    """
+    value_fun: np.ndarray           # Copy of the estimate of V(s) at this point.
+    num_episodes: int               # Number of episodes used so far.
+    max_delta: float                # max |ΔV| since the previous snapshot.
+    elapsed: float                  # Wall-clock seconds since the evaluation started.
+    stopped_by: Optional[str]       # Criterion that ended the evaluation early, None while running or at the budget.
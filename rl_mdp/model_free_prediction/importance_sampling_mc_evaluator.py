@@ -0,0 +1,56 @@
+from typing import Optional, Sequence
+import numpy as np
+from scipy.signal import lfilter
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.model_free_prediction.off_policy_evaluator import OffPolicyEvaluator
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+from rl_mdp.trajectory.trajectory_store import TrajectoryStore
+
+
+class ImportanceSamplingMCEvaluator(OffPolicyEvaluator):
+    def __init__(self,
+                 env: AbstractMDP,
+                 behaviour_policy: AbstractPolicy,
+                 episodes: EpisodeBuffer | TrajectoryStore,
+                 weighted: bool = True,
+                 chunk_steps: int = 1 << 20):
+        """
+        Initializes the off-policy first-visit Monte Carlo Evaluator. The first-visit return G_t of a state is
+        weighted with the importance sampling ratio ρ_t = Π_{k>=t} pi(a_k|s_k) / b(a_k|s_k) of the rest of the
+        episode, computed with a reverse cumulative product over the episode.
+
+        :param env: The mdp the episodes were generated on.
+        :param behaviour_policy: The policy that generated the episodes.
+        :param episodes: The logged episodes.
+        :param weighted: If True use weighted importance sampling V(s) = Σ ρG / Σ ρ (biased, much lower variance),
+                         otherwise ordinary importance sampling V(s) = Σ ρG / N(s) (unbiased).
+        :param chunk_steps: Approximate number of (step, target policy) ratios held in memory at a time.
+        """
+        super().__init__(env, behaviour_policy, episodes, chunk_steps)
+        self.weighted = weighted
+
+    def evaluate_many(self, policies: Sequence[AbstractPolicy], num_episodes: Optional[int] = None) -> np.ndarray:
+        """
+        Estimates the value functions of several target policies in one pass over the logged episodes.
+
+        :param policies: The target policies.
+        :param num_episodes: Number of logged episodes to use, defaults to all of them.
+        :return: Array of shape (number of policies, |S|), row i is the estimate for policies[i].
+        """
+        target_probs = self._target_probs(policies)
+        gamma = self.env.discount_factor
+        weighted_returns = np.zeros((len(policies), self.env.num_states))
+        weights = np.zeros_like(weighted_returns)     # Σ ρ for weighted, N(s) for ordinary importance sampling.
+
+        for offsets, states, rewards, _, ratios in self._iter_chunks(target_probs, num_episodes):
+            for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+                episode_states = states[start:end]
+                visited, first_visits = np.unique(episode_states, return_index=True)
+                returns = lfilter([1.0], [1.0, -gamma], rewards[start:end][::-1])[::-1]
+                rho = np.cumprod(ratios[:, start:end][:, ::-1], axis=1)[:, ::-1][:, first_visits]
+                weighted_returns[:, visited] += rho * returns[first_visits]
+                weights[:, visited] += rho if self.weighted else 1.0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(weights > 0, weighted_returns / weights, 0.0)
@@ -1,60 +1,204 @@
-from collections import defaultdict
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
 import numpy as np
+from scipy.signal import lfilter
 from rl_mdp.mdp.abstract_mdp import AbstractMDP
-from rl_mdp.model_free_prediction.abstract_evaluator import AbstractEvaluator
+from rl_mdp.model_free_prediction.compiled import CompiledModel, kernel_seed, mc_kernel
+from rl_mdp.model_free_prediction.episodic_evaluator import EpisodicEvaluator
 from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.sampling.rng import RngMixin, seed_shared_rng
+from rl_mdp.serialization import load_mdp
 
 
-class MCEvaluator(AbstractEvaluator):
-    def __init__(self, env: AbstractMDP):
+class MCEvaluator(EpisodicEvaluator):
+    def __init__(self,
+                 env: AbstractMDP,
+                 num_workers: int = 1,
+                 seed: Optional[int] = None,
+                 vectorized_returns: bool = False,
+                 compiled: bool = False,
+                 kernel_rng: Optional[np.random.Generator] = None):
         """
         Initializes the Monte Carlo Evaluator.
 
         :param env: An environment object.
+        :param num_workers: Number of worker processes. With more than one worker the episodes are sharded across a
+                            process pool, each worker running on its own copy of the environment and policy. An
+                            environment memory-mapped by load_mdp is reopened by path in every worker instead, so
+                            the workers share its pages.
+        :param seed: Seed for the worker random streams. For a given seed and number of workers the result is
+                     reproducible bit for bit. Only used when num_workers > 1.
+        :param vectorized_returns: If True, the discounted returns of an episode are computed with a single reverse
+                                   vectorized pass (a linear filter) instead of a Python loop.
+        :param compiled: See EpisodicEvaluator. Only used when num_workers == 1.
+        :param kernel_rng: See EpisodicEvaluator.
         """
-        self.env = env
-        self.value_fun = np.zeros(self.env.num_states)    # Estimate of state-value function.
-        self.returns = defaultdict(list)  # Stores returns for each state
+        super().__init__(env, compiled, kernel_rng)
+        self.num_workers = num_workers
+        self.seed = seed
+        self.vectorized_returns = vectorized_returns
+        # Running (Welford) statistics of the first-visit returns of each state, O(|S|) memory regardless of the
+        # number of episodes.
+        self.return_counts = np.zeros(self.env.num_states, dtype=np.int64)
+        self.return_means = np.zeros(self.env.num_states)
+        self.return_m2 = np.zeros(self.env.num_states)    # Sum of squared deviations from the mean.
 
     def evaluate(self, policy: AbstractPolicy, num_episodes: int) -> np.ndarray:
         """
-        Perform the Monte Carlo prediction algorithm.
+        Perform the Monte Carlo prediction algorithm. V(s) is the mean first-visit return of s, states without
+        returns keep their initial_value_fun (zero if None).
 
         :param policy: A policy object that provides action probabilities for each state.
         :param num_episodes: Number of episodes to run for estimating V(s).
         :return: The state-value function V(s) for the associated policy.
         """
-        self.value_fun.fill(0)  # Reset value function.
-        self.returns.clear()
+        if self.num_workers > 1:
+            self.reset()
+            self._evaluate_parallel(policy, num_episodes)
+            return self.value_fun.copy()
+        return super().evaluate(policy, num_episodes)
 
-        for _ in range(num_episodes):
-            episode = self._generate_episode(policy)
-            self._update_value_function(episode)
-        return self.value_fun.copy()
+    def _run_kernel(self, model: CompiledModel, num_episodes: int) -> None:
+        """
+        Runs first-visit Monte Carlo in the compiled kernel.
+
+        :param model: The arrays returned by compiled_model.
+        :param num_episodes: Number of episodes to run.
+        """
+        transition_cdf, rewards, policy_cdf, terminal_mask, start_state, max_steps = model
+        self._merge_statistics(*mc_kernel(transition_cdf, rewards, policy_cdf, self.env.discount_factor,
+                                          terminal_mask, start_state, max_steps, num_episodes,
+                                          kernel_seed(self.kernel_rng)))
+        np.copyto(self.value_fun, self.return_means, where=self.return_counts > 0)
 
-    def _generate_episode(self, policy: AbstractPolicy) -> List[Tuple[int, int, float]]:
+    @property
+    def return_variance(self) -> np.ndarray:
+        """
+        :return: The sample variance of the returns of each state (NaN for states seen less than twice).
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.return_counts > 1, self.return_m2 / (self.return_counts - 1), np.nan)
+
+    @property
+    def standard_error(self) -> np.ndarray:
+        """
+        :return: The estimated standard error of V(s) for each state (NaN for states seen less than twice).
         """
-        Generate an episode following the policy.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.sqrt(self.return_variance / self.return_counts)
+
+    def _evaluate_parallel(self, policy: AbstractPolicy, num_episodes: int) -> None:
+        """
+        Shards the episodes across a process pool and merges the per-state return statistics of the workers
+        (in worker order, so the floating point result does not depend on scheduling) into the value function.
+
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Total number of episodes to run.
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(self.num_workers)
+        shards = [len(shard) for shard in np.array_split(np.arange(num_episodes), self.num_workers)]
+        # Pickling a memory-mapped MDP would give every worker a private copy of its arrays.
+        source_path = getattr(self.env, "source_path", None)
+        env = self.env if source_path is None else source_path
+
+        with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+            results = executor.map(_run_episodes, [env] * self.num_workers,
+                                   [policy] * self.num_workers, shards, seeds,
+                                   [self.vectorized_returns] * self.num_workers)
+            for counts, means, m2 in results:
+                self._merge_statistics(counts, means, m2)
 
-        :return: A list of (state, action, reward) tuples representing the episode.
+        np.copyto(self.value_fun, self.return_means, where=self.return_counts > 0)
+
+    def _merge_statistics(self, counts: np.ndarray, means: np.ndarray, m2: np.ndarray) -> None:
         """
-        episode = []
-        state = self.env.reset()
-        done = False
+        Merges return statistics of another evaluator into this one (Chan et al.'s parallel variance update).
 
-        while not done:
-            action = policy.sample_action(state)
-            next_state, reward, done = self.env.step(action)
-            episode.append((state, action, reward))
-            state = next_state
+        :param counts: Per-state return counts.
+        :param means: Per-state mean returns.
+        :param m2: Per-state sums of squared deviations from the mean.
+        """
+        total = self.return_counts + counts
+        visited = total > 0
+        delta = means[visited] - self.return_means[visited]
+        weight = counts[visited] / total[visited]
+        self.return_means[visited] += delta * weight
+        self.return_m2[visited] += m2[visited] + delta ** 2 * self.return_counts[visited] * weight
+        self.return_counts[:] = total
 
-        return episode
+    def reset(self) -> None:
+        """
+        Resets the value function and the profiler (see EpisodicEvaluator.reset) and the return statistics before a
+        new evaluation.
+        """
+        super().reset()
+        self.return_counts.fill(0)
+        self.return_means.fill(0)
+        self.return_m2.fill(0)
 
-    def _update_value_function(self, episode: List[Tuple[int, int, float]]) -> None:
+    def update_from_episode(self, states: np.ndarray, rewards: np.ndarray, final_state: int) -> None:
         """
         Update the value function using the Monte Carlo method.
 
-        :param episode: A list of (state, action, reward) tuples.
+        :param states: The states visited in the episode.
+        :param rewards: The rewards received in the episode.
+        :param final_state: The state the episode ended in (not used, the return of a terminal state is zero and the
+                            returns of truncated episodes are not bootstrapped).
         """
-        pass
+        gamma = self.env.discount_factor
+        if self.vectorized_returns:
+            # G_t = r_t + γ G_{t+1} is a first order linear filter over the reversed rewards.
+            returns = lfilter([1.0], [1.0, -gamma], rewards[::-1])[::-1]
+            first_visit_states, first_visit_index = np.unique(states, return_index=True)
+            self._accumulate(first_visit_states, returns[first_visit_index])
+            return
+
+        first_visit_returns = {}
+        g = 0.0
+        for state, reward in zip(reversed(states.tolist()), reversed(rewards.tolist())):
+            g = gamma * g + reward
+            first_visit_returns[state] = g  # Earlier visits overwrite later ones, leaving the first-visit return.
+
+        self._accumulate(np.fromiter(first_visit_returns.keys(), dtype=np.int64, count=len(first_visit_returns)),
+                         np.fromiter(first_visit_returns.values(), dtype=np.float64, count=len(first_visit_returns)))
+
+    def _accumulate(self, states: np.ndarray, returns: np.ndarray) -> None:
+        """
+        Welford update of the running return statistics and the value function.
+
+        :param states: Array of distinct states.
+        :param returns: The return observed for each state.
+        """
+        self.return_counts[states] += 1
+        delta = returns - self.return_means[states]
+        self.return_means[states] += delta / self.return_counts[states]
+        self.return_m2[states] += delta * (returns - self.return_means[states])
+        self.value_fun[states] = self.return_means[states]
+
+
+def _run_episodes(env: AbstractMDP | str,
+                  policy: AbstractPolicy,
+                  num_episodes: int,
+                  seed: np.random.SeedSequence,
+                  vectorized_returns: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Worker of MCEvaluator._evaluate_parallel, runs on a (pickled) copy of the environment and policy.
+
+    :param env: An environment object, or the directory of an MDP saved with save_mdp to memory-map read-only.
+    :param policy: A policy object.
+    :param num_episodes: Number of episodes to run in this worker.
+    :param seed: Independent seed of this worker.
+    :param vectorized_returns: See MCEvaluator.
+    :return: Per-state counts, means and sums of squared deviations of the first-visit returns.
+    """
+    if isinstance(env, str):
+        env = load_mdp(env, validate=False)
+    seed_shared_rng(seed)
+    # Every worker receives the same pickled state of the streams, so the env and policy get their own streams
+    # derived from the worker seed.
+    for obj, obj_seed in zip((env, policy), seed.spawn(2)):
+        if isinstance(obj, RngMixin):
+            obj.rng = np.random.default_rng(obj_seed)
+    evaluator = MCEvaluator(env, vectorized_returns=vectorized_returns)
+    evaluator.evaluate(policy, num_episodes)
+    return evaluator.return_counts, evaluator.return_means, evaluator.return_m2
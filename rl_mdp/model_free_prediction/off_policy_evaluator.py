@@ -0,0 +1,102 @@
+from abc import abstractmethod
+from typing import Iterator, Optional, Sequence, Tuple
+import numpy as np
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.model_free_prediction.abstract_evaluator import AbstractEvaluator
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.policy.tabular_policy import TabularPolicy
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+from rl_mdp.trajectory.trajectory_store import TrajectoryStore
+
+
+class OffPolicyEvaluator(AbstractEvaluator):
+    """
+    Base class of the evaluators that estimate V of target policies from logged episodes of a behaviour policy,
+    instead of simulating the target policies. The importance sampling ratios pi(a|s) / b(a|s) of all steps of a
+    chunk of episodes are gathered at once from the pi[s, a] arrays of all target policies, so a single pass over
+    the logged episodes evaluates many candidate policies.
+
+    A logged action that a target policy never takes gets ratio 0, which cuts off the rest of the episode for that
+    target. A logged action that the behaviour policy never takes raises a ValueError, since its ratio is undefined.
+    The estimates are only consistent if the behaviour policy takes every action the target policies take.
+    """
+    def __init__(self,
+                 env: AbstractMDP,
+                 behaviour_policy: AbstractPolicy,
+                 episodes: EpisodeBuffer | TrajectoryStore,
+                 chunk_steps: int = 1 << 20):
+        """
+        :param env: The mdp the episodes were generated on (used for |S|, |A| and the discount factor).
+        :param behaviour_policy: The policy that generated the episodes.
+        :param episodes: The logged episodes.
+        :param chunk_steps: Approximate number of (step, target policy) ratios held in memory at a time.
+        """
+        self.env = env
+        self.behaviour_probs = TabularPolicy.matrix_of(behaviour_policy, env.num_states, env.num_actions)
+        self.episodes = episodes
+        self.chunk_steps = chunk_steps
+        self.value_fun = np.zeros(self.env.num_states)    # Estimate of state-value function of the last target.
+        self.discounts = self.env.bootstrap_discounts()     # γ, or 0 for terminal successors.
+
+    def evaluate(self, policy: AbstractPolicy, num_episodes: Optional[int] = None) -> np.ndarray:
+        """
+        Estimates the value function of a target policy from the logged episodes.
+
+        :param policy: The target policy.
+        :param num_episodes: Number of logged episodes to use, defaults to all of them.
+        :return: The state-value function V(s) for the target policy.
+        """
+        self.value_fun = self.evaluate_many([policy], num_episodes)[0]
+        return self.value_fun.copy()
+
+    @abstractmethod
+    def evaluate_many(self, policies: Sequence[AbstractPolicy], num_episodes: Optional[int] = None) -> np.ndarray:
+        """
+        Estimates the value functions of several target policies in one pass over the logged episodes.
+
+        :param policies: The target policies.
+        :param num_episodes: Number of logged episodes to use, defaults to all of them.
+        :return: Array of shape (number of policies, |S|), row i is the estimate for policies[i].
+        """
+        pass
+
+    def _target_probs(self, policies: Sequence[AbstractPolicy]) -> np.ndarray:
+        """
+        :param policies: The target policies.
+        :return: Array of shape (number of policies, |S|, |A|) with the action probabilities of the policies.
+        """
+        num_states, num_actions = self.env.num_states, self.env.num_actions
+        return np.stack([TabularPolicy.matrix_of(policy, num_states, num_actions) for policy in policies])
+
+    def _iter_chunks(
+            self,
+            target_probs: np.ndarray,
+            num_episodes: Optional[int]
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Iterates over chunks of whole episodes together with their importance sampling ratios.
+
+        :param target_probs: Output of _target_probs.
+        :param num_episodes: Number of logged episodes to use, defaults to all of them.
+        :return: An iterator over tuples (offsets, states, rewards, final_states, ratios) where offsets are relative
+                 to the chunk and ratios has shape (number of policies, number of steps in the chunk).
+        """
+        num_episodes = len(self.episodes) if num_episodes is None else min(num_episodes, len(self.episodes))
+        offsets = np.asarray(self.episodes.offsets[:num_episodes + 1])
+        max_steps = max(self.chunk_steps // len(target_probs), 1)
+        start = 0
+        while start < num_episodes:
+            # At least one episode per chunk, otherwise as many as fit in max_steps.
+            stop = max(int(np.searchsorted(offsets, offsets[start] + max_steps, side="right")) - 1, start + 1)
+            stop = min(stop, num_episodes)
+            first, last = offsets[start], offsets[stop]
+            states = np.asarray(self.episodes.states[first:last], dtype=np.int64)
+            actions = np.asarray(self.episodes.actions[first:last], dtype=np.int64)
+            rewards = np.asarray(self.episodes.rewards[first:last], dtype=np.float64)
+            behaviour = self.behaviour_probs[states, actions]
+            if np.any(behaviour == 0):
+                raise ValueError("The logged episodes contain actions that the behaviour policy never takes.")
+            ratios = target_probs[:, states, actions] / behaviour
+            yield (offsets[start:stop + 1] - first, states, rewards,
+                   np.asarray(self.episodes.final_states[start:stop]), ratios)
+            start = stop
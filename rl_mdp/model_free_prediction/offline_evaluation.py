@@ -0,0 +1,26 @@
+from typing import Optional
+import numpy as np
+from rl_mdp.model_free_prediction.monte_carlo_evaluator import MCEvaluator
+from rl_mdp.model_free_prediction.td_evaluator import TDEvaluator
+from rl_mdp.model_free_prediction.td_lambda_evaluator import TDLambdaEvaluator
+from rl_mdp.trajectory.trajectory_store import TrajectoryStore
+
+
+def evaluate_offline(evaluator: MCEvaluator | TDEvaluator | TDLambdaEvaluator,
+                     store: TrajectoryStore,
+                     num_episodes: Optional[int] = None,
+                     chunk_steps: int = 1 << 20) -> np.ndarray:
+    """
+    Runs the updates of an evaluator over recorded episodes instead of simulating new ones, so one recording can be
+    replayed for different evaluators or different alpha / lambda settings.
+
+    :param evaluator: The evaluator whose updates are applied, its value function is reset first.
+    :param store: The trajectory store to stream the episodes from.
+    :param num_episodes: Number of episodes to use, defaults to all episodes in the store.
+    :param chunk_steps: Approximate number of steps read from disk at a time.
+    :return: The state-value function V(s) estimated from the recorded episodes.
+    """
+    evaluator.reset()
+    for states, _, rewards, final_state in store.iter_episodes(stop=num_episodes, chunk_steps=chunk_steps):
+        evaluator.update_from_episode(states, rewards, final_state)
+    return evaluator.value_fun.copy()
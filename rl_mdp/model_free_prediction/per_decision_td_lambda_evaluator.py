@@ -0,0 +1,63 @@
+from typing import Optional, Sequence
+import numpy as np
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.model_free_prediction.off_policy_evaluator import OffPolicyEvaluator
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+from rl_mdp.trajectory.trajectory_store import TrajectoryStore
+
+
+class PerDecisionTDLambdaEvaluator(OffPolicyEvaluator):
+    def __init__(self,
+                 env: AbstractMDP,
+                 behaviour_policy: AbstractPolicy,
+                 episodes: EpisodeBuffer | TrajectoryStore,
+                 alpha: float,
+                 lambd: float,
+                 chunk_steps: int = 1 << 20):
+        """
+        Initializes the off-policy TD(λ) Evaluator with per-decision importance sampling: every step is weighted
+        with its own ratio ρ_t = pi(a_t|s_t) / b(a_t|s_t) through the traces, e = ρ_t (γλ e + x_t), and V is
+        updated with V += α δ_t e where δ_t = r_t + γV(s_{t+1}) - V(s_t).
+
+        :param env: The mdp the episodes were generated on.
+        :param behaviour_policy: The policy that generated the episodes.
+        :param episodes: The logged episodes.
+        :param alpha: The step size.
+        :param lambd: The trace decay parameter (λ).
+        :param chunk_steps: Approximate number of (step, target policy) ratios held in memory at a time.
+        """
+        super().__init__(env, behaviour_policy, episodes, chunk_steps)
+        self.alpha = alpha
+        self.lambd = lambd
+
+    def evaluate_many(self, policies: Sequence[AbstractPolicy], num_episodes: Optional[int] = None) -> np.ndarray:
+        """
+        Estimates the value functions of several target policies in one pass over the logged episodes, the updates
+        of all target policies are applied together as rows of one array.
+
+        :param policies: The target policies.
+        :param num_episodes: Number of logged episodes to use, defaults to all of them.
+        :return: Array of shape (number of policies, |S|), row i is the estimate for policies[i].
+        """
+        target_probs = self._target_probs(policies)
+        discounts, decay = self.discounts, self.env.discount_factor * self.lambd
+        value_fun = np.zeros((len(policies), self.env.num_states))
+
+        for offsets, states, rewards, final_states, ratios in self._iter_chunks(target_probs, num_episodes):
+            for episode, (start, end) in enumerate(zip(offsets[:-1].tolist(), offsets[1:].tolist())):
+                episode_states = states[start:end]
+                # Traces can only be nonzero for states visited in the episode, so they are kept for those only.
+                visited, column_of = np.unique(episode_states, return_inverse=True)
+                traces = np.zeros((len(policies), len(visited)))
+                next_states = np.append(episode_states[1:], final_states[episode])
+                for t, (column, state, reward, next_state) in enumerate(zip(column_of.tolist(),
+                                                                            episode_states.tolist(),
+                                                                            rewards[start:end].tolist(),
+                                                                            next_states.tolist())):
+                    td_errors = reward + discounts[next_state] * value_fun[:, next_state] - value_fun[:, state]
+                    traces *= decay
+                    traces[:, column] += 1.0
+                    traces *= ratios[:, start + t, None]
+                    value_fun[:, visited] += (self.alpha * td_errors)[:, None] * traces
+        return value_fun
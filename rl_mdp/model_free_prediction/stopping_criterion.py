@@ -0,0 +1,44 @@
+from typing import Optional
+import numpy as np
+
+
+class StoppingCriterion:
+    """
+    Criterion for stopping an anytime evaluation before the episode budget is used up. The evaluation stops as soon
+    as any of the given conditions holds.
+    """
+    def __init__(self,
+                 max_delta: Optional[float] = None,
+                 max_standard_error: Optional[float] = None,
+                 time_budget: Optional[float] = None):
+        """
+        :param max_delta: Stop when max |ΔV| between two consecutive snapshots is below this value.
+        :param max_standard_error: Stop when the estimated standard error of V(s) is below this value for every
+                                   visited state. Requires an evaluator with running return statistics (MCEvaluator).
+        :param time_budget: Stop after this many wall-clock seconds.
+        """
+        if max_delta is None and max_standard_error is None and time_budget is None:
+            raise ValueError("At least one of max_delta, max_standard_error and time_budget must be given.")
+        self.max_delta = max_delta
+        self.max_standard_error = max_standard_error
+        self.time_budget = time_budget
+
+    def check(self, evaluator, max_delta: float, elapsed: float) -> Optional[str]:
+        """
+        :param evaluator: The evaluator being run.
+        :param max_delta: max |ΔV| since the previous snapshot.
+        :param elapsed: Wall-clock seconds since the evaluation started.
+        :return: The name of the condition that holds ("max_delta", "standard_error" or "time_budget"), or None.
+        """
+        if self.max_delta is not None and max_delta < self.max_delta:
+            return "max_delta"
+        if self.max_standard_error is not None:
+            standard_error = getattr(evaluator, "standard_error", None)
+            if standard_error is None:
+                raise ValueError(f"{type(evaluator).__name__} does not estimate the standard error of V(s).")
+            visited = evaluator.return_counts > 0
+            if visited.any() and np.all(standard_error[visited] < self.max_standard_error):
+                return "standard_error"
+        if self.time_budget is not None and elapsed >= self.time_budget:
+            return "time_budget"
+        return None
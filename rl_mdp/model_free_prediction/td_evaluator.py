@@ -1,41 +1,60 @@
+from typing import Optional
 import numpy as np
 from rl_mdp.mdp.abstract_mdp import AbstractMDP
-from rl_mdp.model_free_prediction.abstract_evaluator import AbstractEvaluator
+from rl_mdp.model_free_prediction.compiled import CompiledModel, kernel_seed, td_lambda_kernel
+from rl_mdp.model_free_prediction.episodic_evaluator import EpisodicEvaluator
 from rl_mdp.policy.abstract_policy import AbstractPolicy
 
 
-class TDEvaluator(AbstractEvaluator):
+class TDEvaluator(EpisodicEvaluator):
     def __init__(self,
                  env: AbstractMDP,
-                 alpha: float):
+                 alpha: float,
+                 compiled: bool = False,
+                 kernel_rng: Optional[np.random.Generator] = None):
         """
         Initializes the TD(0) Evaluator.
 
         :param env: A mdp object.
         :param alpha: The step size.
+        :param compiled: See EpisodicEvaluator.
+        :param kernel_rng: See EpisodicEvaluator.
         """
-        self.env = env
+        super().__init__(env, compiled, kernel_rng)
         self.alpha = alpha
-        self.value_fun = np.zeros(self.env.num_states)    # Estimate of state-value function.
+        self.discounts = self.env.bootstrap_discounts()     # γ, or 0 for terminal successors.
 
-    def evaluate(self, policy: AbstractPolicy, num_episodes: int) -> np.ndarray:
+    def _update_value_function(self, policy: AbstractPolicy) -> None:
         """
-        Perform the TD prediction algorithm.
-
+        Runs a single episode using the TD(0) method to update the value function.
         :param policy: A policy object that provides action probabilities for each state.
-        :param num_episodes: Number of episodes to run for estimating V(s).
-        :return: The state-value function V(s) for the associated policy.
         """
-        self.value_fun.fill(0)              # Reset value function.
+        states, _, rewards, final_state = self._generate_episode(policy)
+        self.update_from_episode(states, rewards, final_state)
 
-        for _ in range(num_episodes):
-            self._update_value_function(policy)
+    def _run_kernel(self, model: CompiledModel, num_episodes: int) -> None:
+        """
+        Runs TD(0) in the compiled TD(λ) kernel with λ = 0.
 
-        return self.value_fun.copy()
+        :param model: The arrays returned by compiled_model.
+        :param num_episodes: Number of episodes to run.
+        """
+        transition_cdf, rewards, policy_cdf, terminal_mask, start_state, max_steps = model
+        self.value_fun[:] = td_lambda_kernel(transition_cdf, rewards, policy_cdf, self.env.discount_factor,
+                                             terminal_mask, start_state, max_steps, self.alpha, 0.0, 0,
+                                             num_episodes, kernel_seed(self.kernel_rng), self.value_fun)
 
-    def _update_value_function(self, policy: AbstractPolicy) -> None:
+    def update_from_episode(self, states: np.ndarray, rewards: np.ndarray, final_state: int) -> None:
         """
-        Runs a single episode using the TD(0) method to update the value function.
-        :param policy: A policy object that provides action probabilities for each state.
+        Applies the TD(0) update for every step of an episode, in order.
+
+        :param states: The states visited in the episode.
+        :param rewards: The rewards received in the episode.
+        :param final_state: The state the episode ended in.
         """
-        pass
+        alpha, discounts = self.alpha, self.discounts
+        value_fun = self.value_fun
+        next_states = np.append(states[1:], final_state)
+        # Terminal successors have a zero discount, the final state of a truncated episode is bootstrapped from.
+        for state, reward, next_state in zip(states.tolist(), rewards.tolist(), next_states.tolist()):
+            value_fun[state] += alpha * (reward + discounts[next_state] * value_fun[next_state] - value_fun[state])
@@ -1,41 +1,68 @@
+from typing import List, Optional
 import numpy as np
 from rl_mdp.mdp.abstract_mdp import AbstractMDP
-from rl_mdp.model_free_prediction.abstract_evaluator import AbstractEvaluator
+from rl_mdp.model_free_prediction.compiled import TRACE_CODES, CompiledModel, kernel_seed, td_lambda_kernel
+from rl_mdp.model_free_prediction.episodic_evaluator import EpisodicEvaluator
 from rl_mdp.policy.abstract_policy import AbstractPolicy
 
 
-class TDLambdaEvaluator(AbstractEvaluator):
+class TDLambdaEvaluator(EpisodicEvaluator):
+    TRACE_TYPES = ("accumulating", "replacing", "dutch")
+
     def __init__(self,
                  env: AbstractMDP,
                  alpha: float,
-                 lambd: float):
+                 lambd: float,
+                 trace_type: str = "accumulating",
+                 sparse_traces: bool = False,
+                 trace_cutoff: float = 1e-6,
+                 compiled: bool = False,
+                 kernel_rng: Optional[np.random.Generator] = None):
         """
         Initializes the TD(λ) Evaluator.
 
         :param env: A mdp object.
         :param alpha: The step size.
         :param lambd: The trace decay parameter (λ).
+        :param trace_type: "accumulating" (e(s) += 1), "replacing" (e(s) = 1) or "dutch" (e(s) = (1 - α)e(s) + 1).
+        :param sparse_traces: If True, only the states whose trace is at least trace_cutoff are tracked and the
+                              γλ decay is applied lazily through a single scalar, so a step costs O(#active traces)
+                              instead of O(|S|).
+        :param trace_cutoff: Traces below this value are dropped in sparse mode, must be positive.
+        :param compiled: See EpisodicEvaluator.
+        :param kernel_rng: See EpisodicEvaluator.
         """
-        self.env = env
+        if trace_type not in self.TRACE_TYPES:
+            raise ValueError(f"Unknown trace type {trace_type}, expected one of {self.TRACE_TYPES}.")
+        if trace_cutoff <= 0:
+            # The lazy decay scale is rescaled once it drops below the cutoff, so it must stay positive.
+            raise ValueError(f"trace_cutoff must be positive, got {trace_cutoff}.")
+        super().__init__(env, compiled, kernel_rng)
         self.alpha = alpha
         self.lambd = lambd
-        self.value_fun = np.zeros(self.env.num_states)    # Estimate of state-value function.
+        self.trace_type = trace_type
+        self.sparse_traces = sparse_traces
+        self.trace_cutoff = trace_cutoff
+        self.discounts = self.env.bootstrap_discounts()     # γ, or 0 for terminal successors.
+        # In sparse mode the trace of state s is _trace_scale * eligibility_traces[s], and only the first
+        # _num_active entries of _active_states can have a nonzero trace.
         self.eligibility_traces = np.zeros(self.env.num_states)
+        self._trace_scale = 1.0
+        self._active_states = np.empty(self.env.num_states, dtype=np.int64)
+        self._num_active = 0
 
-    def evaluate(self, policy: AbstractPolicy, num_episodes: int) -> np.ndarray:
+    def _run_kernel(self, model: CompiledModel, num_episodes: int) -> None:
         """
-        Perform the TD prediction algorithm.
+        Runs TD(λ) in the compiled kernel.
 
-        :param policy: A policy object that provides action probabilities for each state.
-        :param num_episodes: Number of episodes to run for estimating V(s).
-        :return: The state-value function V(s) for the associated policy.
+        :param model: The arrays returned by compiled_model.
+        :param num_episodes: Number of episodes to run.
         """
-        self.value_fun.fill(0)              # Reset value function.
-
-        for _ in range(num_episodes):
-            self._update_value_function(policy)
-
-        return self.value_fun.copy()
+        transition_cdf, rewards, policy_cdf, terminal_mask, start_state, max_steps = model
+        self.value_fun[:] = td_lambda_kernel(transition_cdf, rewards, policy_cdf, self.env.discount_factor,
+                                             terminal_mask, start_state, max_steps, self.alpha, self.lambd,
+                                             TRACE_CODES[self.trace_type], num_episodes, kernel_seed(self.kernel_rng),
+                                             self.value_fun)
 
     def _update_value_function(self, policy: AbstractPolicy) -> None:
         """
@@ -43,4 +70,97 @@ class TDLambdaEvaluator(AbstractEvaluator):
 
         :param policy: A policy object that provides action probabilities for each state.
         """
-        pass
+        states, _, rewards, final_state = self._generate_episode(policy)
+        self.update_from_episode(states, rewards, final_state)
+
+    def update_from_episode(self, states: np.ndarray, rewards: np.ndarray, final_state: int) -> None:
+        """
+        Applies the online TD(λ) update for every step of an episode, in order.
+
+        :param states: The states visited in the episode.
+        :param rewards: The rewards received in the episode.
+        :param final_state: The state the episode ended in.
+        """
+        next_states = np.append(states[1:], final_state)
+        if self.sparse_traces:
+            self._update_sparse(states.tolist(), rewards.tolist(), next_states.tolist())
+        else:
+            self._update_dense(states.tolist(), rewards.tolist(), next_states.tolist())
+
+    def _update_dense(self, states: List[int], rewards: List[float], next_states: List[int]) -> None:
+        """
+        TD(λ) with a dense trace vector, every step touches all |S| traces.
+
+        :param states: The states visited in the episode.
+        :param rewards: The rewards received in the episode.
+        :param next_states: The successor of each state.
+        """
+        alpha, discounts = self.alpha, self.discounts
+        decay = self.env.discount_factor * self.lambd
+        value_fun, traces = self.value_fun, self.eligibility_traces
+        traces.fill(0)
+        for state, reward, next_state in zip(states, rewards, next_states):
+            td_error = reward + discounts[next_state] * value_fun[next_state] - value_fun[state]
+            traces *= decay
+            if self.trace_type == "accumulating":
+                traces[state] += 1.0
+            elif self.trace_type == "replacing":
+                traces[state] = 1.0
+            else:
+                traces[state] = (1.0 - alpha) * traces[state] + 1.0
+            value_fun += (alpha * td_error) * traces
+
+    def _update_sparse(self, states: List[int], rewards: List[float], next_states: List[int]) -> None:
+        """
+        TD(λ) with sparse traces, every step only touches the active traces.
+
+        :param states: The states visited in the episode.
+        :param rewards: The rewards received in the episode.
+        :param next_states: The successor of each state.
+        """
+        alpha, discounts = self.alpha, self.discounts
+        decay = self.env.discount_factor * self.lambd
+        value_fun, traces, active_states = self.value_fun, self.eligibility_traces, self._active_states
+        self._clear_sparse_traces()
+        for state, reward, next_state in zip(states, rewards, next_states):
+            td_error = reward + discounts[next_state] * value_fun[next_state] - value_fun[state]
+
+            # Lazy decay of all traces, folded into the stored values once the scale gets small.
+            self._trace_scale *= decay
+            if self._trace_scale < self.trace_cutoff:
+                self._rescale_sparse_traces()
+            scale = self._trace_scale
+
+            if traces[state] == 0.0:
+                active_states[self._num_active] = state
+                self._num_active += 1
+            if self.trace_type == "accumulating":
+                traces[state] += 1.0 / scale
+            elif self.trace_type == "replacing":
+                traces[state] = 1.0 / scale
+            else:
+                traces[state] = (1.0 - alpha) * traces[state] + 1.0 / scale
+
+            active = active_states[:self._num_active]
+            value_fun[active] += (alpha * td_error * scale) * traces[active]
+
+    def _rescale_sparse_traces(self) -> None:
+        """
+        Multiplies the pending decay into the stored traces, resets the scale to one and drops traces below the
+        cutoff.
+        """
+        active = self._active_states[:self._num_active]
+        traces = self.eligibility_traces[active] * self._trace_scale
+        keep = traces >= self.trace_cutoff
+        self.eligibility_traces[active] = np.where(keep, traces, 0.0)
+        self._num_active = np.count_nonzero(keep)
+        self._active_states[:self._num_active] = active[keep]
+        self._trace_scale = 1.0
+
+    def _clear_sparse_traces(self) -> None:
+        """
+        Sets all sparse traces to zero in O(#active traces).
+        """
+        self.eligibility_traces[self._active_states[:self._num_active]] = 0.0
+        self._num_active = 0
+        self._trace_scale = 1.0
@@ -0,0 +1,90 @@
+from typing import Optional, Sequence
+import numpy as np
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+
+
+class TDLambdaSweep:
+    def __init__(self,
+                 env: AbstractMDP,
+                 alphas: Sequence[float],
+                 lambdas: Sequence[float]):
+        """
+        Initializes a sweep of TD(λ) over the grid alphas x lambdas. Every episode is generated once and used to
+        update the value functions of all configurations at the same time, with accumulating traces.
+        λ = 0 gives TD(0) and λ = 1 gives constant-α every-visit Monte Carlo (in its online form).
+
+        :param env: A mdp object.
+        :param alphas: The step sizes to sweep.
+        :param lambdas: The trace decay parameters to sweep.
+        """
+        self.env = env
+        alpha_grid, lambda_grid = np.meshgrid(np.asarray(alphas, dtype=np.float64),
+                                              np.asarray(lambdas, dtype=np.float64), indexing="ij")
+        self.configs = np.column_stack((alpha_grid.ravel(), lambda_grid.ravel()))   # Rows of (alpha, lambda).
+        self.value_fun = np.zeros((len(self.configs), self.env.num_states))       # One V(s) per configuration.
+        self.discounts = self.env.bootstrap_discounts()     # γ, or 0 for terminal successors.
+        self.eligibility_traces = np.zeros_like(self.value_fun)
+        self.rmse: Optional[np.ndarray] = None
+        self.buffer = EpisodeBuffer()
+
+    def run(self,
+            policy: AbstractPolicy,
+            num_episodes: int,
+            reference: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Runs the sweep.
+
+        :param policy: A policy object that provides action probabilities for each state.
+        :param num_episodes: Number of episodes shared by all configurations.
+        :param reference: Optional reference value function (e.g. from ModelBasedEvaluator). If given, the RMSE of
+                          every configuration against it is stored in `rmse`.
+        :return: Array of shape (number of configurations, |S|), row i is the estimate of configuration configs[i].
+        """
+        self.reset()
+        for _ in range(num_episodes):
+            self.buffer.clear()
+            self.buffer.record(self.env, policy)
+            states, _, rewards, final_state = self.buffer.episode(0)
+            self.update_from_episode(states, rewards, final_state)
+
+        if reference is not None:
+            self.rmse = np.sqrt(np.mean((self.value_fun - reference) ** 2, axis=1))
+        return self.value_fun.copy()
+
+    def reset(self) -> None:
+        """
+        Resets the value functions of all configurations.
+        """
+        self.value_fun.fill(0)
+        self.rmse = None
+
+    def update_from_episode(self, states: np.ndarray, rewards: np.ndarray, final_state: int) -> None:
+        """
+        Applies the online TD(λ) update of every configuration for every step of an episode. Traces can only be
+        nonzero for states visited earlier in the episode, so each step only touches those columns.
+
+        :param states: The states visited in the episode.
+        :param rewards: The rewards received in the episode.
+        :param final_state: The state the episode ended in.
+        """
+        gamma = self.env.discount_factor
+        alphas, decays = self.configs[:, 0], gamma * self.configs[:, 1]
+        value_fun, traces = self.value_fun, self.eligibility_traces
+
+        visited, column_of = np.unique(states, return_inverse=True)
+        columns = np.empty(0, dtype=np.int64)
+        seen = np.zeros(len(visited), dtype=bool)
+        next_states = np.append(states[1:], final_state)
+        for column, state, reward, next_state in zip(column_of.tolist(), states.tolist(), rewards.tolist(),
+                                                     next_states.tolist()):
+            if not seen[column]:
+                seen[column] = True
+                columns = visited[seen]
+            td_errors = reward + self.discounts[next_state] * value_fun[:, next_state] - value_fun[:, state]
+            traces[:, columns] *= decays[:, None]
+            traces[:, state] += 1.0
+            value_fun[:, columns] += (alphas * td_errors)[:, None] * traces[:, columns]
+
+        traces[:, visited] = 0.0
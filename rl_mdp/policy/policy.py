@@ -1,22 +1,31 @@
-from typing import List, Optional
+from types import MappingProxyType
+from typing import List, Mapping, Optional
 import numpy as np
 from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.sampling.alias_table import AliasTable
+from rl_mdp.sampling.rng import RngMixin
 
 
-class Policy(AbstractPolicy):
+class Policy(RngMixin, AbstractPolicy):
     """
     This class acts as a wrapper that maps states to a probability vector for each action.
     In case of a deterministic policy we would have that one action gets probability one.
     """
-    def __init__(self, policy_mapping: Optional[np.ndarray] = None, num_actions: Optional[int] = None):
+    def __init__(self,
+                 policy_mapping: Optional[np.ndarray] = None,
+                 num_actions: Optional[int] = None,
+                 rng: Optional[np.random.Generator] = None):
         """
         Initializes a simple (stochastic) policy.
 
         :param policy_mapping: A NumPy array where each element represents a deterministic action for each state.
                                This will be converted to a stochastic policy where one action has probability 1.
         :param num_actions: Number of possible actions (required if policy_mapping is provided).
+        :param rng: Generator for the random stream of this policy. Defaults to the shared generator, see RngMixin.
         """
-        self.action_dist = {}  # Dictionary to store state-action probability distributions
+        self._action_dist = {}  # Dictionary to store state-action probability distributions
+        self._alias_tables = {}  # Lazily built alias tables of action_dist, invalidated when a state is changed.
+        self.rng = rng
 
         if policy_mapping is not None:
             if num_actions is None:
@@ -31,9 +40,12 @@ class Policy(AbstractPolicy):
         :param state: The state for which an action should be sampled.
         :return: The sampled action.
         """
-        action_probabilities = self._action_probabilities(state)
-        # Implicit assumption that actions are represented as 0, 1, 2, ..., |A|!
-        return np.random.choice(len(action_probabilities), p=action_probabilities)
+        alias_table = self._alias_tables.get(state)
+        if alias_table is None:
+            # Implicit assumption that actions are represented as 0, 1, 2, ..., |A|!
+            alias_table = AliasTable(self._action_probabilities(state))
+            self._alias_tables[state] = alias_table
+        return alias_table.sample(self._next_uniform())
 
     def set_action_probabilities(self, state: int, action_probabilities: List[float]) -> None:
         """
@@ -44,7 +56,16 @@ class Policy(AbstractPolicy):
         """
         if abs(sum(action_probabilities) - 1.0) > 1e-6:
             raise ValueError("The action probabilities must sum to 1.")
-        self.action_dist[state] = action_probabilities
+        self._action_dist[state] = action_probabilities
+        self._alias_tables.pop(state, None)
+
+    @property
+    def action_dist(self) -> Mapping[int, List[float]]:
+        """
+        :return: A read-only view of the action probabilities of each state. Do not modify the lists in place, use
+                 set_action_probabilities instead, which also invalidates the cached alias table of the state.
+        """
+        return MappingProxyType(self._action_dist)
 
     def action_prob(self, state: int, action: int) -> float:
         """
@@ -62,8 +83,8 @@ class Policy(AbstractPolicy):
         :return: A list representing the probability distribution over actions for the given state.
         :raises ValueError: If the state does not have action probabilities set.
         """
-        if state in self.action_dist:
-            return self.action_dist[state]
+        if state in self._action_dist:
+            return self._action_dist[state]
         else:
             raise ValueError(f"No action probabilities defined for state {state}.")
 
@@ -75,6 +96,6 @@ class Policy(AbstractPolicy):
         :return: A string representation of the policy.
         """
         policy_str = "Policy:\n"
-        for state, action_probs in self.action_dist.items():
+        for state, action_probs in self._action_dist.items():
             policy_str += f"  State {state}: {action_probs}\n"
-        return policy_str if self.action_dist else "Policy: No action probabilities defined."
+        return policy_str if self._action_dist else "Policy: No action probabilities defined."
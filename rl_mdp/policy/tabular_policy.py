@@ -0,0 +1,210 @@
+from typing import List, Optional
+import numpy as np
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.policy.policy import Policy
+from rl_mdp.sampling.alias_table import AliasTable
+from rl_mdp.sampling.inverse_cdf import build_offset_cdf, sample_rows
+from rl_mdp.sampling.rng import RngMixin
+
+
+class TabularPolicy(RngMixin, AbstractPolicy):
+    """
+    A (stochastic) policy stored as a dense matrix pi[s, a] = pi(a|s).
+    States and actions are assumed to be represented as 0, 1, 2, ..., |S| - 1 and |A| - 1.
+    """
+    def __init__(self, probabilities: np.ndarray, rng: Optional[np.random.Generator] = None):
+        """
+        Initializes the policy from a matrix of action probabilities.
+
+        :param probabilities: A NumPy array of shape (|S|, |A|) where every row sums to 1.
+        :param rng: Generator for the random stream of this policy. Defaults to the shared generator, see RngMixin.
+        """
+        probabilities = np.array(probabilities, dtype=np.float64)
+        if probabilities.ndim != 2:
+            raise ValueError(f"Expected an array of shape (|S|, |A|), got {probabilities.shape}.")
+        self._validate(probabilities)
+        self._probabilities = probabilities
+        self._cdf: Optional[np.ndarray] = None     # Lazily built offset cdf for sample_actions().
+        self._indptr = np.arange(0, probabilities.size + 1, probabilities.shape[1])    # Rows of the flat matrix.
+        self._alias_tables: List[Optional[AliasTable]] = [None] * probabilities.shape[0]
+        self.rng = rng
+
+    @classmethod
+    def from_policy(cls, policy: Policy, num_states: int, num_actions: int) -> "TabularPolicy":
+        """
+        Converts a Policy into a TabularPolicy.
+
+        :param policy: The policy to convert, it must define action probabilities for every state.
+        :param num_states: Number of states.
+        :param num_actions: Number of actions.
+        :return: A TabularPolicy with the same action probabilities.
+        """
+        missing = [state for state in range(num_states) if state not in policy.action_dist]
+        if missing:
+            raise ValueError(f"No action probabilities defined for states {missing}.")
+        probabilities = np.array([policy.action_dist[state] for state in range(num_states)], dtype=np.float64)
+        if probabilities.shape != (num_states, num_actions):
+            raise ValueError(f"Expected {num_actions} action probabilities for every state.")
+        return cls(probabilities)
+
+    @classmethod
+    def from_mapping(cls, policy_mapping: np.ndarray, num_actions: int) -> "TabularPolicy":
+        """
+        Creates a deterministic policy from an array that maps each state to an action.
+
+        :param policy_mapping: A NumPy array where each element represents a deterministic action for each state.
+        :param num_actions: Number of possible actions.
+        :return: A TabularPolicy where the mapped action gets probability one.
+        """
+        policy_mapping = np.asarray(policy_mapping, dtype=np.int64)
+        probabilities = np.zeros((len(policy_mapping), num_actions))
+        probabilities[np.arange(len(policy_mapping)), policy_mapping] = 1.0
+        return cls(probabilities)
+
+    @classmethod
+    def uniform(cls, num_states: int, num_actions: int) -> "TabularPolicy":
+        """
+        Creates the uniform random policy.
+
+        :param num_states: Number of states.
+        :param num_actions: Number of actions.
+        :return: A TabularPolicy where every action has probability 1 / |A|.
+        """
+        return cls(np.full((num_states, num_actions), 1.0 / num_actions))
+
+    def to_policy(self) -> Policy:
+        """
+        :return: A Policy with the same action probabilities.
+        """
+        policy = Policy()
+        policy._action_dist = dict(enumerate(self._probabilities.tolist()))    # Rows were validated already.
+        return policy
+
+    def to_mapping(self) -> np.ndarray:
+        """
+        :return: An array mapping each state to its action, only defined for deterministic policies.
+        """
+        if not np.all(self._probabilities.max(axis=1) == 1.0):
+            raise ValueError("Only a deterministic policy can be converted to a policy mapping.")
+        return self._probabilities.argmax(axis=1)
+
+    def sample_action(self, state: int) -> int:
+        """
+        Samples an action from the policy given the current state.
+
+        :param state: The state for which an action should be sampled.
+        :return: The sampled action.
+        """
+        alias_table = self._alias_tables[state]
+        if alias_table is None:
+            alias_table = AliasTable(self._probabilities[state])
+            self._alias_tables[state] = alias_table
+        return alias_table.sample(self._next_uniform())
+
+    def sample_actions(self, states: np.ndarray, uniforms: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Samples an action for every state in a batch using inverse-CDF sampling.
+
+        :param states: Array of states.
+        :param uniforms: Optional uniform random numbers in [0, 1), one per state. Drawn if not given.
+        :return: Array with the sampled actions.
+        """
+        if self._cdf is None:
+            self._cdf = build_offset_cdf(self._probabilities.ravel(), self._indptr)
+        if uniforms is None:
+            uniforms = self._rng.random(len(states))
+        states = np.asarray(states, dtype=np.int64)
+        return sample_rows(self._cdf, self._indptr, states, uniforms) - states * self._probabilities.shape[1]
+
+    def action_probs(self, states: np.ndarray) -> np.ndarray:
+        """
+        :param states: Array of states.
+        :return: Array of shape (len(states), |A|) with the action probabilities of each state.
+        """
+        return self._probabilities[states]
+
+    def set_action_probabilities(self, state: int, action_probabilities: List[float]) -> None:
+        """
+        Sets the action probabilities for a given state in the policy.
+
+        :param state: The state for which the action probabilities should be set.
+        :param action_probabilities: A list representing the probability distribution over actions.
+        :raises ValueError: If the list does not have |A| entries or is not a probability distribution.
+        """
+        row = np.asarray(action_probabilities, dtype=np.float64)
+        if row.shape != (self.num_actions,):
+            raise ValueError(f"Expected {self.num_actions} action probabilities, got an array of shape {row.shape}.")
+        self._validate(row[None, :])
+        self._probabilities[state] = row
+        self._cdf = None
+        self._alias_tables[state] = None
+
+    def action_prob(self, state: int, action: int) -> float:
+        """
+        :param state:
+        :param action:
+        :return: Gets the probability of an action `a` given the state `s` pi(a|s).
+        """
+        return self._probabilities[state, action]
+
+    @staticmethod
+    def matrix_of(policy: AbstractPolicy, num_states: int, num_actions: int) -> np.ndarray:
+        """
+        :param policy: A policy object, policies other than Policy and TabularPolicy are queried through
+                       action_prob().
+        :param num_states: Number of states.
+        :param num_actions: Number of actions.
+        :return: The (|S|, |A|) matrix pi[s, a] of the policy.
+        """
+        if isinstance(policy, TabularPolicy):
+            return policy.matrix
+        if isinstance(policy, Policy):
+            return TabularPolicy.from_policy(policy, num_states, num_actions).matrix
+        return np.array([[policy.action_prob(s, a) for a in range(num_actions)] for s in range(num_states)])
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        :return: The (|S|, |A|) matrix pi[s, a], e.g. for use in matrix algebra. Do not modify it in place, use
+                 set_action_probabilities instead.
+        """
+        return self._probabilities
+
+    @property
+    def num_states(self) -> int:
+        """
+        :return: The number of states.
+        """
+        return self._probabilities.shape[0]
+
+    @property
+    def num_actions(self) -> int:
+        """
+        :return: The number of actions.
+        """
+        return self._probabilities.shape[1]
+
+    @staticmethod
+    def _validate(probabilities: np.ndarray) -> None:
+        """
+        Checks that every row of the matrix is a probability distribution.
+
+        :param probabilities: A (n, |A|) matrix.
+        :raises ValueError: If a row has negative entries or does not sum to 1.
+        """
+        if np.any(probabilities < 0.0):
+            raise ValueError("The action probabilities must be non-negative.")
+        if np.any(np.abs(probabilities.sum(axis=1) - 1.0) > 1e-6):
+            raise ValueError("The action probabilities must sum to 1.")
+
+    def __str__(self) -> str:
+        """
+        Returns a string representation of the policy object, showing the action probability distributions
+        for each state.
+
+        :return: A string representation of the policy.
+        """
+        policy_str = "Policy:\n"
+        for state, action_probs in enumerate(self._probabilities.tolist()):
+            policy_str += f"  State {state}: {action_probs}\n"
+        return policy_str
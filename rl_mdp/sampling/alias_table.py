@@ -0,0 +1,54 @@
+from typing import Optional
+import numpy as np
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table for drawing from a fixed discrete distribution in O(1) per draw.
+    Building the table costs O(k) for a distribution with k nonzero probabilities.
+    """
+
+    def __init__(self, probabilities: np.ndarray, outcomes: Optional[np.ndarray] = None):
+        """
+        Builds the alias table.
+
+        :param probabilities: Probability vector, zero entries are dropped.
+        :param outcomes: Outcome associated with each probability, defaults to 0, 1, ..., len(probabilities) - 1.
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if outcomes is None:
+            outcomes = np.arange(len(probabilities))
+        support = np.flatnonzero(probabilities > 0)
+        if len(support) == 0:
+            raise ValueError("Cannot build an alias table for a distribution without positive probabilities.")
+
+        n = len(support)
+        scaled = (probabilities[support] * (n / probabilities[support].sum())).tolist()
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        # Whatever is left over has probability 1 up to round-off.
+
+        mapped = outcomes[support].tolist()
+        self._n = n
+        self._prob = prob
+        self._outcomes = mapped
+        self._alias = [mapped[i] for i in alias]
+
+    def sample(self, uniform: float) -> int:
+        """
+        Draws an outcome using a single uniform random number.
+
+        :param uniform: A uniform random number in [0, 1).
+        :return: The sampled outcome.
+        """
+        x = uniform * self._n
+        i = int(x)
+        return self._outcomes[i] if x - i < self._prob[i] else self._alias[i]
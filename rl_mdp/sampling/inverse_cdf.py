@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def build_offset_cdf(data: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    """
+    Builds one flat, globally sorted cumulative distribution for many probability rows stored in CSR layout.
+
+    Entry j of row r holds r + (cumulative probability of row r up to and including entry j), normalized so that
+    each row ends exactly at r + 1. Because every row lives in its own interval [r, r + 1], a single
+    np.searchsorted call can sample from many different rows at once.
+
+    :param data: Flat array with the probabilities of all rows.
+    :param indptr: Row pointer array of length (number of rows + 1), row r is data[indptr[r]:indptr[r + 1]].
+    :return: The offset cumulative distribution, same shape as data.
+    """
+    counts = np.diff(indptr)
+    cumulative = np.cumsum(data)
+    row_start = np.concatenate(([0.0], cumulative))[indptr[:-1]]
+    row_total = np.concatenate(([0.0], cumulative))[indptr[1:]] - row_start
+    row_ids = np.repeat(np.arange(len(counts), dtype=np.float64), counts)
+    return (cumulative - np.repeat(row_start, counts)) / np.repeat(row_total, counts) + row_ids
+
+
+def sample_rows(offset_cdf: np.ndarray, indptr: np.ndarray, rows: np.ndarray, uniforms: np.ndarray) -> np.ndarray:
+    """
+    Inverse-CDF sampling of one entry from each of the requested rows.
+
+    :param offset_cdf: Output of build_offset_cdf.
+    :param indptr: Row pointer array that was used to build offset_cdf.
+    :param rows: Array of row indices to sample from.
+    :param uniforms: Array of uniform random numbers in [0, 1), one per row.
+    :return: Array of positions into the flat data array, one per row.
+    """
+    # Rows end exactly at r + 1, but r + u can round up to r + 1 for large r, which would select the trailing
+    # entries of the row even if they have probability zero. Keep the target just below the end of the row.
+    targets = np.minimum(rows + uniforms, np.nextafter(rows + 1.0, rows))
+    positions = np.searchsorted(offset_cdf, targets, side="right")
+    # Guard against round-off pushing a sample just outside its row.
+    return np.clip(positions, indptr[rows], indptr[rows + 1] - 1)
@@ -0,0 +1,94 @@
+from typing import Callable, List, Optional
+import numpy as np
+
+_shared_rng = np.random.default_rng()
+
+
+def shared_rng() -> np.random.Generator:
+    """
+    Returns the generator shared by MDPs and policies that draw random numbers.
+
+    :return: The shared np.random.Generator.
+    """
+    return _shared_rng
+
+
+def seed_shared_rng(seed: Optional[int | np.random.SeedSequence] = None) -> None:
+    """
+    Re-seeds the shared generator in place, so objects that already hold a reference to it are affected as well.
+
+    :param seed: A seed or SeedSequence, fresh entropy is used if None.
+    """
+    _shared_rng.bit_generator.state = np.random.PCG64(seed).state
+
+
+class UniformStream:
+    """
+    Serves uniform random numbers one at a time from blocks drawn with a single vectorized call, which is much
+    cheaper than calling the generator once per number.
+    """
+    def __init__(self, rng: np.random.Generator, block_size: int = 8192):
+        """
+        :param rng: The generator to draw the blocks from.
+        :param block_size: Number of uniforms drawn per block.
+        """
+        self._rng = rng
+        self._block_size = block_size
+        self._block: List[float] = []
+        self._position = 0
+
+    def next(self) -> float:
+        """
+        :return: The next uniform random number in [0, 1).
+        """
+        position = self._position
+        if position == len(self._block):
+            self._block = self._rng.random(self._block_size).tolist()
+            position = 0
+        self._position = position + 1
+        return self._block[position]
+
+
+class RngMixin:
+    """
+    Gives an MDP or policy its own random stream. Without an explicit generator the object draws from the shared
+    generator (one call per number, so seed_shared_rng takes effect immediately). With its own generator, uniforms
+    are drawn in blocks through a UniformStream, and every (env, policy) pair can carry an independent stream.
+    """
+    _rng: np.random.Generator
+    _uses_shared_rng: bool
+    _next_uniform: Callable[[], float]
+
+    @property
+    def rng(self) -> np.random.Generator:
+        """
+        :return: The generator this object draws from.
+        """
+        return self._rng
+
+    @rng.setter
+    def rng(self, rng: Optional[np.random.Generator]) -> None:
+        """
+        :param rng: The generator to draw from, or None to use the shared generator.
+        """
+        self._uses_shared_rng = rng is None
+        self._rng = shared_rng() if rng is None else rng
+        self._next_uniform = self._rng.random if rng is None else UniformStream(rng).next
+
+    def __getstate__(self) -> dict:
+        """
+        :return: The attributes to pickle, without the (rebuilt on unpickling) uniform source.
+        """
+        state = self.__dict__.copy()
+        state.pop("_next_uniform", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restores a pickled object, e.g. in a worker process. A copy that used the shared generator draws from the
+        shared generator of the process it is restored in, so that worker processes can be seeded independently.
+
+        :param state: The pickled attributes.
+        """
+        self.__dict__.update(state)
+        self.rng = None if self._uses_shared_rng else self._rng
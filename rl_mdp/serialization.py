@@ -0,0 +1,125 @@
+import json
+import os
+from typing import Optional
+import numpy as np
+from scipy import sparse
+from rl_mdp.mdp.dense_reward_function import DenseRewardFunction
+from rl_mdp.mdp.dense_transition_function import DenseTransitionFunction
+from rl_mdp.mdp.mdp import MDP
+from rl_mdp.mdp.sparse_mdp import SparseMDP
+from rl_mdp.mdp.sparse_transition_function import SparseTransitionFunction
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.policy.tabular_policy import TabularPolicy
+
+# An MDP or policy is stored as a directory with one .npy file per array plus a JSON metadata file. Loading
+# memory-maps the arrays, so worker processes that load the same directory share one physical copy through the
+# page cache instead of each holding (or unpickling) their own.
+METADATA_FILE = "metadata.json"
+
+
+def save_mdp(env: MDP, path: str) -> None:
+    """
+    Saves an MDP (or SparseMDP) including its discount factor, terminal states, start state and max_episode_steps.
+
+    :param env: The MDP to save.
+    :param path: Directory to save to, created if it does not exist.
+    """
+    os.makedirs(path, exist_ok=True)
+    transition_function = env.transition_function
+    if isinstance(transition_function, SparseTransitionFunction):
+        arrays = {"indptr": transition_function.matrix.indptr,
+                  "indices": transition_function.matrix.indices,
+                  "data": transition_function.matrix.data}
+    else:
+        arrays = {"probabilities": transition_function.probabilities}
+    arrays["rewards"] = env.reward_function.rewards
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+
+    metadata = {
+        "type": "SparseMDP" if isinstance(env, SparseMDP) else "MDP",
+        "num_states": env.num_states,
+        "num_actions": env.num_actions,
+        "discount_factor": env.discount_factor,
+        "terminal_states": env.terminal_states.tolist(),
+        "start_state": env.start_state,
+        "max_episode_steps": env.max_episode_steps,
+    }
+    with open(os.path.join(path, METADATA_FILE), "w") as file:
+        json.dump(metadata, file)
+
+
+def load_mdp(path: str,
+             mmap: bool = True,
+             rng: Optional[np.random.Generator] = None,
+             validate: bool = True) -> MDP:
+    """
+    Loads an MDP saved with save_mdp.
+
+    :param path: Directory of the saved MDP.
+    :param mmap: If True the arrays are memory-mapped read-only instead of read into memory.
+    :param rng: Generator for the random stream of the MDP, see RngMixin.
+    :param validate: If False, the transition probabilities are not checked (row sums, canonical CSR format), so
+                     that loading a memory-mapped MDP does not read every page of it. Only for trusted files
+                     written by save_mdp.
+    :return: An MDP or SparseMDP, matching the saved type. If memory-mapped, its source_path is set to path.
+    """
+    with open(os.path.join(path, METADATA_FILE)) as file:
+        metadata = json.load(file)
+    mmap_mode = "r" if mmap else None
+    num_states, num_actions = metadata["num_states"], metadata["num_actions"]
+
+    if os.path.exists(os.path.join(path, "probabilities.npy")):
+        transition_function = DenseTransitionFunction(np.load(os.path.join(path, "probabilities.npy"),
+                                                              mmap_mode=mmap_mode), validate=validate)
+    else:
+        indptr, indices, data = (np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                                 for name in ("indptr", "indices", "data"))
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(num_states * num_actions, num_states))
+        transition_function = SparseTransitionFunction(matrix, num_actions, validate=validate)
+    reward_function = DenseRewardFunction(np.load(os.path.join(path, "rewards.npy"), mmap_mode=mmap_mode))
+
+    mdp_class = SparseMDP if metadata["type"] == "SparseMDP" else MDP
+    mdp = mdp_class(
+        states=range(num_states),
+        actions=range(num_actions),
+        transition_function=transition_function,
+        reward_function=reward_function,
+        discount_factor=metadata["discount_factor"],
+        start_state=metadata["start_state"],
+        rng=rng,
+        terminal_states=metadata["terminal_states"],
+        max_episode_steps=metadata["max_episode_steps"]
+    )
+    if mmap:
+        mdp.source_path = path
+    return mdp
+
+
+def save_policy(policy: AbstractPolicy, path: str, num_states: int, num_actions: int) -> None:
+    """
+    Saves a policy as its (|S|, |A|) matrix of action probabilities.
+
+    :param policy: A Policy or TabularPolicy, other policies are queried through action_prob().
+    :param path: Directory to save to, created if it does not exist.
+    :param num_states: Number of states.
+    :param num_actions: Number of actions.
+    """
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "probabilities.npy"), TabularPolicy.matrix_of(policy, num_states, num_actions))
+    with open(os.path.join(path, METADATA_FILE), "w") as file:
+        json.dump({"type": "TabularPolicy", "num_states": num_states, "num_actions": num_actions}, file)
+
+
+def load_policy(path: str, mmap: bool = True, rng: Optional[np.random.Generator] = None) -> TabularPolicy:
+    """
+    Loads a policy saved with save_policy, use TabularPolicy.to_policy() for a dictionary based Policy.
+
+    :param path: Directory of the saved policy.
+    :param mmap: If True the file is memory-mapped while reading it. The policy keeps its own (validated) copy
+                 of the |S| x |A| matrix.
+    :param rng: Generator for the random stream of the policy, see RngMixin.
+    :return: A TabularPolicy.
+    """
+    probabilities = np.load(os.path.join(path, "probabilities.npy"), mmap_mode="r" if mmap else None)
+    return TabularPolicy(probabilities, rng=rng)
@@ -0,0 +1,143 @@
+from typing import Tuple
+import numpy as np
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+
+
+class EpisodeBuffer:
+    """
+    Columnar storage for episodes: flat state, action and reward arrays plus an index of episode offsets.
+    The arrays are preallocated, grow geometrically and keep their memory when the buffer is cleared, so a buffer
+    can be reused across episodes without allocating.
+
+    Episode i consists of steps offsets[i]:offsets[i + 1], and final_states[i] is the state the episode ended in.
+    """
+    def __init__(self, capacity: int = 1024, reward_dtype: type = np.float64):
+        """
+        Initializes an empty buffer.
+
+        :param capacity: Initial number of steps that fit in the buffer.
+        :param reward_dtype: Data type of the rewards, np.float32 or np.float64.
+        """
+        capacity = max(capacity, 1)
+        self.states = np.empty(capacity, dtype=np.int32)
+        self.actions = np.empty(capacity, dtype=np.int32)
+        self.rewards = np.empty(capacity, dtype=reward_dtype)
+        self.offsets = np.zeros(17, dtype=np.int64)
+        self.final_states = np.empty(16, dtype=np.int32)
+        self._num_steps = 0
+        self._num_episodes = 0
+
+    def clear(self) -> None:
+        """
+        Removes all episodes, keeping the allocated memory.
+        """
+        self._num_steps = 0
+        self._num_episodes = 0
+
+    def append(self, state: int, action: int, reward: float) -> None:
+        """
+        Appends a single step to the current episode.
+
+        :param state: The state.
+        :param action: The action taken in the state.
+        :param reward: The reward received.
+        """
+        if self._num_steps == len(self.states):
+            self._grow_steps(self._num_steps + 1)
+        self.states[self._num_steps] = state
+        self.actions[self._num_steps] = action
+        self.rewards[self._num_steps] = reward
+        self._num_steps += 1
+
+    def end_episode(self, final_state: int) -> None:
+        """
+        Closes the current episode.
+
+        :param final_state: The state in which the episode ended.
+        """
+        if self._num_episodes == len(self.final_states):
+            self.final_states = self._resized(self.final_states, 2 * len(self.final_states))
+            self.offsets = self._resized(self.offsets, len(self.final_states) + 1)
+        self.final_states[self._num_episodes] = final_state
+        self._num_episodes += 1
+        self.offsets[self._num_episodes] = self._num_steps
+
+    def record(self, env: AbstractMDP, policy: AbstractPolicy) -> int:
+        """
+        Generates an episode following the policy and appends it to the buffer.
+
+        :param env: An environment object.
+        :param policy: A policy object.
+        :return: The index of the recorded episode.
+        """
+        states, actions, rewards = self.states, self.actions, self.rewards
+        t = self._num_steps
+        state = env.reset()
+        done = False
+
+        while not done:
+            action = policy.sample_action(state)
+            next_state, reward, done = env.step(action)
+            if t == len(states):
+                self._num_steps = t
+                self._grow_steps(t + 1)
+                states, actions, rewards = self.states, self.actions, self.rewards
+            states[t] = state
+            actions[t] = action
+            rewards[t] = reward
+            t += 1
+            state = next_state
+
+        self._num_steps = t
+        self.end_episode(state)
+        return self._num_episodes - 1
+
+    def episode(self, index: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        Returns an episode as views into the buffer. The views are only valid until the buffer grows or is cleared.
+
+        :param index: Index of the episode.
+        :return: A tuple (states, actions, rewards, final_state).
+        """
+        if not 0 <= index < self._num_episodes:
+            raise IndexError(f"Episode {index} is not in the buffer.")
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.states[start:end], self.actions[start:end], self.rewards[start:end], int(self.final_states[index])
+
+    @property
+    def num_steps(self) -> int:
+        """
+        :return: Total number of steps stored in the buffer.
+        """
+        return self._num_steps
+
+    def __len__(self) -> int:
+        """
+        :return: Number of (closed) episodes stored in the buffer.
+        """
+        return self._num_episodes
+
+    def _grow_steps(self, min_capacity: int) -> None:
+        """
+        Grows the step arrays geometrically to hold at least min_capacity steps.
+
+        :param min_capacity: Required capacity.
+        """
+        capacity = len(self.states)
+        while capacity < min_capacity:
+            capacity *= 2
+        self.states = self._resized(self.states, capacity)
+        self.actions = self._resized(self.actions, capacity)
+        self.rewards = self._resized(self.rewards, capacity)
+
+    @staticmethod
+    def _resized(array: np.ndarray, capacity: int) -> np.ndarray:
+        """
+        :param array: Array to copy.
+        :param capacity: New length.
+        :return: A new array of the given length starting with the contents of the old one.
+        """
+        resized = np.empty(capacity, dtype=array.dtype)
+        resized[:len(array)] = array
+        return resized
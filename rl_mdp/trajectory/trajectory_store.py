@@ -0,0 +1,180 @@
+import json
+import os
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+
+# Column name -> data type of the flat binary files in a trajectory store directory.
+COLUMNS = {
+    "states": np.int32,
+    "actions": np.int32,
+    "rewards": np.float64,
+    "final_states": np.int32,
+    "offsets": np.int64,
+}
+METADATA_FILE = "metadata.json"
+
+
+class TrajectoryWriter:
+    """
+    Writes episodes incrementally to a trajectory store directory: one flat binary file per column plus an offsets
+    index, so the data can be read back with np.memmap by TrajectoryStore. Use it as a context manager or call
+    close() when done.
+    """
+    def __init__(self, path: str, flush_every: int = 1000):
+        """
+        Creates (or overwrites) a trajectory store.
+
+        :param path: Directory of the store, created if it does not exist.
+        :param flush_every: Number of episodes recorded in memory before they are appended to disk.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.flush_every = flush_every
+        self.buffer = EpisodeBuffer()
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "wb") for name in COLUMNS}
+        np.zeros(1, dtype=COLUMNS["offsets"]).tofile(self._files["offsets"])
+        self._num_steps = 0
+        self._num_episodes = 0
+
+    def record(self, env: AbstractMDP, policy: AbstractPolicy, num_episodes: int) -> None:
+        """
+        Generates episodes following the policy and writes them to the store.
+
+        :param env: An environment object.
+        :param policy: A policy object.
+        :param num_episodes: Number of episodes to record.
+        """
+        for _ in range(num_episodes):
+            self.buffer.record(env, policy)
+            if len(self.buffer) >= self.flush_every:
+                self.flush()
+        self.flush()
+
+    def write(self, buffer: EpisodeBuffer) -> None:
+        """
+        Appends all episodes of an episode buffer to the store.
+
+        :param buffer: The buffer to write.
+        """
+        num_steps, num_episodes = buffer.num_steps, len(buffer)
+        buffer.states[:num_steps].astype(COLUMNS["states"], copy=False).tofile(self._files["states"])
+        buffer.actions[:num_steps].astype(COLUMNS["actions"], copy=False).tofile(self._files["actions"])
+        buffer.rewards[:num_steps].astype(COLUMNS["rewards"], copy=False).tofile(self._files["rewards"])
+        buffer.final_states[:num_episodes].astype(COLUMNS["final_states"], copy=False).tofile(
+            self._files["final_states"]
+        )
+        (buffer.offsets[1:num_episodes + 1] + self._num_steps).astype(COLUMNS["offsets"]).tofile(
+            self._files["offsets"]
+        )
+        self._num_steps += num_steps
+        self._num_episodes += num_episodes
+
+    def flush(self) -> None:
+        """
+        Writes the episodes recorded in memory to disk and updates the metadata.
+        """
+        if len(self.buffer):
+            self.write(self.buffer)
+            self.buffer.clear()
+        for file in self._files.values():
+            file.flush()
+        with open(os.path.join(self.path, METADATA_FILE), "w") as file:
+            json.dump({"num_episodes": self._num_episodes, "num_steps": self._num_steps,
+                       "columns": {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()}}, file)
+
+    def close(self) -> None:
+        """
+        Flushes the remaining episodes and closes the files.
+        """
+        self.flush()
+        for file in self._files.values():
+            file.close()
+
+    def __enter__(self) -> "TrajectoryWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class TrajectoryStore:
+    """
+    Read-only view on a trajectory store directory written by TrajectoryWriter. The columns are memory-mapped, so
+    stores larger than RAM can be used and several processes reading the same store share the page cache.
+    """
+    def __init__(self, path: str):
+        """
+        Opens a trajectory store.
+
+        :param path: Directory of the store.
+        """
+        with open(os.path.join(path, METADATA_FILE)) as file:
+            metadata = json.load(file)
+        self.path = path
+        self._num_episodes = metadata["num_episodes"]
+        self._num_steps = metadata["num_steps"]
+        lengths = {"states": self._num_steps, "actions": self._num_steps, "rewards": self._num_steps,
+                   "final_states": self._num_episodes, "offsets": self._num_episodes + 1}
+        for name, dtype in metadata["columns"].items():
+            # Zero-length files cannot be memory-mapped.
+            column = np.memmap(os.path.join(path, f"{name}.bin"), dtype=np.dtype(dtype), mode="r",
+                               shape=(lengths[name],)) if lengths[name] else np.empty(0, dtype=np.dtype(dtype))
+            setattr(self, name, column)
+
+    def episode(self, index: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        Returns an episode as memory-mapped views.
+
+        :param index: Index of the episode.
+        :return: A tuple (states, actions, rewards, final_state).
+        """
+        if not 0 <= index < self._num_episodes:
+            raise IndexError(f"Episode {index} is not in the store.")
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.states[start:end], self.actions[start:end], self.rewards[start:end], int(self.final_states[index])
+
+    def iter_episodes(self,
+                      start: int = 0,
+                      stop: Optional[int] = None,
+                      chunk_steps: int = 1 << 20) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, int]]:
+        """
+        Streams episodes in order. Episodes are read from disk in chunks of about chunk_steps steps, so only one
+        chunk is held in memory at a time.
+
+        :param start: Index of the first episode.
+        :param stop: Index after the last episode, defaults to the number of episodes in the store.
+        :param chunk_steps: Approximate number of steps read per chunk.
+        :return: An iterator of (states, actions, rewards, final_state) tuples.
+        """
+        stop = self._num_episodes if stop is None else min(stop, self._num_episodes)
+        offsets = np.asarray(self.offsets)
+        first = start
+        while first < stop:
+            last = int(np.searchsorted(offsets, offsets[first] + chunk_steps, side="right")) - 1
+            last = min(max(last, first + 1), stop)
+            base, end = offsets[first], offsets[last]
+            states = np.array(self.states[base:end])
+            actions = np.array(self.actions[base:end])
+            rewards = np.array(self.rewards[base:end])
+            final_states = np.array(self.final_states[first:last])
+            for index in range(first, last):
+                begin, finish = offsets[index] - base, offsets[index + 1] - base
+                final_state = int(final_states[index - first])
+                yield states[begin:finish], actions[begin:finish], rewards[begin:finish], final_state
+            first = last
+
+    @property
+    def num_steps(self) -> int:
+        """
+        :return: Total number of steps in the store.
+        """
+        return self._num_steps
+
+    def __len__(self) -> int:
+        """
+        :return: Number of episodes in the store.
+        """
+        return self._num_episodes
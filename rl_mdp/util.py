@@ -1,9 +1,14 @@
+from typing import Optional
 import numpy as np
 from rl_mdp.mdp.abstract_mdp import AbstractMDP
+from rl_mdp.mdp.dense_reward_function import DenseRewardFunction
 from rl_mdp.mdp.mdp import MDP
 from rl_mdp.mdp.reward_function import RewardFunction
+from rl_mdp.mdp.sparse_mdp import SparseMDP
+from rl_mdp.mdp.sparse_transition_function import SparseTransitionFunction
 from rl_mdp.mdp.transition_function import TransitionFunction
 from rl_mdp.policy.policy import Policy
+from rl_mdp.policy.tabular_policy import TabularPolicy
 
 
 def create_mdp() -> AbstractMDP:
@@ -72,3 +77,173 @@ def create_policy_2() -> Policy:
     policy_2.set_action_probabilities(2, [0.4, 0.6])  # State s2: 40% to take a0, 60% to take a1
     policy_2.set_action_probabilities(3, [1.0, 0.0])  # Terminal state: Arbitrary action.
     return policy_2
+
+
+def create_garnet_mdp(num_states: int,
+                      num_actions: int,
+                      branching: int,
+                      termination_prob: float = 0.01,
+                      discount_factor: float = 0.99,
+                      seed: Optional[int] = None,
+                      num_terminal_states: int = 1) -> SparseMDP:
+    """
+    Create a random sparse (Garnet) MDP. Every (state, action) pair moves to `branching` random successors with random
+    probabilities and has a reward drawn from N(0, 1). The last num_terminal_states states are terminal, one of them
+    is reached from every (state, action) pair with probability termination_prob, so episodes take about
+    1 / termination_prob steps. Episodes start in a uniformly sampled state.
+
+    :param num_states: Number of states, including the terminal states.
+    :param num_actions: Number of actions.
+    :param branching: Number of (not necessarily distinct) random successors of every (state, action) pair.
+    :param termination_prob: Probability of moving to the terminal state in every step.
+    :param discount_factor: The discount factor.
+    :param seed: Seed of the random model.
+    :param num_terminal_states: Number of terminal (absorbing) states.
+    """
+    if not 1 <= num_terminal_states < num_states:
+        raise ValueError(f"num_terminal_states must be in [1, {num_states}), got {num_terminal_states}.")
+    rng = np.random.default_rng(seed)
+    first_terminal_state = num_states - num_terminal_states
+    num_rows = num_states * num_actions
+    next_states = np.empty((num_rows, branching + 1), dtype=np.int64)
+    next_states[:, :branching] = rng.integers(first_terminal_state, size=(num_rows, branching))
+    next_states[:, branching] = rng.integers(first_terminal_state, num_states, size=num_rows)
+    probabilities = rng.random((num_rows, branching + 1))
+    probabilities[:, :branching] *= (1.0 - termination_prob) / probabilities[:, :branching].sum(axis=1, keepdims=True)
+    probabilities[:, branching] = termination_prob
+    rewards = rng.standard_normal((num_states, num_actions))
+    return _sparse_mdp(next_states, probabilities, rewards, discount_factor,
+                       np.arange(first_terminal_state, num_states), None)
+
+
+def create_gridworld_mdp(width: int,
+                         height: int,
+                         slip_prob: float = 0.1,
+                         discount_factor: float = 0.99) -> SparseMDP:
+    """
+    Create a gridworld with the actions up, right, down and left. A move succeeds with probability 1 - slip_prob,
+    otherwise the agent moves in a uniformly random direction; moves into a wall keep it in place. Every step costs
+    a reward of -1. Episodes start in the top left corner (state 0) and end in the bottom right corner.
+
+    :param width: Number of columns, state y * width + x is the cell in column x and row y.
+    :param height: Number of rows.
+    :param slip_prob: Probability of moving in a random direction.
+    :param discount_factor: The discount factor.
+    """
+    num_states = width * height
+    x, y = np.arange(num_states) % width, np.arange(num_states) // width
+    targets = np.column_stack((
+        np.where(y > 0, np.arange(num_states) - width, np.arange(num_states)),            # Up.
+        np.where(x < width - 1, np.arange(num_states) + 1, np.arange(num_states)),        # Right.
+        np.where(y < height - 1, np.arange(num_states) + width, np.arange(num_states)),   # Down.
+        np.where(x > 0, np.arange(num_states) - 1, np.arange(num_states)),                # Left.
+    ))
+    # Successors of (s, a): the intended cell, then the cells of the four random directions.
+    next_states = np.concatenate((targets[:, :, None], np.repeat(targets[:, None, :], 4, axis=1)), axis=2)
+    probabilities = np.array([1.0 - slip_prob] + [slip_prob / 4] * 4)
+    probabilities = np.broadcast_to(probabilities, next_states.shape)
+    rewards = np.full((num_states, 4), -1.0)
+    return _sparse_mdp(next_states.reshape(num_states * 4, 5), probabilities.reshape(num_states * 4, 5), rewards,
+                       discount_factor, num_states - 1, 0)
+
+
+def create_chain_mdp(num_states: int,
+                     success_prob: float = 0.9,
+                     ring: bool = False,
+                     termination_prob: float = 0.0,
+                     discount_factor: float = 0.99) -> SparseMDP:
+    """
+    Create a chain or ring MDP with the actions left (0) and right (1). A move succeeds with probability
+    success_prob, otherwise the agent stays in place, and every step costs a reward of -1. The last state is
+    terminal and is also reached from every state with probability termination_prob.
+
+    In a chain the states 0, ..., |S| - 2 lie on a line that ends in the terminal state and episodes start in
+    state 0. In a ring they lie on a cycle and episodes start in a uniformly sampled state.
+
+    :param num_states: Number of states, including the terminal state.
+    :param success_prob: Probability that a move succeeds.
+    :param ring: If True create a ring, otherwise a chain.
+    :param termination_prob: Probability of moving to the terminal state in every step. Should be positive for a
+                             ring; for a chain 0 keeps the pure random walk, whose episodes take O(|S|²) steps
+                             under a uniform policy.
+    :param discount_factor: The discount factor.
+    """
+    terminal_state = num_states - 1
+    states = np.arange(num_states)
+    if ring:
+        left, right = (states - 1) % terminal_state, (states + 1) % terminal_state
+    else:
+        left, right = np.maximum(states - 1, 0), np.minimum(states + 1, terminal_state)
+    move_prob, stay_prob = (1.0 - termination_prob) * success_prob, (1.0 - termination_prob) * (1 - success_prob)
+    # Successors of (s, a): the cell moved to, s itself and the terminal state.
+    next_states = np.stack((np.column_stack((left, states, np.full(num_states, terminal_state))),
+                            np.column_stack((right, states, np.full(num_states, terminal_state)))), axis=1)
+    probabilities = np.broadcast_to(np.array([move_prob, stay_prob, termination_prob]), next_states.shape)
+    rewards = np.full((num_states, 2), -1.0)
+    return _sparse_mdp(next_states.reshape(num_states * 2, 3), probabilities.reshape(num_states * 2, 3), rewards,
+                       discount_factor, terminal_state, None if ring else 0)
+
+
+def create_random_policy(num_states: int,
+                         num_actions: int,
+                         deterministic: bool = False,
+                         seed: Optional[int] = None) -> TabularPolicy:
+    """
+    Create a random policy for the generated MDPs.
+
+    :param num_states: Number of states.
+    :param num_actions: Number of actions.
+    :param deterministic: If True every state gets one random action, otherwise random action probabilities.
+    :param seed: Seed of the random policy.
+    """
+    rng = np.random.default_rng(seed)
+    if deterministic:
+        return TabularPolicy.from_mapping(rng.integers(num_actions, size=num_states), num_actions)
+    probabilities = rng.random((num_states, num_actions)) + 1e-3    # Every action keeps some probability.
+    return TabularPolicy(probabilities / probabilities.sum(axis=1, keepdims=True))
+
+
+def _sparse_mdp(next_states: np.ndarray,
+                probabilities: np.ndarray,
+                rewards: np.ndarray,
+                discount_factor: float,
+                terminal_states: int | np.ndarray,
+                start_state: Optional[int]) -> SparseMDP:
+    """
+    Builds a SparseMDP from k successors per (state, action) pair. The rows of the terminal states are replaced by
+    self-loops and their rewards by zero.
+
+    :param next_states: Array of shape (|S| * |A|, k), row s * |A| + a holds the successors of (s, a). Duplicate
+                        successors are summed.
+    :param probabilities: Array of shape (|S| * |A|, k) with the probabilities of the successors.
+    :param rewards: Array of shape (|S|, |A|) with the rewards.
+    :param discount_factor: The discount factor.
+    :param terminal_states: The terminal state or an array of terminal states.
+    :param start_state: The start state, None to sample it uniformly.
+    """
+    num_states, num_actions = rewards.shape
+    num_successors = next_states.shape[1]
+    next_states = np.array(next_states, dtype=np.int64)
+    probabilities = np.array(probabilities, dtype=np.float64)
+    terminal_states = np.atleast_1d(terminal_states)
+    terminal_rows = (terminal_states[:, None] * num_actions + np.arange(num_actions)).ravel()
+    next_states[terminal_rows] = np.repeat(terminal_states, num_actions)[:, None]
+    probabilities[terminal_rows] = 1.0 / num_successors
+    rewards = np.array(rewards, dtype=np.float64)
+    rewards[terminal_states] = 0.0
+
+    rows = np.repeat(np.arange(num_states * num_actions), num_successors)
+    stored = probabilities.ravel() > 0
+    rows = rows[stored]
+    transition_function = SparseTransitionFunction.from_coo(rows // num_actions, rows % num_actions,
+                                                            next_states.ravel()[stored], probabilities.ravel()[stored],
+                                                            num_states, num_actions)
+    return SparseMDP(
+        states=range(num_states),
+        actions=range(num_actions),
+        transition_function=transition_function,
+        reward_function=DenseRewardFunction(rewards),
+        discount_factor=discount_factor,
+        start_state=start_state,
+        terminal_states=terminal_states
+    )
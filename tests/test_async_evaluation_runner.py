@@ -0,0 +1,88 @@
+import asyncio
+from contextlib import aclosing
+import numpy as np
+import pytest
+from rl_mdp.model_free_prediction.async_evaluation_runner import AsyncEvaluationRunner
+from rl_mdp.model_free_prediction.monte_carlo_evaluator import MCEvaluator
+from rl_mdp.model_free_prediction.td_evaluator import TDEvaluator
+from rl_mdp.sampling.rng import seed_shared_rng
+from rl_mdp.util import create_mdp, create_policy_1
+
+
+async def _consume(runner, evaluator, policy, name, order, num_episodes=500):
+    async for result in runner.stream(evaluator, policy, num_episodes, report_every=50):
+        order.append((name, result.num_episodes))
+
+
+def test_concurrent_streams_interleave():
+    async def main():
+        order = []
+        async with AsyncEvaluationRunner(max_concurrency=1) as runner:
+            await asyncio.gather(_consume(runner, MCEvaluator(create_mdp()), create_policy_1(), "mc", order),
+                                 _consume(runner, TDEvaluator(create_mdp(), 0.1), create_policy_1(), "td", order))
+        return order
+
+    order = asyncio.run(main())
+    names = [name for name, _ in order]
+    assert [episodes for name, episodes in order if name == "mc"] == list(range(50, 501, 50))
+    assert [episodes for name, episodes in order if name == "td"] == list(range(50, 501, 50))
+    # Each stream yields snapshots while the other one is still running.
+    assert names.index("td") < len(names) - 1 - names[::-1].index("mc")
+    assert names.index("mc") < len(names) - 1 - names[::-1].index("td")
+
+
+def test_cancellation_releases_the_locks_and_the_slot():
+    async def main():
+        env, policy = create_mdp(), create_policy_1()
+        first_snapshot = asyncio.Event()
+
+        async def consume():
+            async with aclosing(runner.stream(MCEvaluator(env), policy, 1_000_000, report_every=50)) as snapshots:
+                async for _ in snapshots:
+                    first_snapshot.set()
+
+        async with AsyncEvaluationRunner(max_concurrency=1) as runner:
+            task = asyncio.create_task(consume())
+            await first_snapshot.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # A follow-up evaluation needs the same MDP and policy locks and the only slot.
+            result = await asyncio.wait_for(runner.evaluate(TDEvaluator(env, 0.1), policy, 200, report_every=50), 30)
+            while runner._running:      # The cancelled evaluation ends once its last chunk has finished.
+                await asyncio.sleep(0.01)
+            assert runner._semaphore._value == runner.max_concurrency
+            assert not any(lock.locked() for lock in runner._locks.values())
+        return result
+
+    assert asyncio.run(main()).num_episodes == 200
+
+
+def test_second_stream_on_a_running_evaluator_is_rejected():
+    async def main():
+        evaluator, policy = MCEvaluator(create_mdp()), create_policy_1()
+        async with AsyncEvaluationRunner() as runner:
+            async with aclosing(runner.stream(evaluator, policy, 500, report_every=50)) as snapshots:
+                await anext(snapshots)
+                with pytest.raises(ValueError):
+                    await anext(runner.stream(evaluator, policy, 500, report_every=50))
+            # Once the first evaluation is closed the evaluator can run again.
+            return await runner.evaluate(evaluator, policy, 100, report_every=50)
+
+    assert asyncio.run(main()).num_episodes == 100
+
+
+def test_evaluate_returns_the_final_snapshot():
+    async def main(evaluator, policy):
+        async with AsyncEvaluationRunner() as runner:
+            return await runner.evaluate(evaluator, policy, 250, report_every=100)
+
+    seed_shared_rng(0)
+    evaluator = MCEvaluator(create_mdp())
+    result = asyncio.run(main(evaluator, create_policy_1()))
+    assert result.num_episodes == 250
+    np.testing.assert_array_equal(result.value_fun, evaluator.value_fun)
+
+    seed_shared_rng(0)
+    expected = list(MCEvaluator(create_mdp()).evaluate_anytime(create_policy_1(), 250, report_every=100))[-1]
+    np.testing.assert_array_equal(result.value_fun, expected.value_fun)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from rl_mdp.mdp.mdp import MDP
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.model_free_prediction.batched_td_evaluator import BatchedTDEvaluator
+from rl_mdp.sampling.rng import seed_shared_rng
+from rl_mdp.util import create_garnet_mdp, create_mdp, create_policy_1, create_policy_2
+
+NUM_ENVS = 8
+
+
+def _lock_steps(env, num_steps, seed=0):
+    """
+    Random lock-steps on a small MDP, so that copies often share states.
+    """
+    rng = np.random.default_rng(seed)
+    for _ in range(num_steps):
+        states = rng.integers(env.num_states - 1, size=NUM_ENVS)
+        next_states = rng.integers(env.num_states, size=NUM_ENVS)
+        yield states, rng.standard_normal(NUM_ENVS), next_states, next_states == env.num_states - 1
+
+
+def test_sequential_td0_matches_the_scalar_loop():
+    env = create_garnet_mdp(6, 2, 2, discount_factor=0.9, seed=0)
+    evaluator = BatchedTDEvaluator(env, 0.1, num_envs=NUM_ENVS, semantics="sequential")
+    expected = np.zeros(env.num_states)
+    discounts = env.bootstrap_discounts()
+    for states, rewards, next_states, _ in _lock_steps(env, 200):
+        evaluator._update_td0(states, rewards, next_states)
+        for state, reward, next_state in zip(states, rewards, next_states):
+            expected[state] += 0.1 * (reward + discounts[next_state] * expected[next_state] - expected[state])
+    np.testing.assert_allclose(evaluator.value_fun, expected, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("semantics", BatchedTDEvaluator.SEMANTICS)
+def test_sparse_traces_match_dense_traces(semantics):
+    env = create_garnet_mdp(6, 2, 2, discount_factor=0.9, seed=0)
+    alpha, decay = 0.1, 0.9 * 0.7
+    evaluator = BatchedTDEvaluator(env, alpha, 0.7, num_envs=NUM_ENVS, semantics=semantics, trace_cutoff=1e-300)
+    expected = np.zeros(env.num_states)
+    traces = np.zeros((NUM_ENVS, env.num_states))
+    discounts = env.bootstrap_discounts()
+    for states, rewards, next_states, dones in _lock_steps(env, 200):
+        evaluator._update_td_lambda(states, rewards, next_states, dones)
+        traces *= decay
+        np.add.at(traces, (np.arange(NUM_ENVS), states), 1.0)
+        if semantics == "synchronous":
+            td_errors = rewards + discounts[next_states] * expected[next_states] - expected[states]
+            expected += alpha * (td_errors @ traces) / np.maximum(np.count_nonzero(traces, axis=0), 1)
+        else:
+            for k in range(NUM_ENVS):
+                td_error = rewards[k] + discounts[next_states[k]] * expected[next_states[k]] - expected[states[k]]
+                expected += alpha * td_error * traces[k]
+        traces[dones] = 0.0
+    np.testing.assert_allclose(evaluator.value_fun, expected, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("semantics", BatchedTDEvaluator.SEMANTICS)
+@pytest.mark.parametrize("lambd", [0.0, 0.5])
+def test_converges_to_the_exact_value_function(semantics, lambd):
+    env = create_mdp()
+    # Synchronous semantics learn more slowly per episode (see BatchedTDEvaluator), so they take a larger step size.
+    alpha = 0.01 if semantics == "synchronous" else 0.003
+    for policy in (create_policy_1(), create_policy_2()):
+        exact = ModelBasedEvaluator(env).evaluate(policy)
+        evaluator = BatchedTDEvaluator(env, alpha, lambd, num_envs=16, semantics=semantics,
+                                       rng=np.random.default_rng(0))
+        np.testing.assert_allclose(evaluator.evaluate(policy, 10000), exact, atol=0.15)
+
+
+def test_rejects_mdps_whose_episodes_never_finish():
+    env = create_mdp()
+    endless = MDP(env.states, env.actions, env.transition_function, env.reward_function, env.discount_factor)
+    with pytest.raises(ValueError):
+        BatchedTDEvaluator(endless, 0.1)
+    truncated = MDP(env.states, env.actions, env.transition_function, env.reward_function, env.discount_factor,
+                    max_episode_steps=10)
+    assert BatchedTDEvaluator(truncated, 0.1, num_envs=4).evaluate(create_policy_1(), 20).shape == (env.num_states,)
+
+
+def test_seeding_the_shared_generator_makes_runs_reproducible():
+    env, policy = create_mdp(), create_policy_2()
+    results = []
+    for _ in range(2):
+        seed_shared_rng(7)
+        results.append(BatchedTDEvaluator(env, 0.05, 0.5, num_envs=4).evaluate(policy, 50))
+    assert np.array_equal(results[0], results[1])
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from rl_mdp.mdp.dense_reward_function import DenseRewardFunction
+from rl_mdp.mdp.dense_transition_function import DenseTransitionFunction
+from rl_mdp.mdp.mdp import MDP
+from rl_mdp.model_free_prediction.compiled import NUMBA_AVAILABLE, _search, compiled_model, mc_kernel
+from rl_mdp.model_free_prediction.monte_carlo_evaluator import MCEvaluator
+from rl_mdp.model_free_prediction.td_lambda_evaluator import TDLambdaEvaluator
+from rl_mdp.policy.abstract_policy import AbstractPolicy
+from rl_mdp.policy.tabular_policy import TabularPolicy
+from rl_mdp.util import create_mdp, create_policy_1
+
+pytestmark = pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba is not installed")
+
+SHORTFALL = 9e-7      # Rows sum to 1 - SHORTFALL, which the validation accepts.
+
+
+def _model_with_zero_probability_tail():
+    """
+    State 0 moves to itself or to the terminal state 1, state 2 is never reached, and action 1 is never taken.
+    """
+    probabilities = np.zeros((3, 2, 3))
+    probabilities[0, :] = [0.5, 0.5 - SHORTFALL, 0.0]
+    probabilities[1, :, 1] = 1.0
+    probabilities[2, :, 2] = 1.0
+    env = MDP(range(3), range(2), DenseTransitionFunction(probabilities), DenseRewardFunction(np.ones((3, 2))),
+              terminal_state=1)
+    policy = TabularPolicy(np.array([[1.0 - SHORTFALL, 0.0]] * 3))
+    return env, policy
+
+
+def test_cdf_never_selects_zero_probability_entries():
+    env, policy = _model_with_zero_probability_tail()
+    transition_cdf, _, policy_cdf, *_ = compiled_model(env, policy)
+    largest_uniform = np.nextafter(1.0, 0.0)
+    for state in range(env.num_states):
+        assert _search(policy_cdf[state], largest_uniform) == 0
+        for action in range(env.num_actions):
+            next_state = _search(transition_cdf[state, action], largest_uniform)
+            assert env.transition_function.probabilities[state, action, next_state] > 0
+
+
+def test_kernel_never_visits_unreachable_states():
+    env, policy = _model_with_zero_probability_tail()
+    transition_cdf, rewards, policy_cdf, terminal_mask, start_state, max_steps = compiled_model(env, policy)
+    counts, _, _ = mc_kernel(transition_cdf, rewards, policy_cdf, env.discount_factor, terminal_mask, start_state,
+                             max_steps, 100_000, 0)
+    assert counts[0] == 100_000
+    assert counts[2] == 0
+
+
+class _MatrixPolicy(AbstractPolicy):
+    """
+    A policy that is neither a Policy nor a TabularPolicy, only queried through action_prob().
+    """
+    def __init__(self, probabilities: np.ndarray):
+        self.probabilities = probabilities
+
+    def sample_action(self, state: int) -> int:
+        return int(np.argmax(self.probabilities[state]))
+
+    def set_action_probabilities(self, state, action_probabilities) -> None:
+        self.probabilities[state] = action_probabilities
+
+    def action_prob(self, state: int, action: int) -> float:
+        return self.probabilities[state, action]
+
+
+def test_compiled_model_accepts_any_policy():
+    env, policy = _model_with_zero_probability_tail()
+    expected = compiled_model(env, policy)
+    model = compiled_model(env, _MatrixPolicy(policy.matrix.copy()))
+    assert model is not None
+    np.testing.assert_array_equal(model[2], expected[2])
+
+
+def test_transition_cdf_is_built_once():
+    env, policy = _model_with_zero_probability_tail()
+    other_policy = TabularPolicy(np.array([[0.0, 1.0]] * 3))
+    assert compiled_model(env, policy)[0] is compiled_model(env, other_policy)[0]
+
+
+def test_kernel_rng_makes_compiled_runs_reproducible():
+    env = create_mdp()
+    evaluators = (
+        lambda kernel_rng: MCEvaluator(env, compiled=True, kernel_rng=kernel_rng),
+        lambda kernel_rng: TDLambdaEvaluator(env, alpha=0.1, lambd=0.5, compiled=True, kernel_rng=kernel_rng))
+    for make_evaluator in evaluators:
+        first, second, other = (make_evaluator(np.random.default_rng(seed)).evaluate(create_policy_1(), 200)
+                                for seed in (0, 0, 1))
+        np.testing.assert_array_equal(first, second)
+        assert not np.array_equal(first, other)
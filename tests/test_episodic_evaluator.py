@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.model_free_prediction.episodic_evaluator import EpisodicEvaluator
+from rl_mdp.model_free_prediction.monte_carlo_evaluator import MCEvaluator
+from rl_mdp.model_free_prediction.stopping_criterion import StoppingCriterion
+from rl_mdp.model_free_prediction.td_evaluator import TDEvaluator
+from rl_mdp.model_free_prediction.td_lambda_evaluator import TDLambdaEvaluator
+from rl_mdp.sampling.rng import seed_shared_rng
+from rl_mdp.util import create_mdp, create_policy_1
+
+
+@pytest.mark.parametrize("make_evaluator", [lambda env: MCEvaluator(env), lambda env: TDEvaluator(env, 0.05),
+                                            lambda env: TDLambdaEvaluator(env, 0.05, 0.5)])
+def test_anytime_snapshots_end_with_the_final_estimate(make_evaluator):
+    seed_shared_rng(0)
+    evaluator = make_evaluator(create_mdp())
+    snapshots = list(evaluator.evaluate_anytime(create_policy_1(), 250, report_every=100))
+    assert [snapshot.num_episodes for snapshot in snapshots] == [100, 200, 250]
+    assert np.array_equal(snapshots[-1].value_fun, evaluator.value_fun)
+
+
+def test_evaluate_until_stops_early():
+    seed_shared_rng(0)
+    result = MCEvaluator(create_mdp()).evaluate_until(create_policy_1(), 100_000, StoppingCriterion(max_delta=0.01))
+    assert result.stopped_by == "max_delta"
+    assert result.num_episodes < 100_000
+
+
+def test_only_episodic_evaluators_offer_anytime_evaluation():
+    assert not isinstance(ModelBasedEvaluator(create_mdp()), EpisodicEvaluator)
+    assert not hasattr(ModelBasedEvaluator(create_mdp()), "evaluate_anytime")
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_monte_carlo_keeps_the_warm_start_of_states_without_returns(compiled):
+    seed_shared_rng(0)
+    env = create_mdp()
+    evaluator = MCEvaluator(env, compiled=compiled)
+    evaluator.initial_value_fun = np.full(env.num_states, 5.0)
+    value_fun = evaluator.evaluate(create_policy_1(), 200)
+    visited = evaluator.return_counts > 0
+    np.testing.assert_array_equal(value_fun[visited], evaluator.return_means[visited])
+    assert np.all(value_fun[~visited] == 5.0)
+    assert not visited.all()
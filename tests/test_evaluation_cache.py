@@ -0,0 +1,27 @@
+import numpy as np
+from rl_mdp.caching.evaluation_cache import EvaluationCache
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.util import create_garnet_mdp, create_random_policy
+
+
+def _evaluate_two_policies(evaluator: ModelBasedEvaluator) -> EvaluationCache:
+    env = evaluator.env
+    cache = EvaluationCache(evaluator)
+    for seed in (0, 1):
+        value_fun = cache.evaluate(create_random_policy(env.num_states, env.num_actions, seed=seed))
+        exact = ModelBasedEvaluator(env, method="direct").evaluate(
+            create_random_policy(env.num_states, env.num_actions, seed=seed))
+        np.testing.assert_allclose(value_fun, exact, rtol=1e-6, atol=1e-6)
+    return cache
+
+
+def test_direct_solves_do_not_count_warm_starts():
+    env = create_garnet_mdp(100, 3, 4, termination_prob=0.05, seed=0)
+    assert _evaluate_two_policies(ModelBasedEvaluator(env, method="direct")).warm_starts == 0
+    assert _evaluate_two_policies(ModelBasedEvaluator(env)).warm_starts == 0      # "auto" picks "direct".
+
+
+def test_iterative_solves_count_warm_starts():
+    env = create_garnet_mdp(100, 3, 4, termination_prob=0.05, seed=0)
+    assert _evaluate_two_policies(ModelBasedEvaluator(env, method="bicgstab")).warm_starts == 1
+    assert _evaluate_two_policies(ModelBasedEvaluator(env, direct_threshold=50)).warm_starts == 1
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from rl_mdp.util import create_garnet_mdp, create_mdp
+
+NUM_SAMPLES = 4000
+
+
+def _empirical_transition_probabilities(env, state: int, action: int) -> np.ndarray:
+    counts = np.zeros(env.num_states)
+    for _ in range(NUM_SAMPLES):
+        env._curr_state = state
+        next_state, _, _ = env.step(action)
+        counts[next_state] += 1
+    return counts / NUM_SAMPLES
+
+
+@pytest.mark.parametrize("create_env", [create_mdp, lambda: create_garnet_mdp(8, 2, 3, termination_prob=0.1, seed=0)])
+@pytest.mark.parametrize("precompiled", [False, True])
+def test_step_samples_the_transition_probabilities(create_env, precompiled):
+    env = create_env()
+    env.rng = np.random.default_rng(0)
+    if precompiled:
+        env.precompile()
+    next_states = np.arange(env.num_states)
+    for state in env.states:
+        for action in env.actions:
+            expected = np.array([env.transition_prob(next_state, state, action) for next_state in next_states])
+            # Standard error below 0.008, and successors without probability are never sampled.
+            empirical = _empirical_transition_probabilities(env, state, action)
+            np.testing.assert_allclose(empirical, expected, atol=0.04)
+            assert np.all(empirical[expected == 0] == 0)
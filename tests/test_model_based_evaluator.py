@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.util import create_garnet_mdp, create_random_policy
+
+
+@pytest.mark.filterwarnings("error")
+@pytest.mark.parametrize("method", ["gmres", "bicgstab", "sweep"])
+def test_iterative_methods_match_the_direct_solve(method):
+    env = create_garnet_mdp(300, 3, 4, termination_prob=0.05, seed=0)
+    policy = create_random_policy(env.num_states, env.num_actions, seed=0)
+    exact = ModelBasedEvaluator(env, method="direct").evaluate(policy)
+    evaluator = ModelBasedEvaluator(env, method=method, tol=1e-12)
+    np.testing.assert_allclose(evaluator.evaluate(policy), exact, rtol=1e-8, atol=1e-8)
+    assert 0 < evaluator.num_iterations <= evaluator.max_iterations
+
+
+@pytest.mark.filterwarnings("error")
+def test_gmres_counts_restart_cycles():
+    env = create_garnet_mdp(300, 3, 4, termination_prob=0.01, seed=0)
+    policy = create_random_policy(env.num_states, env.num_actions, seed=0)
+    with pytest.raises(RuntimeError, match="within 1 restart cycles"):
+        ModelBasedEvaluator(env, method="gmres", tol=1e-14, max_iterations=1).evaluate(policy)
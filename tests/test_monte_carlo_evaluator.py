@@ -0,0 +1,46 @@
+import numpy as np
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.model_free_prediction.monte_carlo_evaluator import MCEvaluator, _run_episodes
+from rl_mdp.sampling.rng import seed_shared_rng
+from rl_mdp.serialization import load_mdp, save_mdp
+from rl_mdp.util import create_mdp, create_policy_1, create_policy_2
+
+
+def test_seeded_parallel_evaluation_is_reproducible():
+    env, policy = create_mdp(), create_policy_2()
+    first = MCEvaluator(env, num_workers=2, seed=42).evaluate(policy, 400)
+    second = MCEvaluator(env, num_workers=2, seed=42).evaluate(policy, 400)
+    other = MCEvaluator(env, num_workers=2, seed=43).evaluate(policy, 400)
+    assert np.array_equal(first, second)
+    assert not np.array_equal(first, other)
+
+
+def test_loaded_mdp_is_reopened_by_path_in_the_workers(tmp_path):
+    save_mdp(create_mdp(), str(tmp_path))
+    assert load_mdp(str(tmp_path)).source_path == str(tmp_path)
+    assert load_mdp(str(tmp_path), mmap=False).source_path is None
+
+    # A worker that reopens the saved MDP samples exactly like one that receives a pickled copy of it.
+    for reopened, pickled in zip(
+            _run_episodes(str(tmp_path), create_policy_2(), 300, np.random.SeedSequence(5), False),
+            _run_episodes(create_mdp(), create_policy_2(), 300, np.random.SeedSequence(5), False)):
+        np.testing.assert_array_equal(reopened, pickled)
+
+    # So the loaded MDP evaluates identically to the in-memory one, with one worker and with several.
+    for num_workers in (1, 3):
+        seed_shared_rng(11)
+        from_path = MCEvaluator(load_mdp(str(tmp_path)), num_workers=num_workers, seed=11).evaluate(
+            create_policy_2(), 600)
+        seed_shared_rng(11)
+        in_memory = MCEvaluator(create_mdp(), num_workers=num_workers, seed=11).evaluate(create_policy_2(), 600)
+        np.testing.assert_array_equal(from_path, in_memory)
+
+
+def test_converges_to_the_exact_value_function():
+    seed_shared_rng(0)
+    env = create_mdp()
+    for policy in (create_policy_1(), create_policy_2()):
+        exact = ModelBasedEvaluator(env).evaluate(policy)
+        for vectorized_returns in (False, True):
+            value_fun = MCEvaluator(env, vectorized_returns=vectorized_returns).evaluate(policy, 5000)
+            np.testing.assert_allclose(value_fun, exact, atol=0.05)
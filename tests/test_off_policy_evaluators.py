@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.model_free_prediction.importance_sampling_mc_evaluator import ImportanceSamplingMCEvaluator
+from rl_mdp.model_free_prediction.monte_carlo_evaluator import MCEvaluator
+from rl_mdp.model_free_prediction.per_decision_td_lambda_evaluator import PerDecisionTDLambdaEvaluator
+from rl_mdp.sampling.rng import seed_shared_rng
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+from rl_mdp.util import create_mdp, create_policy_1, create_policy_2
+
+
+def _record(env, policy, num_episodes: int, seed: int) -> EpisodeBuffer:
+    seed_shared_rng(seed)
+    buffer = EpisodeBuffer()
+    for _ in range(num_episodes):
+        buffer.record(env, policy)
+    return buffer
+
+
+@pytest.mark.parametrize("weighted", [True, False])
+def test_importance_sampling_on_policy_equals_monte_carlo(weighted):
+    env, policy = create_mdp(), create_policy_2()
+    episodes = _record(env, policy, 500, seed=0)
+    seed_shared_rng(0)
+    expected = MCEvaluator(env).evaluate(policy, 500)
+    estimate = ImportanceSamplingMCEvaluator(env, policy, episodes, weighted=weighted).evaluate(policy)
+    np.testing.assert_allclose(estimate, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_off_policy_estimates_converge_to_the_exact_value_function():
+    # The target policy never takes a1 in s2, those steps get ratio 0 and cut off the rest of the episode.
+    env, target, behaviour = create_mdp(), create_policy_1(), create_policy_2()
+    exact = ModelBasedEvaluator(env).evaluate(target)
+    episodes = _record(env, behaviour, 20_000, seed=0)
+    np.testing.assert_allclose(ImportanceSamplingMCEvaluator(env, behaviour, episodes).evaluate(target), exact,
+                               atol=0.05)
+    np.testing.assert_allclose(ImportanceSamplingMCEvaluator(env, behaviour, episodes, weighted=False).evaluate(target),
+                               exact, atol=0.05)
+    np.testing.assert_allclose(PerDecisionTDLambdaEvaluator(env, behaviour, episodes, 0.001, 0.5).evaluate(target),
+                               exact, atol=0.1)
+
+
+def test_evaluate_many_matches_separate_evaluations():
+    env, behaviour = create_mdp(), create_policy_2()
+    episodes = _record(env, behaviour, 200, seed=0)
+    targets = [create_policy_1(), create_policy_2()]
+    for evaluator in (ImportanceSamplingMCEvaluator(env, behaviour, episodes, chunk_steps=64),
+                      PerDecisionTDLambdaEvaluator(env, behaviour, episodes, 0.05, 0.5, chunk_steps=64)):
+        estimates = evaluator.evaluate_many(targets)
+        for estimate, target in zip(estimates, targets):
+            np.testing.assert_allclose(estimate, evaluator.evaluate(target), rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("make_evaluator", [
+    lambda env, behaviour, episodes: ImportanceSamplingMCEvaluator(env, behaviour, episodes),
+    lambda env, behaviour, episodes: PerDecisionTDLambdaEvaluator(env, behaviour, episodes, 0.05, 0.5),
+])
+def test_logged_actions_without_behaviour_support_are_rejected(make_evaluator):
+    env = create_mdp()
+    episodes = _record(env, create_policy_2(), 200, seed=0)
+    # create_policy_1 never takes a1 in s2, which the logged episodes of create_policy_2 contain.
+    evaluator = make_evaluator(env, create_policy_1(), episodes)
+    with pytest.raises(ValueError):
+        evaluator.evaluate(create_policy_2())
@@ -0,0 +1,41 @@
+import time
+import numpy as np
+from rl_mdp.instrumentation.profiler import PROFILE_ENV_VAR, Profiler
+from rl_mdp.model_free_prediction.monte_carlo_evaluator import MCEvaluator
+from rl_mdp.model_free_prediction.td_evaluator import TDEvaluator
+from rl_mdp.model_free_prediction.td_lambda_evaluator import TDLambdaEvaluator
+from rl_mdp.sampling.rng import seed_shared_rng
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+from rl_mdp.util import create_mdp, create_policy_1
+
+
+def test_every_evaluation_is_profiled_separately(monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV_VAR, "1")
+    env, policy = create_mdp(), create_policy_1()
+    for evaluator in (MCEvaluator(env), TDEvaluator(env, 0.1), TDLambdaEvaluator(env, 0.1, 0.5)):
+        evaluator.evaluate(policy, 100)
+        time.sleep(0.3)     # Idle time between two evaluations must not be counted.
+        evaluator.evaluate(policy, 100)
+        summary = evaluator.profiler.summary()
+        assert summary["num_episodes"] == 100
+        assert summary["wall_time"] < 0.3
+
+
+def test_timed_recording_matches_the_buffer():
+    env, policy = create_mdp(), create_policy_1()
+    buffers = []
+    for profiler in (None, Profiler("timed"), Profiler("counted", time_steps=False)):
+        seed_shared_rng(0)
+        buffer = EpisodeBuffer()
+        for _ in range(50):
+            if profiler is None:
+                buffer.record(env, policy)
+            else:
+                profiler.record(buffer, env, policy)
+        buffers.append(buffer)
+        if profiler is not None:
+            assert profiler.num_steps == buffer.num_steps
+            assert profiler.num_episodes == 50
+            assert (profiler.section_times["sampling"] > 0) == profiler.time_steps
+    for buffer in buffers[1:]:
+        np.testing.assert_array_equal(buffer.states[:buffer.num_steps], buffers[0].states[:buffers[0].num_steps])
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from rl_mdp.mdp.sparse_mdp import SparseMDP
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.serialization import load_mdp, load_policy, save_mdp, save_policy
+from rl_mdp.util import create_garnet_mdp, create_mdp, create_policy_1, create_random_policy
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_sparse_mdp_round_trip(tmp_path, validate):
+    env = create_garnet_mdp(50, 3, 4, termination_prob=0.05, seed=0)
+    save_mdp(env, str(tmp_path))
+    loaded = load_mdp(str(tmp_path), validate=validate)
+
+    assert isinstance(loaded, SparseMDP)
+    assert (loaded.transition_function.matrix != env.transition_function.matrix).nnz == 0
+    np.testing.assert_array_equal(loaded.reward_function.rewards, env.reward_function.rewards)
+    np.testing.assert_array_equal(loaded.terminal_mask, env.terminal_mask)
+    assert loaded.discount_factor == env.discount_factor
+    assert loaded.start_state == env.start_state
+    assert loaded.max_episode_steps == env.max_episode_steps
+
+    policy = create_random_policy(env.num_states, env.num_actions, seed=0)
+    np.testing.assert_allclose(ModelBasedEvaluator(loaded).evaluate(policy), ModelBasedEvaluator(env).evaluate(policy))
+
+
+def test_dense_mdp_and_policy_round_trip(tmp_path):
+    env = create_mdp()
+    policy = create_policy_1()
+    save_mdp(env, str(tmp_path / "mdp"))
+    save_policy(policy, str(tmp_path / "policy"), env.num_states, env.num_actions)
+    loaded_env = load_mdp(str(tmp_path / "mdp"), mmap=False)
+    loaded_policy = load_policy(str(tmp_path / "policy"))
+
+    np.testing.assert_array_equal(loaded_env.transition_function.probabilities,
+                                  env.transition_function.probabilities)
+    np.testing.assert_array_equal(loaded_env.terminal_mask, env.terminal_mask)
+    np.testing.assert_allclose(ModelBasedEvaluator(loaded_env).evaluate(loaded_policy),
+                               ModelBasedEvaluator(env).evaluate(policy))
+
+
+def test_load_mdp_without_validation_keeps_the_memory_map(tmp_path):
+    env = create_garnet_mdp(50, 3, 4, seed=0)
+    save_mdp(env, str(tmp_path))
+    # Corrupt the probabilities, a validating load reads (and rejects) them, a trusted load does not look at them.
+    data = np.load(str(tmp_path / "data.npy"))
+    np.save(str(tmp_path / "data.npy"), data * 0.5)
+    with pytest.raises(ValueError):
+        load_mdp(str(tmp_path))
+
+    loaded = load_mdp(str(tmp_path), validate=False)
+    matrix = loaded.transition_function.matrix
+    assert matrix.has_canonical_format
+    assert not matrix.data.flags.writeable and not matrix.indices.flags.writeable      # Read-only maps, no copies.
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from rl_mdp.policy.tabular_policy import TabularPolicy
+from rl_mdp.util import create_policy_1
+
+
+def test_sample_actions_never_draws_zero_probability_actions():
+    # Rows that sum to slightly less than one (within the validation tolerance) with a zero last action.
+    probabilities = np.array([[0.5, 0.5 - 9e-7, 0.0],
+                              [0.0, 1.0 - 9e-7, 0.0]])
+    policy = TabularPolicy(probabilities)
+    states = np.array([0, 1] * 4)
+    uniforms = np.array([0.0, 0.0, 0.5, 0.5, 1.0 - 1e-9, 1.0 - 1e-9, np.nextafter(1.0, 0.0), np.nextafter(1.0, 0.0)])
+    actions = policy.sample_actions(states, uniforms)
+    assert np.all(probabilities[states, actions] > 0)
+
+
+def test_sample_actions_matches_the_action_probabilities():
+    probabilities = np.array([[0.2, 0.0, 0.8],
+                              [0.0, 0.0, 1.0]])
+    policy = TabularPolicy(probabilities, rng=np.random.default_rng(0))
+    actions = policy.sample_actions(np.zeros(100_000, dtype=np.int64))
+    assert np.count_nonzero(actions == 1) == 0
+    assert abs(np.mean(actions == 0) - 0.2) < 0.01
+    assert np.all(policy.sample_actions(np.ones(1000, dtype=np.int64)) == 2)
+
+
+@pytest.mark.parametrize("action_probabilities", [[1.0], [0.5, 0.5, 0.0, 0.0], [[1.0, 0.0, 0.0]]])
+def test_set_action_probabilities_rejects_rows_of_the_wrong_shape(action_probabilities):
+    policy = TabularPolicy.uniform(2, 3)
+    with pytest.raises(ValueError):
+        policy.set_action_probabilities(0, action_probabilities)
+    np.testing.assert_array_equal(policy.matrix[0], np.full(3, 1 / 3))
+
+
+def test_policy_action_dist_is_read_only():
+    policy = create_policy_1()
+    policy.sample_action(0)         # Builds the alias table of state 0.
+    with pytest.raises(TypeError):
+        policy.action_dist[0] = [0.0, 1.0]
+    with pytest.raises(AttributeError):
+        policy.action_dist = {}
+    policy.set_action_probabilities(0, [0.0, 1.0])
+    assert policy.action_dist[0] == [0.0, 1.0]
+    assert all(policy.sample_action(0) == 1 for _ in range(100))
+    assert TabularPolicy.from_policy(policy, 4, 2).to_policy().action_dist == policy.action_dist
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.model_free_prediction.td_evaluator import TDEvaluator
+from rl_mdp.model_free_prediction.td_lambda_evaluator import TDLambdaEvaluator
+from rl_mdp.sampling.rng import seed_shared_rng
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+from rl_mdp.util import create_garnet_mdp, create_mdp, create_policy_1, create_policy_2, create_random_policy
+
+
+@pytest.mark.parametrize("trace_type", TDLambdaEvaluator.TRACE_TYPES)
+def test_sparse_traces_match_dense_traces(trace_type):
+    env = create_garnet_mdp(50, 2, 3, termination_prob=0.05, discount_factor=0.95, seed=0)
+    policy = create_random_policy(env.num_states, env.num_actions, seed=0)
+    env.rng, policy.rng = np.random.default_rng(1), np.random.default_rng(2)
+    buffer = EpisodeBuffer()
+    for _ in range(50):
+        buffer.record(env, policy)
+
+    dense = TDLambdaEvaluator(env, 0.1, 0.8, trace_type=trace_type)
+    sparse = TDLambdaEvaluator(env, 0.1, 0.8, trace_type=trace_type, sparse_traces=True, trace_cutoff=1e-12)
+    for index in range(len(buffer)):
+        states, _, rewards, final_state = buffer.episode(index)
+        dense.update_from_episode(states, rewards, final_state)
+        sparse.update_from_episode(states, rewards, final_state)
+    np.testing.assert_allclose(sparse.value_fun, dense.value_fun, rtol=1e-9, atol=1e-9)
+
+
+def test_rejects_non_positive_trace_cutoff():
+    with pytest.raises(ValueError):
+        TDLambdaEvaluator(create_mdp(), 0.1, 0.0, sparse_traces=True, trace_cutoff=0.0)
+
+
+def test_sparse_traces_with_zero_decay():
+    seed_shared_rng(0)
+    env = create_mdp()
+    value_fun = TDLambdaEvaluator(env, 0.1, 0.0, sparse_traces=True).evaluate(create_policy_1(), 10)
+    assert np.all(np.isfinite(value_fun))
+
+
+@pytest.mark.parametrize("sparse_traces", [False, True])
+def test_converges_to_the_exact_value_function(sparse_traces):
+    seed_shared_rng(0)
+    env = create_mdp()
+    for policy in (create_policy_1(), create_policy_2()):
+        exact = ModelBasedEvaluator(env).evaluate(policy)
+        value_fun = TDLambdaEvaluator(env, 0.003, 0.5, sparse_traces=sparse_traces).evaluate(policy, 10000)
+        np.testing.assert_allclose(value_fun, exact, atol=0.15)
+
+
+def test_td0_converges_to_the_exact_value_function():
+    seed_shared_rng(0)
+    env = create_mdp()
+    for policy in (create_policy_1(), create_policy_2()):
+        exact = ModelBasedEvaluator(env).evaluate(policy)
+        np.testing.assert_allclose(TDEvaluator(env, 0.003).evaluate(policy, 10000), exact, atol=0.15)
@@ -0,0 +1,25 @@
+import numpy as np
+from rl_mdp.model_free_prediction.td_lambda_evaluator import TDLambdaEvaluator
+from rl_mdp.model_free_prediction.td_lambda_sweep import TDLambdaSweep
+from rl_mdp.trajectory.episode_buffer import EpisodeBuffer
+from rl_mdp.util import create_garnet_mdp, create_random_policy
+
+
+def test_sweep_matches_standalone_td_lambda():
+    env = create_garnet_mdp(30, 2, 3, termination_prob=0.1, discount_factor=0.95, seed=0)
+    policy = create_random_policy(env.num_states, env.num_actions, seed=0)
+    env.rng, policy.rng = np.random.default_rng(1), np.random.default_rng(2)
+    buffer = EpisodeBuffer()
+    for _ in range(30):
+        buffer.record(env, policy)
+
+    sweep = TDLambdaSweep(env, alphas=[0.05, 0.2], lambdas=[0.0, 0.5, 1.0])
+    evaluators = [TDLambdaEvaluator(env, alpha, lambd) for alpha, lambd in sweep.configs]
+    for index in range(len(buffer)):
+        states, _, rewards, final_state = buffer.episode(index)
+        sweep.update_from_episode(states, rewards, final_state)
+        for evaluator in evaluators:
+            evaluator.update_from_episode(states, rewards, final_state)
+
+    for row, evaluator in zip(sweep.value_fun, evaluators):
+        np.testing.assert_allclose(row, evaluator.value_fun, rtol=1e-10, atol=1e-10)
@@ -0,0 +1,91 @@
+from typing import Optional
+import numpy as np
+import pytest
+from rl_mdp.mdp.dense_reward_function import DenseRewardFunction
+from rl_mdp.mdp.dense_transition_function import DenseTransitionFunction
+from rl_mdp.mdp.mdp import MDP
+from rl_mdp.mdp.sparse_mdp import SparseMDP
+from rl_mdp.mdp.sparse_transition_function import SparseTransitionFunction
+from rl_mdp.mdp.vector_mdp import VectorMDP
+from rl_mdp.model_based_prediction.model_based_evaluator import ModelBasedEvaluator
+from rl_mdp.model_free_prediction.monte_carlo_evaluator import MCEvaluator
+from rl_mdp.model_free_prediction.td_evaluator import TDEvaluator
+from rl_mdp.policy.tabular_policy import TabularPolicy
+
+GAMMA = 0.5
+
+
+def _create_forked_mdp(max_episode_steps: Optional[int] = None) -> MDP:
+    """
+    Deterministic MDP with two terminal states: a0 leads 0 -> 1 -> 2 and a1 leads 0 -> 3, every step has reward 1.
+    The terminal states loop onto themselves with reward 5, which must never be counted.
+    """
+    probabilities = np.zeros((4, 2, 4))
+    probabilities[0, 0, 1] = probabilities[0, 1, 3] = 1.0
+    probabilities[1, :, 2] = 1.0
+    probabilities[2, :, 2] = probabilities[3, :, 3] = 1.0
+    rewards = np.ones((4, 2))
+    rewards[[2, 3]] = 5.0
+    return MDP(range(4), range(2), DenseTransitionFunction(probabilities), DenseRewardFunction(rewards),
+               discount_factor=GAMMA, terminal_states=[2, 3], max_episode_steps=max_episode_steps)
+
+
+def test_episodes_end_in_every_terminal_state():
+    env = _create_forked_mdp()
+    env.reset()
+    assert env.step(1) == (3, 1.0, True)
+    assert not env.truncated
+    env.reset()
+    assert env.step(0) == (1, 1.0, False)
+    assert env.step(0) == (2, 1.0, True)
+    assert not env.truncated
+
+
+def test_truncation_sets_the_truncated_flag():
+    env = _create_forked_mdp(max_episode_steps=1)
+    env.reset()
+    assert env.step(0) == (1, 1.0, True)
+    assert env.truncated
+    env.reset()
+    assert env.step(1) == (3, 1.0, True)
+    assert not env.truncated        # Reaching a terminal state on the last allowed step is a termination.
+
+
+@pytest.mark.parametrize("max_episode_steps, expected", [(None, [1.0 + GAMMA * 10.0, 1.0]),
+                                                          (1, [1.0 + GAMMA * 10.0, 10.0])])
+def test_td_bootstraps_from_truncated_but_not_from_terminal_states(max_episode_steps, expected):
+    # With alpha = 1 a single episode sets V(s) to its TD target, bootstrapped from the initial value 10.
+    evaluator = TDEvaluator(_create_forked_mdp(max_episode_steps), alpha=1.0)
+    evaluator.initial_value_fun = np.full(4, 10.0)
+    value_fun = evaluator.evaluate(TabularPolicy.from_mapping(np.zeros(4), 2), 1)
+    np.testing.assert_allclose(value_fun[:2], expected)
+
+
+@pytest.mark.parametrize("max_episode_steps, expected", [(None, 1.0 + GAMMA), (1, 1.0)])
+def test_monte_carlo_cuts_off_the_returns_of_truncated_episodes(max_episode_steps, expected):
+    value_fun = MCEvaluator(_create_forked_mdp(max_episode_steps)).evaluate(
+        TabularPolicy.from_mapping(np.zeros(4), 2), 1)
+    assert value_fun[0] == pytest.approx(expected)
+
+
+def test_vector_mdp_resets_truncated_copies():
+    vector_env = VectorMDP(_create_forked_mdp(max_episode_steps=1), num_envs=4, rng=np.random.default_rng(0))
+    next_states, rewards, dones = vector_env.step(np.array([0, 0, 1, 1]))
+    np.testing.assert_array_equal(next_states, [1, 1, 3, 3])
+    np.testing.assert_array_equal(dones, [True, True, True, True])
+    np.testing.assert_array_equal(vector_env.truncated, [True, True, False, False])
+    np.testing.assert_array_equal(vector_env.current_states, [0, 0, 0, 0])
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_model_based_evaluator_zeroes_every_terminal_row(sparse):
+    env = _create_forked_mdp()
+    if sparse:
+        env = SparseMDP(range(4), range(2), SparseTransitionFunction.from_dense(env.transition_function.probabilities),
+                        env.reward_function, GAMMA, terminal_states=[2, 3])
+    transition_matrix, rewards = ModelBasedEvaluator(env).policy_model(TabularPolicy.uniform(4, 2))
+    transition_matrix = transition_matrix.toarray() if sparse else transition_matrix
+    assert not transition_matrix[[2, 3]].any()
+    np.testing.assert_array_equal(rewards, [1.0, 1.0, 0.0, 0.0])
+    np.testing.assert_allclose(ModelBasedEvaluator(env).evaluate(TabularPolicy.uniform(4, 2)),
+                               [1.0 + GAMMA / 2, 1.0, 0.0, 0.0])